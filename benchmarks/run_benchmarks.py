@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks reproductible : chargement, simulation, statistiques, graphiques
+
+Mesure les fonctions des dashboards et du pipeline de données sur des jeux
+synthétiques (1 an au pas de 15 min, 10 ans au pas de 15 min, 1 an au pas
+de 1 min) et ajoute les résultats à un historique JSON pour détecter les
+régressions d'une exécution à l'autre.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --datasets 1y --repeat 5
+    python benchmarks/run_benchmarks.py --filter simulate --threshold 0.2
+"""
+import argparse
+import ast
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DATA_FETCHER_DIR = PROJECT_ROOT / "data-fetcher"
+HISTORY_FILE = Path(__file__).resolve().parent / "results" / "history.json"
+
+sys.path.insert(0, str(DATA_FETCHER_DIR))
+from timebase import LOCAL_TZ, format_timestamps
+
+# Jeux de données synthétiques : (années, pas en minutes)
+DATASETS = {
+    '1y': (1, 15),
+    '10y': (10, 15),
+    '1min': (1, 1),
+}
+
+# Fonctions mesurées dans chaque application
+APP_FUNCTIONS = {
+    'app': (PROJECT_ROOT / "streamlit-claude" / "app.py",
+            ['load_csv_data', 'simulate_battery', 'calculate_stats', 'create_chart']),
+    'app2': (PROJECT_ROOT / "streamlit-claude" / "app2.py",
+             ['load_csv_data', 'simulate_battery', 'calculate_daily_stats']),
+    'nicegui': (PROJECT_ROOT / "streamlit-claude" / "main.py",
+                ['load_data', 'simulate_battery_logic', 'calculate_stats']),
+    'gemini': (PROJECT_ROOT / "streamlit-gemini" / "app.py",
+               ['load_data', 'process_energy_flow']),
+}
+
+
+# ========================================
+# CHARGEMENT DES FONCTIONS
+# ========================================
+
+def load_functions(path, names):
+    """
+    Extrait des fonctions d'un script d'application sans l'exécuter
+
+    Les dashboards exécutent leur interface à l'import (st.set_page_config,
+    ui.run...). On ne compile donc que les imports, les constantes de module
+    (noms en majuscules), les fonctions demandées sans leurs décorateurs de
+    cache, pour mesurer le code brut, et les fonctions et classes du module
+    dont elles dépendent (AppData, read_series... pour load_data de
+    main.py). Les imports indisponibles (streamlit, nicegui) sont ignorés.
+    """
+    tree = ast.parse(Path(path).read_text(encoding='utf-8'), filename=str(path))
+    namespace = {'__file__': str(path), '__name__': f"bench_{Path(path).stem}"}
+
+    for node in tree.body:
+        targets = [t for target in getattr(node, 'targets', [])
+                   for t in (target.elts if isinstance(target, ast.Tuple) else [target])]
+        is_constant = (isinstance(node, ast.Assign)
+                       and all(isinstance(t, ast.Name) and t.id.isupper() for t in targets))
+        if isinstance(node, (ast.Import, ast.ImportFrom)) or is_constant:
+            module = ast.Module(body=[node], type_ignores=[])
+            try:
+                exec(compile(module, str(path), 'exec'), namespace)
+            except (ImportError, NameError):
+                pass
+
+    # Dépendances des fonctions demandées, de proche en proche
+    definitions = {node.name: node for node in tree.body if isinstance(node, (ast.FunctionDef, ast.ClassDef))}
+    wanted, pending = set(), list(names)
+    while pending:
+        name = pending.pop()
+        if name in wanted or name not in definitions:
+            continue
+        wanted.add(name)
+        pending.extend(n.id for n in ast.walk(definitions[name]) if isinstance(n, ast.Name))
+
+    functions = {}
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)) and node.name in wanted:
+            if isinstance(node, ast.FunctionDef):
+                node.decorator_list = []
+            module = ast.Module(body=[node], type_ignores=[])
+            exec(compile(module, str(path), 'exec'), namespace)
+            if node.name in names:
+                functions[node.name] = namespace[node.name]
+
+    missing = set(names) - set(functions)
+    if missing:
+        raise RuntimeError(f"Fonctions introuvables dans {path}: {', '.join(sorted(missing))}")
+    return functions
+
+
+# ========================================
+# DONNÉES SYNTHÉTIQUES
+# ========================================
+
+def generate_dataset(directory, years, step_minutes, seed=42):
+    """
+    Écrit data/production.csv et data/consumption.csv dans `directory`
+
+    Les fichiers contiennent à la fois les colonnes *_kw et 'value' pour
+    être lisibles par tous les chargeurs des dashboards.
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range('2024-01-01', periods=int(years * 365 * 24 * 60 / step_minutes),
+                               freq=f"{step_minutes}min", tz=LOCAL_TZ)
+    hours = timestamps.hour.to_numpy() + timestamps.minute.to_numpy() / 60
+    season = 0.5 + 0.5 * np.cos(2 * np.pi * (timestamps.dayofyear.to_numpy() - 172) / 365)
+
+    production = 170 * season * np.exp(-((hours - 12) ** 2) / 18) * rng.uniform(0.3, 1.2, len(hours))
+    production[(hours < 6) | (hours > 20)] = 0
+    consumption = 25 * (1 + np.exp(-((hours - 19) ** 2) / 6)) * rng.uniform(0.7, 1.3, len(hours))
+
+    data_dir = Path(directory) / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    formatted = format_timestamps(timestamps)
+    pd.DataFrame({'timestamp': formatted, 'production_kw': production, 'value': production}) \
+        .to_csv(data_dir / "production.csv", index=False)
+    pd.DataFrame({'timestamp': formatted, 'consumption_kw': consumption, 'value': consumption}) \
+        .to_csv(data_dir / "consumption.csv", index=False)
+    return data_dir, production, consumption, step_minutes / 60
+
+
+# ========================================
+# MESURES
+# ========================================
+
+def measure(func, repeat, max_seconds):
+    """Exécute func jusqu'à `repeat` fois (ou jusqu'au budget de temps)"""
+    timings = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - t0)
+        if time.perf_counter() - start > max_seconds:
+            break
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+        'runs': len(timings),
+    }
+
+
+def build_benchmarks(dataset_dir, data_dir, production, consumption, time_step_hours):
+    """Liste des (nom, fonction) à mesurer pour un jeu de données"""
+    apps = {name: load_functions(path, names) for name, (path, names) in APP_FUNCTIONS.items()}
+    from scaler import scale_production_to_consumption
+    from battery import simulate_battery_batch
+
+    production_list = production.tolist()
+    consumption_list = consumption.tolist()
+    prod_csv = data_dir / "production.csv"
+    cons_csv = data_dir / "consumption.csv"
+
+    # Entrées pré-calculées pour les fonctions en aval
+    _, _, network = simulate_battery_batch(production, consumption, 500, time_step_hours)
+    network_list = network[0].tolist()
+    gemini_df = apps['gemini']['load_data']()
+    chart_times = pd.date_range('2024-01-01', periods=len(production), freq=f"{round(time_step_hours * 60)}min")
+
+    app, app2, nicegui, gemini = apps['app'], apps['app2'], apps['nicegui'], apps['gemini']
+    return [
+        ('load_csv_data[app]', app['load_csv_data']),
+        ('load_csv_data[app2]', lambda: (app2['load_csv_data'](str(prod_csv)),
+                                         app2['load_csv_data'](str(cons_csv)))),
+        ('load_data[nicegui]', nicegui['load_data']),
+        ('load_data[gemini]', gemini['load_data']),
+        ('simulate_battery[app]', lambda: app['simulate_battery'](production_list, consumption_list, 500)),
+        ('simulate_battery[app2]', lambda: app2['simulate_battery'](production_list, consumption_list, 500)),
+        ('simulate_battery[nicegui]',
+         lambda: nicegui['simulate_battery_logic'](production_list, consumption_list, 500)),
+        ('simulate_battery[gemini]', lambda: gemini['process_energy_flow'](gemini_df, 500)),
+        ('simulate_battery[batch]',
+         lambda: simulate_battery_batch(production, consumption, 500, time_step_hours)),
+        ('simulate_battery[batch x31]',
+         lambda: simulate_battery_batch(production, consumption, np.arange(0, 1501, 50), time_step_hours)),
+        ('calculate_stats[app]', lambda: app['calculate_stats'](production_list, consumption_list, network_list)),
+        ('calculate_stats[app2]',
+         lambda: app2['calculate_daily_stats'](production_list, consumption_list, network_list)),
+        ('calculate_stats[nicegui]',
+         lambda: nicegui['calculate_stats'](production_list, consumption_list, network_list)),
+        ('create_chart[app].to_json',
+         lambda: app['create_chart'](chart_times, production, "Production", "#3b82f6", fill=True).to_json()),
+        ('scale_production_to_consumption',
+         lambda: scale_production_to_consumption(prod_csv, cons_csv, Path(dataset_dir) / "scaled.csv")),
+    ]
+
+
+def git_revision():
+    """Révision git courante (ou None hors dépôt)"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path):
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return []
+
+
+def compare(previous, results, threshold):
+    """Affiche l'écart avec l'exécution précédente, retourne les régressions"""
+    regressions = []
+    if previous is None:
+        return regressions
+    for key, result in results.items():
+        before = previous['results'].get(key)
+        if before is None:
+            continue
+        ratio = result['min'] / before['min'] - 1
+        if ratio > threshold:
+            regressions.append((key, ratio))
+    return regressions
+
+
+# ========================================
+# POINT D'ENTRÉE
+# ========================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks du dashboard solaire")
+    parser.add_argument('--datasets', default=','.join(DATASETS),
+                        help=f"Jeux de données à mesurer parmi {', '.join(DATASETS)}")
+    parser.add_argument('--repeat', type=int, default=3, help="Nombre maximal d'exécutions par mesure")
+    parser.add_argument('--max-time', type=float, default=30.0,
+                        help="Budget de temps par mesure (secondes) avant d'arrêter les répétitions")
+    parser.add_argument('--filter', default=None, help="Ne mesurer que les benchmarks contenant ce texte")
+    parser.add_argument('--history', type=Path, default=HISTORY_FILE, help="Fichier d'historique JSON")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="Seuil de régression (0.10 = +10%% sur le temps minimal)")
+    args = parser.parse_args()
+
+    datasets = [d.strip() for d in args.datasets.split(',') if d.strip()]
+    unknown = set(datasets) - set(DATASETS)
+    if unknown:
+        parser.error(f"Jeux de données inconnus: {', '.join(sorted(unknown))}")
+
+    print("=" * 60)
+    print("BENCHMARKS - DASHBOARD SOLAIRE")
+    print("=" * 60)
+
+    results = {}
+    initial_cwd = os.getcwd()
+    for dataset in datasets:
+        years, step_minutes = DATASETS[dataset]
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir, production, consumption, time_step_hours = generate_dataset(tmp, years, step_minutes)
+            print(f"\n📊 Jeu '{dataset}': {len(production)} points ({years} an(s), pas {step_minutes} min)")
+            # Les chargeurs des dashboards lisent data/*.csv relativement au répertoire courant
+            os.chdir(tmp)
+            try:
+                for name, func in build_benchmarks(tmp, data_dir, production, consumption, time_step_hours):
+                    if args.filter and args.filter not in name:
+                        continue
+                    key = f"{name}@{dataset}"
+                    results[key] = measure(func, args.repeat, args.max_time)
+                    print(f"   {name:<40} {results[key]['min'] * 1000:>10.1f} ms "
+                          f"(médiane {results[key]['median'] * 1000:.1f} ms, {results[key]['runs']} run(s))")
+            finally:
+                os.chdir(initial_cwd)
+
+    history = load_history(args.history)
+    previous = history[-1] if history else None
+    regressions = compare(previous, results, args.threshold)
+
+    history.append({
+        'date': datetime.now().isoformat(),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'results': results,
+    })
+    args.history.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.history, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=2)
+
+    print(f"\n✅ Résultats ajoutés à {args.history} ({len(history)} exécution(s))")
+    if regressions:
+        print(f"\n⚠️  Régressions (> {args.threshold:.0%}) par rapport à {previous.get('revision') or previous['date']}:")
+        for key, ratio in regressions:
+            print(f"   {key}: +{ratio:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
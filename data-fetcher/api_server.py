@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Service HTTP local de données et de simulation
+Expose la couche de données partagée (DatasetStore, pyramide d'agrégats,
+moteur batterie) à tous les clients : dashboards Streamlit / NiceGUI et
+front Vue. Les réponses sont mises en cache (LRU, par version des
+données), identifiées par un ETag (réponse 304 si inchangées) et
+compressées en gzip ; les simulations tournent dans un pool de processus.
+
+Exemple:
+    python api_server.py --port 8000 --workers 4
+
+Points d'accès:
+    GET /api/info
+    GET /api/day/{date}                  (date AAAA-MM-JJ)
+    GET /api/pyramid?level=month&start=2024-01-01&end=2024-07-01
+    GET /api/simulate?date=2024-06-21&capacity=500&strategy=self_consumption&tariff=base
+        (sans date : année complète ; continuous=true : état de charge reporté
+        depuis le 1er jour, via les points de reprise de checkpoint_store.py)
+    WS  /api/replay/ws?start=2024-06-21&capacity=500&speed=3600
+    GET /api/replay/sse?start=2024-06-21&capacity=500&speed=3600
+        (rejeu en direct, voir replay.py)
+    POST /api/ingest                     (mesures déposées dans data/inbox/, voir ingest.py)
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response, StreamingResponse
+
+from battery import INITIAL_SOC, STRATEGIES, battery_kpis, simulate_battery_batch, strategy_grid_floor
+from checkpoint_store import CheckpointedRun
+from dataset import DATA_DIR, default_files, load_default_dataset
+from dataset_store import DatasetStore
+from export_static import DECIMALS, shard_payload
+from ingest import COLUMNS as INGEST_COLUMNS
+from pyramid import LEVELS, Pyramid
+from replay import ReplayHub, ReplayStream
+from tariff import TARIFS, get_tariff, price_grid, tempo_calendar
+
+# Paramètres par défaut
+CACHE_SIZE = 512
+GZIP_MIN_SIZE = 1024
+MAX_CAPACITY = 100000
+MAX_SPEED = 10 ** 6
+
+# Front Vue en développement (vite)
+CORS_ORIGINS = ['http://localhost:3000']
+
+
+class ApiData:
+    """
+    Données servies par l'API pour une version du jeu de données
+
+    Les tarifs (calendrier Tempo) et planchers de stratégie sont établis
+    sur l'année complète puis restreints à la période demandée.
+    """
+
+    def __init__(self, dataset, cache_dir=None):
+        self.dataset = dataset
+        self.cache_dir = cache_dir
+        self.day_slices = dataset.timebase.day_slices()
+        self.pyramid = Pyramid(dataset.timestamps, dataset.production, dataset.consumption,
+                               dataset.time_step_hours, dataset.epochs)
+        self._tariffs = {}
+        self._floors = {}
+        self._runs = {}
+
+    def tariff(self, name):
+        """Tarif, calendrier Tempo estimé sur l'année complète"""
+        if name not in self._tariffs:
+            if name == 'tempo':
+                calendar = tempo_calendar(self.dataset.timestamps, self.dataset.consumption)
+                self._tariffs[name] = get_tariff(name, tempo_colors=calendar)
+            else:
+                self._tariffs[name] = get_tariff(name)
+        return self._tariffs[name]
+
+    def grid_floor(self, strategy, tariff_name):
+        """Plancher de soutirage de la stratégie sur l'année complète"""
+        key = (strategy, tariff_name)
+        if key not in self._floors:
+            self._floors[key] = strategy_grid_floor(strategy, self.dataset.timestamps, self.dataset.production,
+                                                    self.dataset.consumption, self.tariff(tariff_name))
+        return self._floors[key]
+
+    def checkpointed_run(self, capacity, strategy, tariff_name):
+        """Simulation continue de l'année, points de reprise persistés (voir checkpoint_store.py)"""
+        key = (capacity, strategy, tariff_name)
+        if key not in self._runs:
+            dataset = self.dataset
+            self._runs[key] = CheckpointedRun(
+                dataset.timestamps, dataset.production, dataset.consumption, capacity,
+                dataset.time_step_hours, self.grid_floor(strategy, tariff_name), f"{strategy}-{tariff_name}",
+                self.cache_dir, dataset_name=dataset.name
+            )
+        return self._runs[key]
+
+
+def load_api_data(data_dir=DATA_DIR):
+    """Chargeur du DatasetStore"""
+    return ApiData(load_default_dataset(data_dir), Path(data_dir) / "cache" / "checkpoints")
+
+
+def watched_files(data_dir=DATA_DIR):
+    """Fichiers lus par load_default_dataset"""
+    return default_files(data_dir)
+
+
+def simulate_period(timestamps, production, consumption, capacity, time_step_hours, grid_floor, tariff,
+                    initial_soc=INITIAL_SOC):
+    """
+    Simule une période pour une capacité (exécuté dans le pool de processus)
+
+    Returns:
+        dict: Séries batterie / état de charge / réseau, indicateurs et facture
+    """
+    battery_power, battery_soc, network = simulate_battery_batch(
+        production, consumption, [capacity], time_step_hours, grid_floor=grid_floor, initial_soc=initial_soc
+    )
+    kpis = battery_kpis(production, consumption, battery_power, network, time_step_hours)
+    return {
+        'battery_power': np.round(battery_power[0], DECIMALS).tolist(),
+        'battery_soc': np.round(battery_soc[0], DECIMALS).tolist(),
+        'network_power': np.round(network[0], DECIMALS).tolist(),
+        'kpis': {name: float(values[0]) for name, values in kpis.items()},
+        'cost': price_grid(timestamps, network[0], tariff, time_step_hours),
+    }
+
+
+class ResponseCache:
+    """
+    Cache LRU des réponses JSON (corps, ETag)
+
+    Les requêtes identiques simultanées partagent un seul calcul.
+    """
+
+    def __init__(self, max_entries=CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._pending = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def get(self, key, build):
+        """
+        Réponse en cache, ou construite par `await build()` puis mise en cache
+
+        Returns:
+            tuple: (corps JSON en octets, ETag)
+        """
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        task = self._pending.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._build(build))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        entry = await asyncio.shield(task)
+
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    @staticmethod
+    async def _build(build):
+        body = json.dumps(await build(), separators=(',', ':')).encode('utf-8')
+        return body, f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+
+
+def create_app(data_dir=DATA_DIR, workers=None, cache_size=CACHE_SIZE):
+    """
+    Construit l'application FastAPI
+
+    Args:
+        data_dir: Répertoire des CSV
+        workers: Nombre de processus de simulation (défaut: nombre de cœurs)
+        cache_size: Nombre de réponses conservées en cache
+
+    Returns:
+        FastAPI: Application (à lancer avec uvicorn)
+    """
+    store = DatasetStore(lambda: load_api_data(data_dir), watched_files(data_dir), name="api")
+    cache = ResponseCache(cache_size)
+    replays = ReplayHub()
+    state = {}
+
+    @asynccontextmanager
+    async def lifespan(app):
+        version = store.reload()
+        print(f"📦 Données chargées en {version.load_seconds * 1000:.0f} ms "
+              f"({len(version.payload.dataset)} pas de temps, {len(version.payload.day_slices)} jours)")
+        store.start()
+        state['pool'] = ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+        yield
+        state['pool'].shutdown(cancel_futures=True)
+        store.stop()
+
+    app = FastAPI(title="Moonlight API", lifespan=lifespan)
+    app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE)
+    app.add_middleware(CORSMiddleware, allow_origins=CORS_ORIGINS, allow_methods=['GET'],
+                       expose_headers=['ETag'])
+
+    async def respond(request, key, build):
+        # Clé préfixée par la version : un rechargement des données invalide le cache
+        version = store.current()
+        body, etag = await cache.get((version.number,) + key, lambda: build(version.payload))
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in request.headers.get('if-none-match', ''):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type='application/json', headers=headers)
+
+    def check_params(capacity, strategy, tariff):
+        if strategy not in STRATEGIES:
+            raise HTTPException(400, f"Stratégie inconnue: {strategy} (disponibles: {', '.join(STRATEGIES)})")
+        if tariff not in TARIFS:
+            raise HTTPException(400, f"Tarif inconnu: {tariff} (disponibles: {', '.join(TARIFS)})")
+        if not 0 <= capacity <= MAX_CAPACITY:
+            raise HTTPException(400, f"Capacité hors bornes: {capacity} (0 à {MAX_CAPACITY} kWh)")
+
+    def parse_bound(name, value):
+        if value is None:
+            return None
+        try:
+            return pd.Timestamp(value)
+        except ValueError:
+            raise HTTPException(400, f"Date invalide pour {name}: {value}")
+
+    def day_slice(data, date):
+        if date not in data.day_slices:
+            raise HTTPException(404, f"Date absente des données: {date}")
+        return data.day_slices[date]
+
+    @app.get('/api/info')
+    async def info():
+        version = store.current()
+        data = version.payload
+        return {
+            'name': data.dataset.name,
+            'version': version.number,
+            'step_minutes': int(round(data.dataset.time_step_hours * 60)),
+            'days': list(data.day_slices),
+            'levels': list(LEVELS),
+            'strategies': STRATEGIES,
+            'tariffs': list(TARIFS),
+            'cache': {'entries': len(cache), 'hits': cache.hits, 'misses': cache.misses},
+        }
+
+    @app.get('/api/day/{date}')
+    async def day(request: Request, date: str):
+        async def build(data):
+            selection = day_slice(data, date)
+            dataset = data.dataset
+            return {'day': date, **shard_payload(dataset.timestamps[selection], dataset.production[selection],
+                                                 dataset.consumption[selection], np.datetime64(date))}
+        return await respond(request, ('day', date), build)
+
+    @app.get('/api/pyramid')
+    async def pyramid(request: Request, level: str = 'month', start: str = None, end: str = None):
+        if level not in LEVELS:
+            raise HTTPException(400, f"Niveau inconnu: {level} (disponibles: {', '.join(LEVELS)})")
+        start, end = parse_bound('start', start), parse_bound('end', end)
+
+        async def build(data):
+            frame = data.pyramid.level(level, start, end)
+            columns = {name: np.round(frame[name].to_numpy(), DECIMALS).tolist()
+                       for name in frame.columns if name != 'start'}
+            return {'level': level, 'start': frame['start'].dt.strftime('%Y-%m-%d %H:%M:%S').tolist(), **columns}
+        return await respond(request, ('pyramid', level, start, end), build)
+
+    @app.get('/api/simulate')
+    async def simulate(request: Request, capacity: float, date: str = None,
+                       strategy: str = 'self_consumption', tariff: str = 'base', continuous: bool = False):
+        check_params(capacity, strategy, tariff)
+
+        async def build(data):
+            dataset = data.dataset
+            selection = day_slice(data, date) if date is not None else slice(None)
+            grid_floor = data.grid_floor(strategy, tariff)
+            if np.ndim(grid_floor) > 0:
+                grid_floor = grid_floor[selection]
+            timestamps = dataset.timestamps[selection]
+
+            loop = asyncio.get_running_loop()
+            initial_soc = INITIAL_SOC
+            if continuous and date is not None:
+                # Reprise depuis le point de reprise hebdomadaire qui précède la journée
+                run = await loop.run_in_executor(None, data.checkpointed_run, capacity, strategy, tariff)
+                initial_soc = run.soc_at(selection.start)
+            result = await loop.run_in_executor(
+                state['pool'], simulate_period, timestamps, dataset.production[selection],
+                dataset.consumption[selection], capacity, dataset.time_step_hours, grid_floor,
+                data.tariff(tariff), initial_soc
+            )
+            origin = timestamps[0].astype('datetime64[D]')
+            return {'date': date, 'capacity': capacity, 'strategy': strategy, 'tariff': tariff,
+                    'continuous': continuous,
+                    'start': str(origin) + ' 00:00:00',
+                    'offsets': ((timestamps - origin) // np.timedelta64(1, 'm')).astype(np.int64).tolist(),
+                    **result}
+        return await respond(request, ('simulate', date, capacity, strategy, tariff, continuous), build)
+
+    def open_replay(start, capacity, speed, strategy, tariff):
+        # Un flux par paramètres : les clients identiques partagent la même simulation
+        check_params(capacity, strategy, tariff)
+        if not 0 < speed <= MAX_SPEED:
+            raise HTTPException(400, f"Vitesse hors bornes: {speed} (0 à {MAX_SPEED})")
+        version = store.current()
+        data = version.payload
+        first = day_slice(data, start).start if start is not None else 0
+
+        def factory():
+            dataset = data.dataset
+            return ReplayStream(dataset.timestamps, dataset.production, dataset.consumption, capacity, speed,
+                                first, dataset.time_step_hours, data.grid_floor(strategy, tariff))
+        return replays.subscribe((version.number, first, capacity, speed, strategy, tariff), factory)
+
+    @app.post('/api/ingest')
+    async def ingest(request: Request):
+        # Point d'accès minimal : le lot est déposé dans la boîte de réception
+        # et ingéré par `python ingest.py --watch`
+        points = await request.json()
+        if not isinstance(points, dict) or any(c not in points for c in INGEST_COLUMNS):
+            raise HTTPException(400, f"Colonnes attendues: {', '.join(INGEST_COLUMNS)}")
+        lengths = {len(points[c]) for c in INGEST_COLUMNS}
+        if len(lengths) != 1:
+            raise HTTPException(400, "Colonnes de longueurs différentes")
+
+        inbox = Path(data_dir) / "inbox"
+        inbox.mkdir(parents=True, exist_ok=True)
+        path = inbox / f"api-{time.time_ns()}.csv"
+        tmp_path = path.with_suffix('.tmp')
+        lines = [','.join(INGEST_COLUMNS)] + [','.join(str(v) for v in row)
+                                              for row in zip(*(points[c] for c in INGEST_COLUMNS))]
+        tmp_path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        os.replace(tmp_path, path)
+        return {'queued': lengths.pop(), 'file': path.name}
+
+    @app.websocket('/api/replay/ws')
+    async def replay_ws(websocket: WebSocket, capacity: float = 500, speed: float = 3600, start: str = None,
+                        strategy: str = 'self_consumption', tariff: str = 'base'):
+        try:
+            subscription = open_replay(start, capacity, speed, strategy, tariff)
+        except HTTPException as e:
+            await websocket.close(code=1008, reason=e.detail)
+            return
+        await websocket.accept()
+        try:
+            async for message in subscription:
+                await websocket.send_text(message.text)
+            await websocket.close()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            subscription.close()
+
+    @app.get('/api/replay/sse')
+    async def replay_sse(capacity: float = 500, speed: float = 3600, start: str = None,
+                         strategy: str = 'self_consumption', tariff: str = 'base'):
+        subscription = open_replay(start, capacity, speed, strategy, tariff)
+
+        async def events():
+            try:
+                async for message in subscription:
+                    yield f"data: {message.text}\n\n"
+            finally:
+                subscription.close()
+        return StreamingResponse(events(), media_type='text/event-stream',
+                                 headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    return app
+
+
+def main(argv=None):
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Service HTTP local de données et de simulation")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--data-dir', default=str(DATA_DIR), help="Répertoire des CSV (défaut: data/)")
+    parser.add_argument('--workers', type=int, default=None, help="Processus de simulation (défaut: nombre de cœurs)")
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE, help="Réponses conservées en cache")
+    args = parser.parse_args(argv)
+
+    app = create_app(Path(args.data_dir), args.workers, args.cache_size)
+    print(f"🚀 API sur http://{args.host}:{args.port}/api/info")
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Simulation batterie en lot, sans interface
+Simule une année complète pour une grille sites × stratégies × facteurs PV ×
+capacités, répartit le travail sur un pool de processus et écrit les
+résultats au fil de l'eau dans un fichier colonne (Parquet, CSV à défaut).
+
+Exemples:
+    python batch_simulate.py
+    python batch_simulate.py --sites sites.json --capacities 0:1500:50 \\
+        --strategies self_consumption,peak_shaving --tariff tempo --workers 8
+
+Fichier de sites (JSON), chemins relatifs au fichier:
+    [
+        {"name": "marseille", "production": "marseille/prod.csv",
+         "consumption": "marseille/conso.csv"},
+        ...
+    ]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import ExitStack
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from battery import STRATEGIES, battery_kpis, simulate_battery_batch, strategy_grid_floor
+from dataset import DATA_DIR, load_dataset, load_default_dataset
+from shared_data import MODES as SHARE_MODES, SharedDataset, attach_dataset
+from tariff import TARIFS, get_tariff
+from typical_days import TypicalDays, simulate_typical_days
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Chemins
+DEFAULT_OUTPUT = DATA_DIR / "batch_results.parquet"
+
+# Configuration des sites et handles de mémoire partagée, transmis aux processus du pool
+_SITES = {}
+_HANDLES = {}
+_OPTIONS = {'typical_days': None, 'full_year_sites': ()}
+
+# Écart toléré (%) entre jours types et année complète ; au-delà, le site
+# est simulé sur l'année complète
+TYPICAL_DAYS_TOLERANCE = 5.0
+
+# Indicateurs contrôlés pour les jours types (énergies et économie)
+TYPICAL_DAYS_KPIS = ('import_kwh', 'export_kwh', 'self_sufficiency_pct', 'net_cost', 'annual_savings')
+
+
+def parse_capacities(text):
+    """Capacités 'début:fin:pas' (fin incluse) ou liste '0,5,10'"""
+    if ':' in text:
+        start, stop, step = (float(v) for v in text.split(':'))
+        return np.arange(start, stop + step / 2, step)
+    return np.array([float(v) for v in text.split(',')])
+
+
+def load_sites(sites_file):
+    """Lit le fichier de sites JSON ({nom: (production, consommation)})"""
+    if sites_file is None:
+        return {'default': None}
+    sites_file = Path(sites_file)
+    with open(sites_file, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    base = sites_file.parent
+    return {
+        entry['name']: (str(base / entry['production']), str(base / entry['consumption']))
+        for entry in entries
+    }
+
+
+def _init_worker(sites, handles, typical_days=None, full_year_sites=()):
+    """Initialisation d'un processus du pool"""
+    _SITES.update(sites)
+    _HANDLES.update(handles)
+    _OPTIONS['typical_days'] = typical_days
+    _OPTIONS['full_year_sites'] = tuple(full_year_sites)
+
+
+@lru_cache(maxsize=None)
+def _site_dataset(site):
+    """Jeu de données d'un site : vue sur la mémoire partagée, ou CSV lus une fois par processus"""
+    if site in _HANDLES:
+        return attach_dataset(_HANDLES[site])
+    files = _SITES[site]
+    if files is None:
+        return load_default_dataset()
+    return load_dataset(*files, name=site)
+
+
+@lru_cache(maxsize=None)
+def _site_typical_days(site):
+    """Jours types d'un site (None si l'année complète est simulée)"""
+    if not _OPTIONS['typical_days'] or site in _OPTIONS['full_year_sites']:
+        return None
+    return TypicalDays(_site_dataset(site), _OPTIONS['typical_days'])
+
+
+@lru_cache(maxsize=None)
+def _site_prices(site, tariff_name):
+    """Prix de soutirage par pas de temps simulé pour un site et un tarif"""
+    dataset = _site_dataset(site)
+    tariff = get_tariff(tariff_name)
+    # Calendrier (Tempo) établi sur l'année complète, puis restreint aux jours types
+    codes = tariff.period_codes(dataset.timestamps, dataset.consumption)
+    prices = tariff.import_prices[codes]
+    typical = _site_typical_days(site)
+    if typical is not None:
+        prices = prices[typical.step_mask]
+    return tariff, prices
+
+
+def run_task(site, strategy, pv_scale, capacities, tariff_name):
+    """
+    Simule un lot de capacités pour un site, une stratégie et un facteur PV
+
+    Returns:
+        dict: Colonnes de résultats (une ligne par capacité)
+    """
+    dataset = _site_dataset(site)
+    typical = _site_typical_days(site)
+    tariff, prices = _site_prices(site, tariff_name)
+    capacities = np.asarray(capacities, dtype=float)
+    dt = dataset.time_step_hours
+
+    # Plancher de la stratégie établi sur l'année complète (seuil d'écrêtage)
+    grid_floor = strategy_grid_floor(strategy, dataset.timestamps, dataset.production * pv_scale,
+                                     dataset.consumption, tariff)
+    if typical is None:
+        weights = np.ones(len(dataset))
+    else:
+        dataset, weights = typical.dataset, typical.step_weights
+        if np.ndim(grid_floor) > 0:
+            grid_floor = grid_floor[typical.step_mask]
+    production = dataset.production * pv_scale
+    consumption = dataset.consumption
+
+    if typical is None:
+        battery_power, _, network = simulate_battery_batch(
+            production, consumption, capacities, dt, grid_floor=grid_floor
+        )
+    else:
+        battery_power, _, network = simulate_typical_days(
+            typical, capacities, grid_floor=grid_floor, pv_scale=pv_scale
+        )
+    kpis = battery_kpis(production, consumption, battery_power, network, dt, step_weights=weights)
+
+    weighted_prices = prices * weights * dt
+    import_cost = np.maximum(-network, 0) @ weighted_prices
+    export_revenue = kpis['export_kwh'] * tariff.feed_in_price
+
+    # Référence sans batterie (même site, même facteur PV)
+    net = production - consumption
+    reference_cost = (np.maximum(-net, 0) @ weighted_prices
+                      - (np.maximum(net, 0) @ weights) * dt * tariff.feed_in_price)
+
+    n_years = max(weights.sum() * dt / 8760, 1e-9)
+    n = len(capacities)
+    safe_capacities = np.where(capacities > 0, capacities, np.inf)
+    columns = {
+        'site': [site] * n,
+        'strategy': [strategy] * n,
+        'tariff': [tariff_name] * n,
+        'pv_scale': np.full(n, float(pv_scale)),
+        'capacity_kwh': capacities,
+    }
+    columns.update(kpis)
+    columns['equivalent_cycles'] = kpis['discharge_kwh'] / safe_capacities / n_years
+    columns['import_cost'] = import_cost
+    columns['export_revenue'] = export_revenue
+    columns['net_cost'] = import_cost - export_revenue
+    columns['annual_savings'] = (reference_cost - columns['net_cost']) / n_years
+    return {
+        name: values.tolist() if isinstance(values, np.ndarray) else values
+        for name, values in columns.items()
+    }
+
+
+class ResultWriter:
+    """Écriture des résultats par blocs : Parquet (pyarrow) ou CSV"""
+
+    def __init__(self, path, fmt='auto'):
+        self.path = Path(path)
+        if fmt == 'auto':
+            fmt = 'parquet' if self.path.suffix == '.parquet' else 'csv'
+        if fmt == 'parquet' and pq is None:
+            print("⚠️  pyarrow non installé : écriture en CSV")
+            fmt = 'csv'
+            self.path = self.path.with_suffix('.csv')
+        self.format = fmt
+        self.rows = 0
+        self._writer = None
+        self._schema = None
+        self._header = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists():
+            self.path.unlink()
+
+    def write(self, columns):
+        """Ajoute un bloc de lignes {colonne: valeurs}"""
+        if self.format == 'parquet':
+            if self._writer is None:
+                table = pa.Table.from_pydict(columns)
+                self._schema = table.schema
+                self._writer = pq.ParquetWriter(self.path, self._schema)
+            else:
+                table = pa.Table.from_pydict(columns, schema=self._schema)
+            self._writer.write_table(table)
+        else:
+            if self._header is None:
+                self._header = list(columns)
+                with open(self.path, 'w', encoding='utf-8') as f:
+                    f.write(','.join(self._header) + '\n')
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for row in zip(*(columns[name] for name in self._header)):
+                    f.write(','.join(str(v) for v in row) + '\n')
+        self.rows += len(columns['capacity_kwh'])
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def build_tasks(sites, strategies, pv_scales, capacities, chunk_size):
+    """Découpe la grille en tâches (un lot de capacités par tâche)"""
+    chunks = [capacities[i:i + chunk_size] for i in range(0, len(capacities), chunk_size)]
+    return [
+        (site, strategy, pv_scale, chunk.tolist())
+        for site in sites
+        for strategy in strategies
+        for pv_scale in pv_scales
+        for chunk in chunks
+    ]
+
+
+def _run_task_with(typical_days, *task):
+    """run_task dans ce processus, sur l'année complète (None) ou sur des jours types"""
+    _OPTIONS['typical_days'] = typical_days
+    _site_typical_days.cache_clear()
+    _site_prices.cache_clear()
+    try:
+        return run_task(*task)
+    finally:
+        _OPTIONS['typical_days'] = None
+        _site_typical_days.cache_clear()
+        _site_prices.cache_clear()
+
+
+def check_typical_days(site, strategies, pv_scale, capacities, tariff_name, k):
+    """
+    Écarts des jours types d'un site par rapport à l'année complète
+
+    L'écart croît avec la capacité (le report d'énergie entre jours n'est
+    pas représenté) et les économies, différences entre deux factures
+    approchées, sont les moins précises : chaque stratégie est simulée par
+    run_task sur l'année complète et sur les jours types, pour la plus
+    petite, la médiane et la plus grande capacité de la grille.
+
+    Returns:
+        pd.DataFrame: Une ligne par (stratégie, capacité, indicateur) : complet,
+            jours types, écart %
+    """
+    checked = np.unique(np.asarray(capacities)[[0, len(capacities) // 2, -1]]).tolist()
+    rows = []
+    for strategy in strategies:
+        task = (site, strategy, pv_scale, checked, tariff_name)
+        full, typical = _run_task_with(None, *task), _run_task_with(k, *task)
+        for kpi in TYPICAL_DAYS_KPIS:
+            for capacity, reference, approx in zip(checked, full[kpi], typical[kpi]):
+                if abs(approx - reference) <= 1e-6 * max(1.0, abs(reference)):
+                    error = 0.0  # Égalité aux arrondis près (économies nulles sans batterie)
+                elif reference:
+                    error = (approx - reference) / abs(reference) * 100
+                else:
+                    error = np.inf
+                rows.append({'strategy': strategy, 'capacity_kwh': capacity, 'kpi': kpi,
+                             'full': reference, 'typical': approx, 'error_pct': error})
+    return pd.DataFrame(rows)
+
+
+def full_year_fallback(sites, strategies, pv_scale, capacities, tariff_name, k,
+                       tolerance=TYPICAL_DAYS_TOLERANCE):
+    """
+    Sites dont les jours types s'écartent trop de l'année complète
+
+    Returns:
+        list: Sites à simuler sur l'année complète (écart > tolérance sur un indicateur)
+    """
+    _SITES.update(sites)
+    fallback = []
+    for site in sites:
+        comparison = check_typical_days(site, strategies, pv_scale, capacities, tariff_name, k)
+        table = comparison.pivot_table(index=['strategy', 'capacity_kwh'], columns='kpi', values='error_pct')
+        print(f"📊 Jours types ({k}) / année complète, site {site} (écart %)")
+        print(table[list(TYPICAL_DAYS_KPIS)].round(1).to_string())
+        worst = comparison.loc[comparison['error_pct'].abs().idxmax()]
+        if abs(worst['error_pct']) > tolerance:
+            print(f"⚠️  Écart de {worst['error_pct']:+.1f} % sur {worst['kpi']} ({worst['strategy']}, "
+                  f"{worst['capacity_kwh']:g} kWh) > {tolerance:g} % : site {site} simulé sur l'année complète")
+            fallback.append(site)
+    return fallback
+
+
+def run_batch(sites, strategies, pv_scales, capacities, tariff_name, output,
+              workers=None, chunk_size=16, fmt='auto', share='shm', typical_days=None,
+              typical_tolerance=TYPICAL_DAYS_TOLERANCE):
+    """
+    Exécute la grille complète sur un pool de processus
+
+    Les résultats sont écrits dès qu'une tâche se termine ; le nombre de
+    tâches en cours est borné pour limiter la mémoire. Avec `share`, les
+    sites sont chargés une seule fois ici et publiés en mémoire partagée
+    ('shm') ou mappée ('mmap') ; None = chaque processus lit les CSV. Avec
+    `typical_days`, chaque site est réduit à ce nombre de jours types pondérés,
+    sauf si le contrôle contre l'année complète (full_year_fallback) dépasse
+    `typical_tolerance` % sur un indicateur : le site est alors simulé sur
+    l'année complète.
+
+    Returns:
+        Path: Fichier de résultats
+    """
+    tasks = build_tasks(sites, strategies, pv_scales, capacities, chunk_size)
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+
+    full_year_sites = []
+    if typical_days:
+        # Les jours types restent une approximation : contrôle de chaque site
+        full_year_sites = full_year_fallback(sites, strategies, pv_scales[0], capacities, tariff_name,
+                                             typical_days, typical_tolerance)
+        _site_dataset.cache_clear()
+
+    writer = ResultWriter(output, fmt)
+
+    print(f"🔋 {len(tasks)} tâches ({len(sites)} sites × {len(strategies)} stratégies × "
+          f"{len(pv_scales)} facteurs PV × {len(capacities)} capacités) sur {workers} processus")
+
+    try:
+        with ExitStack() as stack:
+            handles = {}
+            if share:
+                _SITES.update(sites)
+                for site in sites:
+                    shared = stack.enter_context(SharedDataset(_site_dataset(site), mode=share))
+                    handles[site] = shared.handle
+                _site_dataset.cache_clear()
+                print(f"📦 {len(handles)} sites publiés en mémoire partagée ({share}) "
+                      f"en {time.perf_counter() - start:.1f} s")
+
+            pool = stack.enter_context(ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(sites, handles, typical_days, full_year_sites)
+            ))
+            pending = set()
+            queue = iter(tasks)
+            done_count = 0
+            while True:
+                for task in queue:
+                    pending.add(pool.submit(run_task, *task, tariff_name))
+                    if len(pending) >= workers * 2:
+                        break
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    columns = future.result()
+                    writer.write(columns)
+                    done_count += 1
+                    print(f"   ✅ [{done_count}/{len(tasks)}] {columns['site'][0]} / "
+                          f"{columns['strategy'][0]} / PV ×{columns['pv_scale'][0]:g}")
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"\n✅ {writer.rows} lignes écrites dans {writer.path} ({elapsed:.1f} s)")
+    return writer.path
+
+
+def main(argv=None):
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Simulation batterie en lot (sans interface)")
+    parser.add_argument('--sites', help="Fichier JSON des sites (défaut: données de fetch_data.py)")
+    parser.add_argument('--capacities', default='0:1500:50',
+                        help="Capacités en kWh, 'début:fin:pas' ou '0,5,10' (défaut: 0:1500:50)")
+    parser.add_argument('--strategies', default=','.join(STRATEGIES),
+                        help=f"Stratégies séparées par des virgules ({', '.join(STRATEGIES)})")
+    parser.add_argument('--pv-scales', default='1',
+                        help="Facteurs multiplicatifs de la production (défaut: 1)")
+    parser.add_argument('--tariff', default='hphc', choices=list(TARIFS), help="Tarif (défaut: hphc)")
+    parser.add_argument('--workers', type=int, help="Nombre de processus (défaut: nombre de cœurs)")
+    parser.add_argument('--chunk-size', type=int, default=16, help="Capacités par tâche (défaut: 16)")
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT), help="Fichier de résultats")
+    parser.add_argument('--format', default='auto', choices=['auto', 'parquet', 'csv'])
+    parser.add_argument('--typical-days', type=int,
+                        help="Simule K jours types pondérés au lieu de l'année complète")
+    parser.add_argument('--typical-tolerance', type=float, default=TYPICAL_DAYS_TOLERANCE,
+                        help="Écart maximal (%%) des jours types avant repli sur l'année complète "
+                             f"(défaut: {TYPICAL_DAYS_TOLERANCE:g})")
+    parser.add_argument('--share', default='shm', choices=[*SHARE_MODES, 'none'],
+                        help="Partage des données entre processus (défaut: shm)")
+    args = parser.parse_args(argv)
+
+    strategies = [s.strip() for s in args.strategies.split(',') if s.strip()]
+    unknown = [s for s in strategies if s not in STRATEGIES]
+    if unknown:
+        parser.error(f"Stratégie inconnue: {', '.join(unknown)}")
+
+    try:
+        sites = load_sites(args.sites)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ Erreur: fichier de sites invalide ({e})")
+        sys.exit(1)
+
+    run_batch(
+        sites,
+        strategies,
+        [float(v) for v in args.pv_scales.split(',')],
+        parse_capacities(args.capacities),
+        args.tariff,
+        args.output,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        fmt=args.format,
+        share=None if args.share == 'none' else args.share,
+        typical_days=args.typical_days,
+        typical_tolerance=args.typical_tolerance,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Module de simulation de batterie vectorisée
+Simule plusieurs capacités (ou scénarios) en une seule passe sur la série temporelle
+"""
+import numpy as np
+
+# Paramètres par défaut (identiques aux dashboards Streamlit / NiceGUI)
+MIN_SOC = 0.05
+MAX_SOC = 0.95
+INITIAL_SOC = 0.5
+
+# Stratégies de pilotage (identifiant -> libellé)
+STRATEGIES = {
+    'self_consumption': 'Autoconsommation',
+    'peak_shaving': 'Écrêtage des pointes',
+    'peak_hours': 'Décharge en heures pleines',
+}
+
+
+def simulate_battery_batch(production, consumption, capacities, time_step_hours=0.25,
+                           min_soc=MIN_SOC, max_soc=MAX_SOC, initial_soc=INITIAL_SOC,
+                           grid_floor=None):
+    """
+    Simule la batterie pour plusieurs capacités en parallèle
+
+    La boucle porte sur les pas de temps, les calculs sont vectorisés sur
+    les capacités (et éventuellement sur les scénarios si production et
+    consommation sont des matrices).
+
+    Args:
+        production: Production en kW, shape (T,) ou (N, T)
+        consumption: Consommation en kW, shape (T,) ou (N, T)
+        capacities: Capacités en kWh, scalaire ou shape (N,)
+        time_step_hours: Pas de temps en heures
+        min_soc: État de charge minimum (fraction)
+        max_soc: État de charge maximum (fraction)
+        initial_soc: État de charge initial (fraction ou array (N,))
+        grid_floor: Soutirage laissé au réseau avant toute décharge (kW),
+            scalaire, shape (T,) ou (N, T) ; None = autoconsommation pure
+            (voir strategy_grid_floor)
+
+    Returns:
+        tuple: (battery_power, battery_soc, network_power), shape (N, T)
+            battery_power: négatif = charge, positif = décharge
+            battery_soc: état de charge en % avant le pas de temps
+            network_power: positif = injection, négatif = soutirage
+    """
+    production = np.atleast_2d(np.asarray(production, dtype=float))
+    consumption = np.atleast_2d(np.asarray(consumption, dtype=float))
+    capacities = np.atleast_1d(np.asarray(capacities, dtype=float))
+
+    n = max(production.shape[0], consumption.shape[0], capacities.shape[0])
+    n_steps = production.shape[1]
+    net = np.broadcast_to(production - consumption, (n, n_steps))
+    capacities = np.broadcast_to(capacities, (n,))
+
+    soc_min = capacities * min_soc
+    soc_max = capacities * max_soc
+    initial = np.broadcast_to(capacities * initial_soc, (n,)).astype(float)
+
+    # Énergie demandée à la batterie à chaque pas (positif = décharge).
+    # La charge/décharge se borne à l'énergie disponible dans [soc_min, soc_max] :
+    # energy = clip(demande, soc - soc_max, soc - soc_min)
+    demand = -net * time_step_hours
+    if grid_floor is not None:
+        # Seule la part du déficit au-delà du plancher est fournie par la batterie
+        deficit = np.maximum(-net - grid_floor, 0.0)
+        demand = np.where(net < 0, deficit * time_step_hours, demand)
+    if n == 1:
+        energy, soc_history = _simulate_single(demand[0], initial[0], soc_min[0], soc_max[0])
+        energy, soc_history = energy[np.newaxis], soc_history[np.newaxis]
+    else:
+        # Stockage (T, N) pour des accès contigus à chaque pas de temps
+        demand_by_step = np.ascontiguousarray(demand.T)
+        energy = np.empty((n_steps, n))
+        soc_history = np.empty((n_steps, n))
+        soc = initial.copy()
+        lower = np.empty(n)
+        upper = np.empty(n)
+        for t in range(n_steps):
+            soc_history[t] = soc
+            np.subtract(soc, soc_max, out=lower)
+            np.subtract(soc, soc_min, out=upper)
+            step = energy[t]
+            np.maximum(demand_by_step[t], lower, out=step)
+            np.minimum(step, upper, out=step)
+            soc -= step
+        energy, soc_history = energy.T, soc_history.T
+
+    # Évite la division par zéro pour une capacité nulle (pas de batterie)
+    safe_capacities = np.where(capacities > 0, capacities, 1.0)[:, np.newaxis]
+    battery_power = energy / time_step_hours
+    battery_soc = soc_history / safe_capacities * 100
+    network_power = net + battery_power
+    return battery_power, battery_soc, network_power
+
+
+def final_soc(capacities, battery_power, battery_soc, time_step_hours, default=INITIAL_SOC):
+    """
+    État de charge (fraction) après le dernier pas d'une simulation
+
+    Permet d'enchaîner les simulations (initial_soc de la suivante).
+
+    Args:
+        capacities: Capacités (kWh), shape (N,)
+        battery_power, battery_soc: Résultats de simulate_battery_batch, shape (N, T)
+        time_step_hours: Pas de temps en heures
+        default: Valeur renvoyée pour une capacité nulle
+
+    Returns:
+        np.ndarray: État de charge par capacité, shape (N,)
+    """
+    capacities = np.asarray(capacities, dtype=float)
+    energy = battery_soc[:, -1] / 100 * capacities - battery_power[:, -1] * time_step_hours
+    return np.where(capacities > 0, energy / np.where(capacities > 0, capacities, 1.0), default)
+
+
+class BatteryStepper:
+    """
+    Simulation incrémentale d'une batterie, un échantillon à la fois
+
+    Même modèle que simulate_battery_batch (résultats identiques pas à
+    pas), mais l'état (énergie stockée) est conservé entre les appels :
+    chaque échantillon coûte O(1), ce qui permet de rejouer ou d'ingérer
+    une série en continu sans resimuler l'historique.
+    """
+
+    def __init__(self, capacity, time_step_hours=0.25, min_soc=MIN_SOC, max_soc=MAX_SOC,
+                 initial_soc=INITIAL_SOC):
+        """
+        Args:
+            capacity: Capacité en kWh
+            time_step_hours: Pas de temps en heures
+            min_soc: État de charge minimum (fraction)
+            max_soc: État de charge maximum (fraction)
+            initial_soc: État de charge initial (fraction)
+        """
+        self.capacity = float(capacity)
+        self.time_step_hours = time_step_hours
+        self.soc_min = self.capacity * min_soc
+        self.soc_max = self.capacity * max_soc
+        self.energy = self.capacity * initial_soc
+
+    @property
+    def soc(self):
+        """État de charge courant (fraction)"""
+        return self.energy / self.capacity if self.capacity > 0 else 0.0
+
+    def step(self, production, consumption, grid_floor=None):
+        """
+        Avance d'un pas de temps
+
+        Args:
+            production: Production (kW)
+            consumption: Consommation (kW)
+            grid_floor: Plancher de soutirage du pas (kW), None = autoconsommation
+
+        Returns:
+            tuple: (battery_power, battery_soc en % avant le pas, network_power)
+        """
+        net = production - consumption
+        if grid_floor is not None and net < 0:
+            demand = max(-net - grid_floor, 0.0) * self.time_step_hours
+        else:
+            demand = -net * self.time_step_hours
+        soc_percent = self.energy / self.capacity * 100 if self.capacity > 0 else 0.0
+
+        energy = min(max(demand, self.energy - self.soc_max), self.energy - self.soc_min)
+        self.energy -= energy
+        battery_power = energy / self.time_step_hours
+        return battery_power, soc_percent, net + battery_power
+
+
+def strategy_grid_floor(strategy, timestamps, production, consumption, tariff=None,
+                        peak_quantile=0.75):
+    """
+    Plancher de soutirage (kW) correspondant à une stratégie de pilotage
+
+    Args:
+        strategy: 'self_consumption', 'peak_shaving' ou 'peak_hours'
+        timestamps: Horodatages de la série
+        production: Production (kW)
+        consumption: Consommation (kW)
+        tariff: Tarif dont les heures creuses bloquent la décharge
+            ('peak_hours'), plages par défaut si None
+        peak_quantile: Quantile du soutirage au-delà duquel la batterie
+            écrête ('peak_shaving')
+
+    Returns:
+        None, float ou np.ndarray (T,) à passer à simulate_battery_batch
+    """
+    if strategy == 'self_consumption':
+        return None
+
+    if strategy == 'peak_shaving':
+        deficit = np.asarray(consumption, dtype=float) - np.asarray(production, dtype=float)
+        deficit = deficit[deficit > 0]
+        return float(np.quantile(deficit, peak_quantile)) if len(deficit) else 0.0
+
+    if strategy == 'peak_hours':
+        if tariff is None:
+            from tariff import tarif_hphc
+            tariff = tarif_hphc()
+        # Batterie réservée aux heures pleines : plancher infini en heures creuses
+        return np.where(tariff.off_peak_mask(timestamps), np.inf, 0.0)
+
+    raise ValueError(f"Stratégie inconnue: {strategy} (disponibles: {', '.join(STRATEGIES)})")
+
+
+def battery_kpis(production, consumption, battery_power, network_power, time_step_hours=0.25,
+                 step_weights=None):
+    """
+    Indicateurs énergétiques par simulation (une valeur par ligne)
+
+    Args:
+        production: Production (kW), shape (T,) ou (N, T)
+        consumption: Consommation (kW), shape (T,) ou (N, T)
+        battery_power: Puissance batterie (kW), shape (N, T)
+        network_power: Puissance réseau (kW), shape (N, T)
+        time_step_hours: Pas de temps en heures
+        step_weights: Poids de chaque pas de temps, shape (T,) (jours types :
+            nombre de jours représentés) ; None = poids unitaires
+
+    Returns:
+        dict: Tableaux (N,) des énergies (kWh), taux (%) et pointes (kW)
+    """
+    production = np.atleast_2d(np.asarray(production, dtype=float))
+    consumption = np.atleast_2d(np.asarray(consumption, dtype=float))
+    battery_power = np.atleast_2d(battery_power)
+    network_power = np.atleast_2d(network_power)
+    n = network_power.shape[0]
+
+    if step_weights is None:
+        def energy(power):
+            return power.sum(axis=1) * time_step_hours
+    else:
+        weights = np.asarray(step_weights, dtype=float) * time_step_hours
+
+        def energy(power):
+            return power @ weights
+
+    production_kwh = np.broadcast_to(energy(production), (n,))
+    consumption_kwh = np.broadcast_to(energy(consumption), (n,))
+    import_kwh = energy(np.maximum(-network_power, 0))
+    export_kwh = energy(np.maximum(network_power, 0))
+    discharge_kwh = energy(np.maximum(battery_power, 0))
+    charge_kwh = energy(np.maximum(-battery_power, 0))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        self_consumption = np.where(production_kwh > 0,
+                                    (production_kwh - export_kwh) / production_kwh * 100, 0.0)
+        self_sufficiency = np.where(consumption_kwh > 0,
+                                    (consumption_kwh - import_kwh) / consumption_kwh * 100, 0.0)
+
+    return {
+        'production_kwh': production_kwh.copy(),
+        'consumption_kwh': consumption_kwh.copy(),
+        'import_kwh': import_kwh,
+        'export_kwh': export_kwh,
+        'charge_kwh': charge_kwh,
+        'discharge_kwh': discharge_kwh,
+        'self_consumption_pct': self_consumption,
+        'self_sufficiency_pct': self_sufficiency,
+        'peak_import_kw': np.maximum(-network_power, 0).max(axis=1),
+    }
+
+
+def _simulate_single(demand, soc, soc_min, soc_max):
+    """Boucle scalaire (floats Python) pour une seule série, plus rapide que NumPy pas à pas"""
+    energy = []
+    soc_history = []
+    for value in demand.tolist():
+        soc_history.append(soc)
+        step = min(max(value, soc - soc_max), soc - soc_min)
+        soc -= step
+        energy.append(step)
+    return np.array(energy), np.array(soc_history)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Module de points de reprise persistés pour les simulations longues
+Pour une série de plusieurs années ou au pas de la minute, resimuler
+depuis le début pour afficher une journée devient trop lent. Une passe
+complète enregistre l'état de charge à intervalle régulier (chaque
+semaine par défaut) dans un fichier .npz à côté des données ; une
+période se simule ensuite depuis le point de reprise qui la précède.
+
+Le fichier est indexé par l'empreinte des données, de la capacité, de la
+stratégie (plancher de soutirage) et des paramètres du modèle : tout
+changement invalide les points de reprise, et l'ancien fichier du même
+triplet (jeu de données, stratégie, capacité) est supprimé à
+l'enregistrement du nouveau.
+
+Exemple:
+    python checkpoint_store.py --capacity 500 --date 2024-06-21
+"""
+import argparse
+import hashlib
+import os
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+
+from battery import INITIAL_SOC, MAX_SOC, MIN_SOC, STRATEGIES, final_soc, simulate_battery_batch, \
+    strategy_grid_floor
+from dataset import DATA_DIR, load_default_dataset
+from duration_curves import dataset_signature
+
+# Répertoire des points de reprise, à côté des données
+CACHE_DIR = DATA_DIR / "cache" / "checkpoints"
+
+# Intervalle entre deux points de reprise (jours)
+INTERVAL_DAYS = 7
+
+# Version du modèle batterie (à incrémenter si simulate_battery_batch change)
+MODEL_VERSION = 1
+
+# Points de reprise simulés par bloc lors de la passe complète (borne la mémoire)
+CHUNK_INTERVALS = 52
+
+
+def floor_digest(grid_floor):
+    """Empreinte d'un plancher de soutirage (None, scalaire ou série)"""
+    if grid_floor is None:
+        return 'none'
+    return hashlib.sha1(np.ascontiguousarray(grid_floor, dtype=float).tobytes()).hexdigest()
+
+
+def checkpoint_indices(timestamps, interval_days=INTERVAL_DAYS):
+    """Indices des premiers pas de chaque intervalle de `interval_days` jours"""
+    days = np.asarray(timestamps, dtype='datetime64[ns]').astype('datetime64[D]')
+    periods = (days - days[0]).astype(np.int64) // interval_days
+    return np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+
+
+class CheckpointedRun:
+    """
+    Simulation longue d'une capacité, accessible par morceaux
+
+    Attributs:
+        indices: Indices des points de reprise dans la série
+        soc: État de charge (fraction) à chaque point de reprise
+        path: Fichier .npz des points de reprise
+        loaded: True si les points de reprise ont été relus depuis le disque
+    """
+
+    def __init__(self, timestamps, production, consumption, capacity, time_step_hours=0.25,
+                 grid_floor=None, label='self_consumption', cache_dir=CACHE_DIR,
+                 interval_days=INTERVAL_DAYS, min_soc=MIN_SOC, max_soc=MAX_SOC, initial_soc=INITIAL_SOC,
+                 dataset_name='default'):
+        """
+        Args:
+            timestamps: Horodatages triés
+            production: Production (kW)
+            consumption: Consommation (kW)
+            capacity: Capacité (kWh)
+            time_step_hours: Pas de temps en heures
+            grid_floor: Plancher de soutirage de la stratégie (voir strategy_grid_floor)
+            label: Nom de la stratégie (nom de fichier)
+            cache_dir: Répertoire des points de reprise
+            interval_days: Intervalle entre points de reprise (jours)
+            min_soc, max_soc, initial_soc: Paramètres de la batterie
+            dataset_name: Nom du jeu de données ou du site (nom de fichier)
+        """
+        self.timestamps = np.asarray(timestamps, dtype='datetime64[ns]')
+        self.production = np.asarray(production, dtype=float)
+        self.consumption = np.asarray(consumption, dtype=float)
+        self.capacity = float(capacity)
+        self.time_step_hours = time_step_hours
+        self.grid_floor = grid_floor
+        self.params = {'min_soc': min_soc, 'max_soc': max_soc}
+
+        signature = dataset_signature(
+            self.timestamps, self.production, self.consumption, capacity=self.capacity,
+            grid_floor=floor_digest(grid_floor), time_step_hours=time_step_hours,
+            interval_days=interval_days, initial_soc=initial_soc, model=MODEL_VERSION, **self.params
+        )
+        cache_dir = Path(cache_dir)
+        # Le nom du jeu de données isole les sites qui partagent le répertoire :
+        # seuls les fichiers périmés du même (jeu, stratégie, capacité) sont supprimés
+        name = re.sub(r'[^\w.-]', '_', str(dataset_name))
+        prefix = f"soc_{name}_{label}_{self.capacity:g}_"
+        self.path = cache_dir / f"{prefix}{signature[:16]}.npz"
+
+        self.loaded = False
+        if self.path.exists():
+            try:
+                with np.load(self.path) as archive:
+                    self.indices, self.soc = archive['indices'], archive['soc']
+                self.loaded = True
+            except (OSError, ValueError, KeyError):
+                pass  # Fichier corrompu : recalcul
+        if not self.loaded:
+            self.indices = checkpoint_indices(self.timestamps, interval_days)
+            self.soc = self._full_run(initial_soc)
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.path.with_suffix('.tmp.npz')
+            np.savez_compressed(tmp_file, indices=self.indices, soc=self.soc)
+            os.replace(tmp_file, self.path)
+            # Points de reprise périmés (données ou paramètres modifiés)
+            for stale in cache_dir.glob(f"{prefix}*.npz"):
+                if stale != self.path:
+                    stale.unlink(missing_ok=True)
+
+    def _floor(self, start, stop):
+        if self.grid_floor is None or np.ndim(self.grid_floor) == 0:
+            return self.grid_floor
+        return self.grid_floor[start:stop]
+
+    def _simulate(self, start, stop, soc):
+        return simulate_battery_batch(
+            self.production[start:stop], self.consumption[start:stop], self.capacity,
+            self.time_step_hours, initial_soc=soc, grid_floor=self._floor(start, stop), **self.params
+        )
+
+    def _full_run(self, initial_soc):
+        """Passe complète par blocs de CHUNK_INTERVALS intervalles"""
+        soc = np.empty(len(self.indices))
+        bounds = np.r_[self.indices, len(self.timestamps)]
+        current = initial_soc
+        for first in range(0, len(self.indices), CHUNK_INTERVALS):
+            last = min(first + CHUNK_INTERVALS, len(self.indices))
+            start, stop = bounds[first], bounds[last]
+            battery_power, battery_soc, _ = self._simulate(start, stop, current)
+            soc[first:last] = battery_soc[0][self.indices[first:last] - start] / 100
+            current = final_soc([self.capacity], battery_power, battery_soc, self.time_step_hours,
+                                default=initial_soc)[0]
+        if self.capacity <= 0:
+            soc[:] = initial_soc
+        return soc
+
+    def simulate(self, start, stop):
+        """
+        Simule [start, stop[ depuis le point de reprise qui précède `start`
+
+        Returns:
+            tuple: (battery_power, battery_soc, network_power), shape (stop - start,),
+                identiques à la tranche d'une passe complète
+        """
+        k = int(np.searchsorted(self.indices, start, side='right')) - 1
+        origin = int(self.indices[k])
+        battery_power, battery_soc, network = self._simulate(origin, stop, self.soc[k])
+        offset = start - origin
+        return battery_power[0][offset:], battery_soc[0][offset:], network[0][offset:]
+
+    def soc_at(self, index):
+        """État de charge (fraction) avant le pas `index`"""
+        if index == 0 or self.capacity <= 0:
+            return float(self.soc[0])
+        battery_power, battery_soc, _ = self.simulate(index - 1, index)
+        return float(final_soc([self.capacity], battery_power[np.newaxis], battery_soc[np.newaxis],
+                               self.time_step_hours)[0])
+
+    def day_slice(self, date):
+        """Tranche de la série correspondant à une journée"""
+        day = np.datetime64(date, 'D')
+        start, stop = np.searchsorted(self.timestamps, [day, day + np.timedelta64(1, 'D')])
+        if start == stop:
+            raise KeyError(f"Date absente des données: {date}")
+        return slice(int(start), int(stop))
+
+    def simulate_day(self, date):
+        """Séries batterie d'une journée (voir simulate)"""
+        day = self.day_slice(date)
+        return self.simulate(day.start, day.stop)
+
+
+def main(argv=None):
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Points de reprise persistés d'une simulation longue")
+    parser.add_argument('--data-dir', default=str(DATA_DIR), help="Répertoire des CSV (défaut: data/)")
+    parser.add_argument('--capacity', type=float, default=500, help="Capacité (kWh)")
+    parser.add_argument('--strategy', default='self_consumption', choices=list(STRATEGIES))
+    parser.add_argument('--date', help="Journée à simuler (AAAA-MM-JJ), dernière par défaut")
+    parser.add_argument('--interval-days', type=int, default=INTERVAL_DAYS)
+    args = parser.parse_args(argv)
+
+    dataset = load_default_dataset(Path(args.data_dir))
+    floor = strategy_grid_floor(args.strategy, dataset.timestamps, dataset.production, dataset.consumption)
+    start = time.perf_counter()
+    run = CheckpointedRun(dataset.timestamps, dataset.production, dataset.consumption, args.capacity,
+                          dataset.time_step_hours, floor, args.strategy, Path(args.data_dir) / "cache" / "checkpoints",
+                          args.interval_days, dataset_name=dataset.name)
+    print(f"{'📂 Relus' if run.loaded else '💾 Calculés'}: {len(run.indices)} points de reprise "
+          f"en {time.perf_counter() - start:.3f} s ({run.path.name})")
+
+    date = args.date or str(dataset.timestamps[-1].astype('datetime64[D]'))
+    start = time.perf_counter()
+    battery_power, battery_soc, network = run.simulate_day(date)
+    print(f"📅 {date}: {len(battery_power)} pas simulés en {(time.perf_counter() - start) * 1000:.1f} ms, "
+          f"SOC {battery_soc[0]:.0f} % → {battery_soc[-1]:.0f} %, "
+          f"soutirage {np.maximum(-network, 0).sum() * dataset.time_step_hours:.1f} kWh")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Module de modélisation de la nébulosité pour la production solaire synthétique
+Chaîne de Markov des types de jour (clair, variable, couvert) paramétrée par
+mois, et variabilité intra-journalière AR(1) propre à chaque type de jour.
+Le modèle renvoie un indice de clarté (1 = ciel clair) à appliquer au profil
+de ciel clair (solar_data.solar_base_profile). Toutes les années d'un lot
+sont générées en une passe vectorisée.
+"""
+import numpy as np
+import pandas as pd
+
+# Types de jour
+DAY_TYPES = ['clair', 'variable', 'couvert']
+
+# Probabilités stationnaires des types de jour par mois (clair, variable, couvert)
+DAY_TYPE_PROBABILITIES = [
+    (0.35, 0.35, 0.30),  # janvier
+    (0.35, 0.35, 0.30),  # février
+    (0.40, 0.35, 0.25),  # mars
+    (0.40, 0.40, 0.20),  # avril
+    (0.45, 0.40, 0.15),  # mai
+    (0.55, 0.35, 0.10),  # juin
+    (0.65, 0.30, 0.05),  # juillet
+    (0.60, 0.32, 0.08),  # août
+    (0.50, 0.35, 0.15),  # septembre
+    (0.40, 0.35, 0.25),  # octobre
+    (0.30, 0.35, 0.35),  # novembre
+    (0.30, 0.35, 0.35),  # décembre
+]
+
+# Probabilité de conserver le type de la veille (persistance des régimes météo)
+PERSISTENCE = 0.5
+
+# Par type de jour : clarté moyenne, autocorrélation AR(1) au pas de 15 min
+# et écart-type stationnaire de la variabilité intra-journalière
+TYPE_CLEARNESS = (0.95, 0.65, 0.25)
+TYPE_AR_PHI = (0.95, 0.85, 0.90)
+TYPE_AR_STD = (0.03, 0.20, 0.08)
+
+# Bornes de l'indice de clarté (au-dessus de 1 : effet de bord de nuage)
+CLEARNESS_CLIP = (0.02, 1.15)
+
+
+class CloudModel:
+    """
+    Modèle de nébulosité : types de jour markoviens + bruit AR(1) intra-journalier
+
+    La matrice de transition du mois m est
+        P = persistance × I + (1 - persistance) × 1 · p_mᵀ
+    dont la loi stationnaire est p_m (DAY_TYPE_PROBABILITIES).
+    """
+
+    def __init__(self, probabilities=None, persistence=PERSISTENCE, clearness=TYPE_CLEARNESS,
+                 ar_phi=TYPE_AR_PHI, ar_std=TYPE_AR_STD, clip=CLEARNESS_CLIP):
+        """
+        Args:
+            probabilities: Probabilités des types par mois, shape (12, 3)
+            persistence: Persistance du type de jour (scalaire ou par mois)
+            clearness: Clarté moyenne par type de jour
+            ar_phi: Coefficient AR(1) par type de jour
+            ar_std: Écart-type stationnaire du bruit par type de jour
+            clip: Bornes de l'indice de clarté
+        """
+        if probabilities is None:
+            probabilities = DAY_TYPE_PROBABILITIES
+        probabilities = np.array(probabilities, dtype=float)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        persistence = np.broadcast_to(np.asarray(persistence, dtype=float), (12,))
+        n_types = probabilities.shape[1]
+
+        self.probabilities = probabilities
+        self.transitions = (persistence[:, None, None] * np.eye(n_types)
+                            + (1 - persistence)[:, None, None] * probabilities[:, None, :])
+        self._cumulative = np.cumsum(self.transitions, axis=2)
+        self.clearness = np.asarray(clearness, dtype=float)
+        self.ar_phi = np.asarray(ar_phi, dtype=float)
+        self.ar_std = np.asarray(ar_std, dtype=float)
+        self.clip = clip
+
+    def _ar_matrix(self, day_type, steps):
+        """
+        Matrice L (steps × steps) telle que L @ e soit une trajectoire AR(1)
+        stationnaire pour des innovations e ~ N(0, 1)
+        """
+        phi = self.ar_phi[day_type]
+        std = self.ar_std[day_type]
+        lags = np.subtract.outer(np.arange(steps), np.arange(steps))
+        matrix = np.where(lags >= 0, phi ** np.maximum(lags, 0), 0.0) * std * np.sqrt(1 - phi ** 2)
+        # Premier pas tiré dans la loi stationnaire
+        matrix[:, 0] = phi ** np.arange(steps) * std
+        return matrix
+
+    def day_types(self, months, uniforms):
+        """
+        Déroule la chaîne de Markov des types de jour
+
+        Args:
+            months: Mois (1-12) de chaque jour, shape (D,)
+            uniforms: Tirages uniformes, shape (Y, D)
+
+        Returns:
+            np.ndarray: Types de jour, shape (Y, D)
+        """
+        n_years, n_days = uniforms.shape
+        types = np.empty((n_years, n_days), dtype=np.intp)
+        month_index = np.asarray(months) - 1
+
+        # Premier jour tiré dans la loi stationnaire du mois
+        first = np.cumsum(self.probabilities[month_index[0]])
+        types[:, 0] = (uniforms[:, 0, None] > first).sum(axis=1)
+        for day in range(1, n_days):
+            cumulative = self._cumulative[month_index[day], types[:, day - 1]]
+            types[:, day] = (uniforms[:, day, None] > cumulative).sum(axis=1)
+        np.minimum(types, len(self.clearness) - 1, out=types)
+        return types
+
+    def sample(self, timestamps, rng=None, n_years=1, seed=None):
+        """
+        Génère l'indice de clarté pour une ou plusieurs années
+
+        Args:
+            timestamps: Horodatages (pas régulier)
+            rng: Generator unique (n_years tirages) ou liste de Generators
+                (un flux indépendant par ligne, ex. un par scénario)
+            n_years: Nombre d'années si rng est un Generator unique
+            seed: Graine utilisée si rng est None
+
+        Returns:
+            np.ndarray: Indice de clarté, shape (Y, T)
+        """
+        index = pd.DatetimeIndex(timestamps)
+        codes, days = pd.factorize(index.normalize(), sort=True)
+        step_minutes = (index[1] - index[0]).total_seconds() / 60 if len(index) > 1 else 15
+        steps = int(round(24 * 60 / step_minutes))
+        slots = ((index.hour * 60 + index.minute) // step_minutes).to_numpy().astype(np.intp)
+        n_days = len(days)
+
+        # Tirages : un seul flux pour tout le lot, ou un flux par ligne
+        if rng is None:
+            rng = np.random.default_rng(seed)
+        if isinstance(rng, np.random.Generator):
+            uniforms = rng.random((n_years, n_days))
+            innovations = rng.standard_normal((n_years, n_days, steps))
+        else:
+            uniforms = np.stack([r.random(n_days) for r in rng])
+            innovations = np.stack([r.standard_normal((n_days, steps)) for r in rng])
+
+        types = self.day_types(days.month.to_numpy(), uniforms)
+
+        # Bruit intra-journalier : une multiplication matricielle par type de jour
+        noise = np.empty_like(innovations)
+        for day_type in range(len(self.clearness)):
+            mask = types == day_type
+            if mask.any():
+                noise[mask] = innovations[mask] @ self._ar_matrix(day_type, steps).T
+
+        clearness = self.clearness[types][:, :, None] + noise
+        np.clip(clearness, *self.clip, out=clearness)
+        return clearness[:, codes, slots]
@@ -4,73 +4,86 @@ Basé sur des profils types de consommation française
 """
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 
-def fetch_consumption_data(year, output_file, num_homes=50):
+from timebase import format_timestamps, year_grid
+
+def consumption_profile_components(timestamps, num_homes=50):
     """
-    Génère des données de consommation pour un quartier résidentiel
-    
+    Composantes déterministes du profil de consommation du quartier
+
     Args:
-        year: Année de simulation
-        output_file: Chemin du fichier CSV de sortie
+        timestamps: Horodatages (DatetimeIndex, Series ou datetime64)
         num_homes: Nombre de foyers dans le quartier
+
+    Returns:
+        dict: 'load' (profil horaire × foyers, kW), 'heating' et 'cooling'
+            (surcoûts saisonniers relatifs), 'weekend' (facteur multiplicatif)
     """
-    print(f"🏘️  Génération consommation pour {num_homes} foyers...")
-    
-    start_date = datetime(year, 1, 1)
-    end_date = datetime(year, 12, 31, 23, 45)
-    
-    # Générer timestamps toutes les 15 minutes
-    timestamps = []
-    current = start_date
-    while current <= end_date:
-        timestamps.append(current)
-        current += timedelta(minutes=15)
-    
-    df = pd.DataFrame({'timestamp': timestamps})
-    df['day_of_year'] = df['timestamp'].dt.dayofyear
-    df['hour'] = df['timestamp'].dt.hour
-    df['minute'] = df['timestamp'].dt.minute
-    df['weekday'] = df['timestamp'].dt.weekday  # 0=lundi, 6=dimanche
-    df['is_weekend'] = df['weekday'] >= 5
-    df['month'] = df['timestamp'].dt.month
-    
+    index = pd.DatetimeIndex(timestamps)
+    hour = index.hour.to_numpy()
+    month = index.month.to_numpy()
+    is_weekend = index.weekday.to_numpy() >= 5  # 0=lundi, 6=dimanche
+
     # Consommation de base par foyer (kW)
     base_consumption_per_home = 0.5  # 500W de base
     
     # Profil horaire (pic matin et soir)
-    morning_peak = np.exp(-((df['hour'] - 8) ** 2) / 4)
-    evening_peak = np.exp(-((df['hour'] - 19) ** 2) / 6) * 1.5
-    night_reduction = 0.3 + 0.2 * np.exp(-((df['hour'] - 3) ** 2) / 8)
+    morning_peak = np.exp(-((hour - 8) ** 2) / 4)
+    evening_peak = np.exp(-((hour - 19) ** 2) / 6) * 1.5
+    night_reduction = 0.3 + 0.2 * np.exp(-((hour - 3) ** 2) / 8)
     
     hourly_profile = np.maximum.reduce([morning_peak, evening_peak, night_reduction])
     
-    # Variation saisonnière (chauffage en hiver)
-    winter_heating = np.zeros(len(df))
-    winter_months = [1, 2, 3, 11, 12]
-    for month in winter_months:
-        mask = df['month'] == month
-        winter_heating[mask] = 1.5
+    # Variation saisonnière (chauffage en hiver, climatisation en été)
+    winter_heating = np.where(np.isin(month, [1, 2, 3, 11, 12]), 1.5, 0.0)
+    summer_cooling = np.where(np.isin(month, [6, 7, 8]), 0.8, 0.0)
     
-    summer_cooling = np.zeros(len(df))
-    summer_months = [6, 7, 8]
-    for month in summer_months:
-        mask = df['month'] == month
-        summer_cooling[mask] = 0.8
+    # Réduction weekend (moins de consommation professionnelle)
+    weekend_factor = np.where(is_weekend, 0.85, 1.0)
+
+    return {
+        'load': base_consumption_per_home * num_homes * hourly_profile,
+        'heating': winter_heating,
+        'cooling': summer_cooling,
+        'weekend': weekend_factor,
+    }
+
+
+def consumption_base_profile(timestamps, num_homes=50, heating_scale=1.0):
+    """
+    Profil de consommation déterministe (sans bruit ni pics d'appareils)
+
+    Args:
+        timestamps: Horodatages
+        num_homes: Nombre de foyers dans le quartier
+        heating_scale: Facteur appliqué au chauffage (scalaire ou par pas de temps)
+
+    Returns:
+        np.ndarray: Consommation en kW
+    """
+    parts = consumption_profile_components(timestamps, num_homes)
+    seasonal_factor = 1 + parts['heating'] * heating_scale + parts['cooling']
+    return parts['load'] * seasonal_factor * parts['weekend']
+
+
+def fetch_consumption_data(year, output_file, num_homes=50):
+    """
+    Génère des données de consommation pour un quartier résidentiel
     
-    seasonal_factor = 1 + winter_heating + summer_cooling
+    Args:
+        year: Année de simulation
+        output_file: Chemin du fichier CSV de sortie
+        num_homes: Nombre de foyers dans le quartier
+    """
+    print(f"🏘️  Génération consommation pour {num_homes} foyers...")
     
-    # Réduction weekend (moins de consommation professionnelle)
-    weekend_factor = np.where(df['is_weekend'], 0.85, 1.0)
+    # Générer timestamps toutes les 15 minutes (heure locale, 92 / 100 pas aux changements d'heure)
+    timestamps = year_grid(year)
+    
+    df = pd.DataFrame({'timestamp': timestamps})
     
     # Calcul consommation
-    df['consumption_kw'] = (
-        base_consumption_per_home * 
-        num_homes * 
-        hourly_profile * 
-        seasonal_factor * 
-        weekend_factor
-    )
+    df['consumption_kw'] = consumption_base_profile(df['timestamp'], num_homes)
     
     # Ajouter variabilité réaliste
     np.random.seed(42)
@@ -86,7 +99,7 @@ def fetch_consumption_data(year, output_file, num_homes=50):
     df['consumption_kw'] = df['consumption_kw'].clip(lower=5)
     
     # Formater
-    df['timestamp'] = df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    df['timestamp'] = format_timestamps(df['timestamp'])
     df[['timestamp', 'consumption_kw']].to_csv(output_file, index=False)
     
     print(f"✅ {len(df)} enregistrements générés")
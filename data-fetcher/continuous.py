@@ -0,0 +1,103 @@
+"""
+Module de simulation continue sur l'année
+La batterie n'est plus remise à 50 % chaque minuit : l'état de charge est
+reporté d'un jour à l'autre. Une passe annuelle (toutes les capacités de
+la grille à la fois) enregistre l'état de charge au début de chaque jour ;
+une journée se resimule ensuite seule depuis ce point de reprise, avec
+des résultats identiques à la tranche correspondante de la passe annuelle.
+"""
+import threading
+
+import numpy as np
+
+from battery import INITIAL_SOC, MAX_SOC, MIN_SOC, simulate_battery_batch
+
+
+class SocCheckpoints:
+    """
+    États de charge en début de jour d'une simulation continue
+
+    Attributs:
+        dates: Jours de la série (datetime64[D])
+        bounds: Indices de début de chaque jour, suivis de la longueur totale
+        soc: Capacité (kWh) -> état de charge en début de jour (fraction, shape (D,))
+    """
+
+    def __init__(self, timestamps, production, consumption, capacities, time_step_hours=0.25,
+                 min_soc=MIN_SOC, max_soc=MAX_SOC, initial_soc=INITIAL_SOC, grid_floor=None):
+        """
+        Args:
+            timestamps: Horodatages triés
+            production: Production (kW)
+            consumption: Consommation (kW)
+            capacities: Capacités simulées d'emblée (kWh) ; les autres sont
+                ajoutées à la demande
+            time_step_hours: Pas de temps en heures
+            min_soc, max_soc: Bornes d'état de charge (fraction)
+            initial_soc: État de charge au premier pas de la série (fraction)
+            grid_floor: Plancher de soutirage (voir strategy_grid_floor)
+        """
+        timestamps = np.asarray(timestamps, dtype='datetime64[ns]')
+        self.production = np.asarray(production, dtype=float)
+        self.consumption = np.asarray(consumption, dtype=float)
+        self.time_step_hours = time_step_hours
+        self.params = {'min_soc': min_soc, 'max_soc': max_soc, 'initial_soc': initial_soc}
+        self.grid_floor = grid_floor
+
+        days = timestamps.astype('datetime64[D]')
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        self.dates = days[starts]
+        self.bounds = np.r_[starts, len(days)]
+        self._positions = {d: i for i, d in enumerate(self.dates.tolist())}
+        self.soc = {}
+        self._lock = threading.Lock()
+        self.add(capacities)
+
+    def __contains__(self, date):
+        return np.datetime64(date, 'D').item() in self._positions
+
+    def add(self, capacities):
+        """Simule l'année pour les capacités pas encore connues (une passe pour toutes)"""
+        with self._lock:
+            missing = sorted({float(c) for c in np.atleast_1d(capacities)} - set(self.soc))
+            if not missing:
+                return
+            _, battery_soc, _ = simulate_battery_batch(
+                self.production, self.consumption, missing, self.time_step_hours,
+                grid_floor=self.grid_floor, **self.params
+            )
+            for capacity, row in zip(missing, battery_soc):
+                self.soc[capacity] = row[self.bounds[:-1]] / 100
+
+    def day_slice(self, date):
+        """Tranche de la série correspondant à une journée"""
+        position = self._positions[np.datetime64(date, 'D').item()]
+        return slice(int(self.bounds[position]), int(self.bounds[position + 1]))
+
+    def initial_soc(self, capacity, date):
+        """État de charge (fraction) au début d'une journée, reporté de la veille"""
+        self.add(capacity)
+        return self.soc[float(capacity)][self._positions[np.datetime64(date, 'D').item()]]
+
+    def simulate_day(self, capacity, date):
+        """
+        Simule une journée depuis l'état de charge reporté de la veille
+
+        Une capacité hors grille déclenche une passe annuelle, une seule fois :
+        les journées restent cohérentes quand la capacité change.
+
+        Returns:
+            tuple: (battery_power, battery_soc, network_power), shape (S,),
+                mêmes conventions que simulate_battery_batch
+        """
+        day = self.day_slice(date)
+        grid_floor = self.grid_floor
+        if grid_floor is not None and np.ndim(grid_floor) > 0:
+            grid_floor = grid_floor[day]
+
+        params = dict(self.params, initial_soc=self.initial_soc(capacity, date))
+        battery_power, battery_soc, network = simulate_battery_batch(
+            self.production[day], self.consumption[day], capacity, self.time_step_hours,
+            grid_floor=grid_floor, **params
+        )
+        return battery_power[0], battery_soc[0], network[0]
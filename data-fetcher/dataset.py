@@ -0,0 +1,142 @@
+"""
+Module de chargement des jeux de données production / consommation
+Lit les CSV produits par fetch_data.py (ou ceux des dashboards), aligne
+les deux séries sur leurs instants communs (epochs UTC, voir timebase.py)
+et expose des tableaux NumPy prêts pour la simulation.
+"""
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from timebase import TimeBase, parse_timestamps, to_epoch, to_local
+
+# Répertoire de données par défaut
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+# Colonnes de valeurs reconnues, par ordre de préférence
+VALUE_COLUMNS = ('production_kw', 'consumption_kw', 'value')
+
+
+def read_series(path):
+    """
+    Lit une série temporelle CSV (timestamp + une colonne de valeurs en kW)
+
+    Args:
+        path: Fichier CSV
+
+    Returns:
+        pd.Series: Valeurs indexées par epoch UTC (int64, ns), triées
+    """
+    df = pd.read_csv(path)
+    column = next((c for c in VALUE_COLUMNS if c in df.columns), None)
+    if column is None:
+        raise ValueError(f"{path}: aucune colonne de valeurs parmi {', '.join(VALUE_COLUMNS)}")
+    epochs = parse_timestamps(df['timestamp'])[0]
+    series = pd.Series(df[column].to_numpy(dtype=float), index=epochs, name=column)
+    return series.sort_index()
+
+
+class Dataset:
+    """
+    Séries production / consommation alignées sur une même base de temps
+
+    Attributs:
+        name: Nom du site
+        timestamps: Heures locales sans fuseau (np.ndarray datetime64[ns]) ;
+            l'heure doublée d'octobre y apparaît deux fois
+        production: Production (kW, float64)
+        consumption: Consommation (kW, float64)
+        time_step_hours: Pas de temps en heures
+        epochs: Instants UTC (int64, ns), uniques et croissants
+    """
+
+    def __init__(self, name, timestamps, production, consumption, time_step_hours=None, epochs=None):
+        self.name = name
+        self.timestamps = np.asarray(timestamps, dtype='datetime64[ns]')
+        self.production = np.ascontiguousarray(production, dtype=float)
+        self.consumption = np.ascontiguousarray(consumption, dtype=float)
+        self._epochs = None if epochs is None else np.asarray(epochs, dtype=np.int64)
+        if time_step_hours is None:
+            if len(self.timestamps) > 1:
+                time_step_hours = float((self.timestamps[1] - self.timestamps[0])
+                                        / np.timedelta64(1, 'h'))
+            else:
+                time_step_hours = 0.25
+        self.time_step_hours = time_step_hours
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @cached_property
+    def epochs(self):
+        """Instants UTC, déduits des heures locales s'ils n'ont pas été fournis"""
+        return to_epoch(self.timestamps) if self._epochs is None else self._epochs
+
+    @cached_property
+    def timebase(self):
+        """Base de temps UTC et journées locales"""
+        return TimeBase(self.epochs)
+
+    def day_slice(self, date):
+        """Tranche de la série correspondant à une journée locale"""
+        return self.timebase.day_slice(date)
+
+    def scaled(self, pv_scale):
+        """Copie avec la production multipliée par `pv_scale` (dimensionnement PV)"""
+        return Dataset(self.name, self.timestamps, self.production * pv_scale,
+                       self.consumption, self.time_step_hours, self._epochs)
+
+
+def load_dataset(production_file, consumption_file, name="site"):
+    """
+    Charge et aligne les séries de production et de consommation
+
+    Seuls les instants présents dans les deux fichiers sont conservés ;
+    les valeurs manquantes sont remplacées par 0.
+
+    Args:
+        production_file: CSV de production
+        consumption_file: CSV de consommation
+        name: Nom du site
+
+    Returns:
+        Dataset: Séries alignées
+    """
+    production = read_series(production_file)
+    consumption = read_series(consumption_file)
+    production = production[~production.index.duplicated()]
+    consumption = consumption[~consumption.index.duplicated()]
+
+    index = production.index.intersection(consumption.index)
+    if len(index) == 0:
+        raise ValueError(f"Aucun horodatage commun entre {production_file} et {consumption_file}")
+
+    epochs = index.to_numpy(dtype=np.int64)
+    return Dataset(
+        name,
+        to_local(epochs),
+        production.reindex(index).fillna(0).to_numpy(),
+        consumption.reindex(index).fillna(0).to_numpy(),
+        epochs=epochs,
+    )
+
+
+def default_files(data_dir=DATA_DIR):
+    """
+    Fichiers (production, consommation) publiés par fetch_data.py
+
+    La production mise à l'échelle est préférée ; production.csv sert de
+    repli pour les jeux de données préparés à la main.
+    """
+    data_dir = Path(data_dir)
+    production_file = data_dir / "solar_production_scaled.csv"
+    if not production_file.exists():
+        production_file = data_dir / "production.csv"
+    return [production_file, data_dir / "consumption.csv"]
+
+
+def load_default_dataset(data_dir=DATA_DIR):
+    """Jeu de données généré par fetch_data.py (production mise à l'échelle)"""
+    return load_dataset(*default_files(data_dir), name=Path(data_dir).name)
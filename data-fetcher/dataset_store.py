@@ -0,0 +1,152 @@
+"""
+Module de rechargement à chaud des données des dashboards
+Un DatasetStore surveille les fichiers de data/ (scrutation des dates de
+modification) et, lorsqu'ils changent, recharge les données en arrière-plan
+puis bascule atomiquement vers la nouvelle version. Chaque version est un
+instantané immuable : une session qui a épinglé une version la conserve
+tant qu'elle le souhaite, les nouvelles sessions reçoivent la dernière.
+"""
+import os
+import threading
+import time
+from pathlib import Path
+
+# Intervalle de scrutation par défaut (secondes)
+POLL_INTERVAL = 2.0
+
+
+class DatasetVersion:
+    """Instantané immuable des données chargées"""
+
+    def __init__(self, number, payload, signature, load_seconds):
+        self.number = number
+        self.payload = payload
+        self.signature = signature
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+
+    def __repr__(self):
+        return f"DatasetVersion({self.number})"
+
+
+def files_signature(paths):
+    """Empreinte (date de modification, taille) des fichiers, None si absent"""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append((str(path), None, None))
+    return tuple(signature)
+
+
+class DatasetStore:
+    """
+    Données versionnées avec rechargement automatique
+
+    Le chargeur est appelé hors du verrou ; seule la bascule de la
+    référence vers la nouvelle version est protégée. Un changement n'est
+    pris en compte qu'une fois les fichiers stables sur deux scrutations
+    successives (écriture en cours, fichiers remplacés un par un).
+    """
+
+    def __init__(self, loader, paths, poll_interval=POLL_INTERVAL, name="dataset"):
+        """
+        Args:
+            loader: Fonction sans argument renvoyant les données
+            paths: Fichiers surveillés
+            poll_interval: Intervalle de scrutation (secondes)
+            name: Nom affiché dans les messages
+        """
+        self.loader = loader
+        self.paths = [Path(p) for p in paths]
+        self.poll_interval = poll_interval
+        self.name = name
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._current = None
+        self._subscribers = []
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_error = None
+
+    def current(self):
+        """Dernière version chargée (chargement synchrone au premier appel)"""
+        version = self._current
+        if version is None:
+            version = self.reload()
+        return version
+
+    def reload(self):
+        """Recharge les données et bascule vers la nouvelle version"""
+        with self._load_lock:
+            signature = files_signature(self.paths)
+            version = self._current
+            if version is not None and version.signature == signature:
+                return version
+
+            start = time.perf_counter()
+            payload = self.loader()
+            elapsed = time.perf_counter() - start
+
+            number = version.number + 1 if version is not None else 1
+            version = DatasetVersion(number, payload, signature, elapsed)
+            with self._lock:
+                self._current = version
+                subscribers = list(self._subscribers)
+
+        for callback in subscribers:
+            try:
+                callback(version)
+            except Exception as e:
+                print(f"⚠️  {self.name}: erreur d'un abonné ({e})")
+        return version
+
+    def subscribe(self, callback):
+        """Appelle callback(version) à chaque nouvelle version"""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def start(self):
+        """Démarre la surveillance des fichiers (thread démon)"""
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name=f"{self.name}-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Arrête la surveillance"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval * 2)
+
+    def _watch(self):
+        pending = None
+        while not self._stop.wait(self.poll_interval):
+            signature = files_signature(self.paths)
+            version = self._current
+            if version is not None and signature == version.signature:
+                pending = None
+                continue
+            if any(mtime is None for _, mtime, _ in signature):
+                continue  # Fichier absent (remplacement en cours)
+            if signature != pending:
+                pending = signature  # Attendre une scrutation de plus
+                continue
+            try:
+                version = self.reload()
+                self.last_error = None
+                print(f"🔄 {self.name}: version {version.number} chargée en {version.load_seconds:.2f} s")
+            except Exception as e:
+                # Les données précédentes restent servies
+                self.last_error = e
+                print(f"⚠️  {self.name}: échec du rechargement ({e})")
+            pending = None
@@ -0,0 +1,170 @@
+"""
+Module d'analyse des monotones de charge et des pointes
+Calcule une fois par jeu de données les monotones de consommation et de
+charge nette (consommation - production), les N journées de plus forte
+pointe et la pointe résiduelle de soutirage après batterie pour chaque
+capacité. Le résultat est mis en cache dans un fichier .npz indexé par la
+signature des données et des paramètres.
+"""
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from battery import MAX_SOC, MIN_SOC, simulate_battery_batch
+
+# Paramètres par défaut
+TOP_N = 20
+N_POINTS = 500
+
+# Version du format du cache (à incrémenter si le contenu change)
+CACHE_VERSION = 1
+
+
+def dataset_signature(timestamps, production, consumption, **params):
+    """
+    Empreinte des données et des paramètres de calcul
+
+    Returns:
+        str: Condensé SHA-1 hexadécimal
+    """
+    digest = hashlib.sha1()
+    digest.update(f"v{CACHE_VERSION}".encode())
+    for values in (np.asarray(timestamps, dtype='datetime64[ns]').view(np.int64),
+                   np.asarray(production, dtype=float),
+                   np.asarray(consumption, dtype=float)):
+        digest.update(np.ascontiguousarray(values).tobytes())
+    for name in sorted(params):
+        digest.update(f"{name}={np.asarray(params[name]).tolist()!r}".encode())
+    return digest.hexdigest()
+
+
+def duration_curve(values, n_points=N_POINTS):
+    """
+    Monotone décroissante échantillonnée sur n_points
+
+    Args:
+        values: Série (kW), shape (T,) ou (N, T)
+        n_points: Nombre de points conservés (premier et dernier inclus)
+
+    Returns:
+        tuple: (rang des points retenus, valeurs triées décroissantes)
+    """
+    values = np.asarray(values, dtype=float)
+    ordered = -np.sort(-values, axis=-1)
+    length = values.shape[-1]
+    ranks = np.unique(np.linspace(0, length - 1, min(n_points, length)).round().astype(np.intp))
+    return ranks, ordered[..., ranks]
+
+
+def top_peak_days(timestamps, values, top_n=TOP_N):
+    """
+    Journées de plus forte pointe (une pointe par jour au plus)
+
+    Returns:
+        tuple: (horodatages des pointes, valeurs), triés par valeur décroissante
+    """
+    timestamps = np.asarray(timestamps, dtype='datetime64[ns]')
+    values = np.asarray(values, dtype=float)
+    days = timestamps.astype('datetime64[D]')
+    starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+
+    daily_max = np.maximum.reduceat(values, starts)
+    n = min(top_n, len(daily_max))
+    best_days = np.argpartition(-daily_max, n - 1)[:n]
+    best_days = best_days[np.argsort(-daily_max[best_days])]
+
+    # Position de la pointe dans chaque journée retenue
+    ends = np.r_[starts[1:], len(values)]
+    positions = np.array([starts[d] + values[starts[d]:ends[d]].argmax() for d in best_days], dtype=np.intp)
+    return timestamps[positions], values[positions]
+
+
+def compute_duration_analysis(timestamps, production, consumption, capacities, time_step_hours=None,
+                              top_n=TOP_N, n_points=N_POINTS, min_soc=MIN_SOC, max_soc=MAX_SOC):
+    """
+    Monotones, pointes et pointe résiduelle par capacité sur toute la série
+
+    Args:
+        timestamps: Horodatages
+        production: Production (kW)
+        consumption: Consommation (kW)
+        capacities: Capacités de batterie (kWh)
+        time_step_hours: Pas de temps (déduit des horodatages si None)
+        top_n: Nombre de journées de pointe retenues
+        n_points: Nombre de points des monotones
+        min_soc: État de charge minimum de la batterie
+        max_soc: État de charge maximum de la batterie
+
+    Returns:
+        dict: Tableaux NumPy (directement sérialisables en .npz)
+    """
+    timestamps = np.asarray(timestamps, dtype='datetime64[ns]')
+    production = np.asarray(production, dtype=float)
+    consumption = np.asarray(consumption, dtype=float)
+    capacities = np.asarray(capacities, dtype=float)
+    if time_step_hours is None:
+        time_step_hours = float((timestamps[1] - timestamps[0]) / np.timedelta64(1, 'h')) if len(timestamps) > 1 else 0.25
+
+    net_load = consumption - production
+    ranks, load_curve = duration_curve(consumption, n_points)
+    _, net_load_curve = duration_curve(net_load, n_points)
+    peak_times, peak_values = top_peak_days(timestamps, net_load, top_n)
+
+    _, _, network = simulate_battery_batch(production, consumption, capacities, time_step_hours,
+                                           min_soc=min_soc, max_soc=max_soc)
+    grid_import = np.maximum(-network, 0)
+    _, residual_curves = duration_curve(grid_import, n_points)
+
+    return {
+        'duration_hours': (ranks + 1) * time_step_hours,
+        'load_curve': load_curve,
+        'net_load_curve': net_load_curve,
+        'peak_times': peak_times,
+        'peak_values': peak_values,
+        'capacities': capacities,
+        'residual_peak': grid_import.max(axis=1),
+        'residual_curves': residual_curves,
+        'hours_above_zero': (grid_import > 0).sum(axis=1) * time_step_hours,
+    }
+
+
+def load_duration_analysis(cache_dir, timestamps, production, consumption, capacities, **params):
+    """
+    Analyse des monotones, lue depuis le cache .npz ou calculée puis enregistrée
+
+    Args:
+        cache_dir: Répertoire du cache (à côté des données)
+        timestamps, production, consumption, capacities: voir compute_duration_analysis
+        **params: Autres paramètres de compute_duration_analysis
+
+    Returns:
+        dict: Tableaux de l'analyse
+    """
+    signature = dataset_signature(timestamps, production, consumption, capacities=capacities, **params)
+    cache_dir = Path(cache_dir)
+    cache_file = cache_dir / f"duration_{signature[:16]}.npz"
+
+    if cache_file.exists():
+        try:
+            with np.load(cache_file) as archive:
+                return {name: archive[name] for name in archive.files}
+        except (OSError, ValueError):
+            pass  # Fichier corrompu : recalcul
+
+    analysis = compute_duration_analysis(timestamps, production, consumption, capacities, **params)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_suffix('.tmp.npz')
+    np.savez_compressed(tmp_file, **analysis)
+    os.replace(tmp_file, cache_file)
+    return analysis
+
+
+def peaks_table(analysis):
+    """Journées de pointe sous forme de DataFrame (affichage)"""
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(analysis['peak_times']),
+        'net_load_kw': analysis['peak_values'],
+    })
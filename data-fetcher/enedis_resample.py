@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Module de passage des séries Enedis à la grille de la production solaire
+Le bilan électrique Enedis est régional, au pas de 30 min, en MW moyens,
+horodaté avec décalage (UTC après enedis_store.py). Les dashboards
+attendent des kW au pas de 15 min à l'échelle d'un quartier, sur la même
+grille que la production solaire (timebase.year_grid : régulière en UTC,
+92 pas le jour du passage à l'heure d'été, 100 à l'heure d'hiver).
+
+Chaque pas de la grille reçoit la puissance moyenne de la demi-heure
+Enedis qui le contient (deux pas de 15 min par demi-heure, énergie
+conservée). La conversion MW -> kW et la mise à l'échelle du quartier
+sont vectorisées ; la grille est traitée mois par mois (mois locaux), en
+ne lisant que les partitions du magasin concernées.
+
+Exemple:
+    python enedis_resample.py --year 2024 --homes 50 --output ../data/consumption.csv
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from enedis_store import STORE_DIR, EnedisStore, normalize_records
+from timebase import LOCAL_TZ, format_timestamps, to_epoch, to_local, year_grid
+
+# Pas Enedis
+ENEDIS_STEP = np.timedelta64(30, 'm')
+
+# Puissance moyenne d'un foyer (kW), soit environ 4,5 MWh/an
+HOME_MEAN_KW = 0.51
+
+# Colonne utilisée par défaut (présente dans fetch_conso.py et fetch_conso_claude.py)
+DEFAULT_FIELD = 'soutirage_rte'
+
+# Colonnes du CSV de fetch_conso.py -> champs Enedis
+CSV_COLUMNS = {
+    'Puissance_Injectee_MWh': 'injection_rte',
+    'Puissance_Soutiree_MWh': 'soutirage_rte',
+}
+
+
+class CsvSource:
+    """Source lue depuis le CSV de fetch_conso.py (même interface que EnedisStore.read)"""
+
+    def __init__(self, path):
+        frame = pd.read_csv(path)
+        frame = frame.rename(columns=CSV_COLUMNS)
+        self.frame = normalize_records(frame.to_dict('records'))
+
+    def read(self, start=None, end=None):
+        frame = self.frame
+        if start is not None:
+            frame = frame[frame['horodate'] >= start]
+        if end is not None:
+            frame = frame[frame['horodate'] < end]
+        return frame
+
+
+def open_source(source):
+    """Magasin Enedis (répertoire) ou CSV de fetch_conso.py"""
+    source = Path(source)
+    return CsvSource(source) if source.suffix == '.csv' else EnedisStore(source)
+
+
+def values_on_grid(grid_utc, horodate_utc, values, step=ENEDIS_STEP):
+    """
+    Valeur de l'intervalle Enedis contenant chaque pas de la grille
+
+    Args:
+        grid_utc: Pas de la grille (epoch UTC ns)
+        horodate_utc: Début des intervalles Enedis (epoch UTC ns, trié)
+        values: Valeurs des intervalles
+        step: Durée d'un intervalle Enedis
+
+    Returns:
+        np.ndarray: Valeurs sur la grille, NaN hors des intervalles connus
+    """
+    values = np.asarray(values, dtype=float)
+    result = np.full(len(grid_utc), np.nan)
+    if len(values) == 0:
+        return result
+    position = np.searchsorted(horodate_utc, grid_utc, side='right') - 1
+    clipped = np.maximum(position, 0)
+    inside = (position >= 0) & (grid_utc - horodate_utc[clipped] < step.astype('timedelta64[ns]').astype(np.int64))
+    result[inside] = values[clipped[inside]]
+    return result
+
+
+def month_chunks(timestamps):
+    """Bornes (début, fin) des mois d'une grille triée"""
+    months = np.asarray(timestamps, dtype='datetime64[ns]').astype('datetime64[M]')
+    starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+    return list(zip(starts, np.r_[starts[1:], len(months)]))
+
+
+def iter_grid_values(source, timestamps, field=DEFAULT_FIELD, tz=LOCAL_TZ):
+    """
+    Valeurs Enedis (MW) sur la grille, un mois à la fois
+
+    Yields:
+        tuple: (tranche de la grille, valeurs en MW, NaN si absentes)
+    """
+    epochs = to_epoch(timestamps, tz)
+    for start, stop in month_chunks(to_local(epochs, tz)):
+        grid_utc = epochs[start:stop]
+        frame = source.read(pd.Timestamp(int(grid_utc[0]), tz='UTC') - pd.Timedelta(ENEDIS_STEP),
+                            pd.Timestamp(int(grid_utc[-1]), tz='UTC') + pd.Timedelta(ENEDIS_STEP))
+        frame = frame.dropna(subset=[field])
+        horodate = to_epoch(frame['horodate'])
+        yield slice(start, stop), values_on_grid(grid_utc, horodate, frame[field].to_numpy())
+
+
+def neighbourhood_scale(mean_mw, num_homes, home_mean_kw=HOME_MEAN_KW):
+    """Facteur MW régionaux -> kW du quartier (puissance moyenne de num_homes foyers)"""
+    return num_homes * home_mean_kw / (mean_mw * 1000)
+
+
+def enedis_consumption(source, timestamps, field=DEFAULT_FIELD, num_homes=50, scale=None, tz=LOCAL_TZ):
+    """
+    Consommation du quartier (kW) sur la grille, à partir des données Enedis
+
+    Le facteur d'échelle ramène la puissance moyenne de la période à celle
+    de num_homes foyers. Les pas sans donnée sont interpolés linéairement.
+
+    Args:
+        source: EnedisStore ou CsvSource
+        timestamps: Grille de la production solaire (avec fuseau, ou heures locales sans fuseau)
+        field: Champ Enedis utilisé
+        num_homes: Nombre de foyers du quartier
+        scale: Facteur kW quartier / kW régionaux (déduit de num_homes si None)
+        tz: Fuseau de la grille
+
+    Returns:
+        tuple: (consommation en kW, nombre de pas interpolés, facteur appliqué)
+    """
+    megawatts = np.full(len(timestamps), np.nan)
+    for chunk, values in iter_grid_values(source, timestamps, field, tz):
+        megawatts[chunk] = values
+
+    known = ~np.isnan(megawatts)
+    if not known.any():
+        raise ValueError(f"Aucune donnée Enedis ({field}) sur la période demandée")
+    if scale is None:
+        scale = neighbourhood_scale(megawatts[known].mean(), num_homes)
+    missing = int((~known).sum())
+    if missing:
+        positions = np.arange(len(megawatts))
+        megawatts[~known] = np.interp(positions[~known], positions[known], megawatts[known])
+    return megawatts * 1000 * scale, missing, scale
+
+
+def fetch_enedis_consumption(year, output_file, source=STORE_DIR, field=DEFAULT_FIELD, num_homes=50,
+                             scale=None):
+    """
+    Écrit la consommation du quartier issue d'Enedis (même format que fetch_consumption_data)
+
+    Args:
+        year: Année
+        output_file: Fichier CSV de sortie (timestamp, consumption_kw)
+        source: Magasin Enedis (répertoire) ou CSV de fetch_conso.py
+        field: Champ Enedis utilisé
+        num_homes: Nombre de foyers du quartier
+        scale: Facteur kW quartier / kW régionaux (déduit de num_homes si None)
+    """
+    print(f"🏘️  Consommation Enedis ({field}) ramenée à {num_homes} foyers...")
+    timestamps = year_grid(year)
+    consumption, missing, scale = enedis_consumption(open_source(source), timestamps, field, num_homes, scale)
+
+    df = pd.DataFrame({'timestamp': format_timestamps(timestamps), 'consumption_kw': consumption})
+    df.to_csv(output_file, index=False)
+
+    print(f"✅ {len(df)} enregistrements ({missing} pas interpolés, facteur {scale:.3e})")
+    print(f"   Consommation max: {consumption.max():.2f} kW")
+    print(f"   Consommation moy: {consumption.mean():.2f} kW")
+    print(f"   Consommation min: {consumption.min():.2f} kW")
+
+
+def main(argv=None):
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Consommation Enedis au pas de 15 min à l'échelle d'un quartier")
+    parser.add_argument('--year', type=int, default=2024)
+    parser.add_argument('--source', default=str(STORE_DIR), help="Magasin Enedis ou CSV de fetch_conso.py")
+    parser.add_argument('--field', default=DEFAULT_FIELD, help=f"Champ Enedis (défaut: {DEFAULT_FIELD})")
+    parser.add_argument('--homes', type=int, default=50, help="Nombre de foyers du quartier")
+    parser.add_argument('--scale', type=float, help="Facteur kW quartier / kW régionaux (remplace --homes)")
+    parser.add_argument('--output', default='consumption.csv', help="Fichier CSV de sortie")
+    args = parser.parse_args(argv)
+    fetch_enedis_consumption(args.year, args.output, args.source, args.field, args.homes, args.scale)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Module de stockage local des données Enedis (bilan électrique demi-heure)
+Les enregistrements bruts de l'API (format v1 `{'fields': {...}}` ou v2
+à plat) sont aplatis d'un bloc par pandas.json_normalize, typés (horodate
+en UTC, puissances en float64) puis fusionnés dans un magasin Parquet
+partitionné par mois. La fusion remplace les lignes de même horodate :
+une récupération répétée ne crée jamais de doublon et ne réécrit que les
+mois concernés.
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from dataset import DATA_DIR
+
+try:
+    import pyarrow  # noqa: F401  (moteur de pd.read_parquet / to_parquet)
+    PARTITION_FORMAT = 'parquet'
+except ImportError:
+    PARTITION_FORMAT = 'csv'
+
+# Magasin par défaut
+STORE_DIR = DATA_DIR / "enedis"
+
+# Colonnes conservées (MW), en plus de l'horodate
+VALUE_FIELDS = (
+    'injection_rte',
+    'soutirage_rte',
+    'consommation_totale',
+    'production_totale',
+    'production_photovoltaique',
+)
+
+
+def normalize_records(records):
+    """
+    Aplatit et type des enregistrements de l'API Enedis
+
+    Args:
+        records: Liste de dicts (API v1 : clés sous 'fields', API v2 : à plat)
+
+    Returns:
+        pd.DataFrame: 'horodate' (datetime64 UTC) et VALUE_FIELDS (float64),
+            triés par horodate, sans doublon
+    """
+    frame = pd.json_normalize(records)
+    frame.columns = [c.removeprefix('fields.') for c in frame.columns]
+    if 'horodate' not in frame.columns:
+        return pd.DataFrame({'horodate': pd.Series(dtype='datetime64[ns, UTC]'),
+                             **{name: pd.Series(dtype=float) for name in VALUE_FIELDS}})
+
+    # Les horodates portent leur décalage (+01:00 / +02:00) : conversion exacte en UTC
+    result = pd.DataFrame({'horodate': pd.to_datetime(frame['horodate'], utc=True, format='ISO8601')
+                                         .astype('datetime64[ns, UTC]')})
+    for name in VALUE_FIELDS:
+        if name in frame.columns:
+            result[name] = pd.to_numeric(frame[name], errors='coerce').astype(float)
+        else:
+            result[name] = np.nan
+    result = result.dropna(subset=['horodate'])
+    return result.drop_duplicates('horodate', keep='last').sort_values('horodate', ignore_index=True)
+
+
+def to_utc(value):
+    """Horodatage en UTC (sans fuseau : supposé déjà en UTC), None conservé"""
+    if value is None:
+        return None
+    value = pd.Timestamp(value)
+    return value.tz_localize('UTC') if value.tzinfo is None else value.tz_convert('UTC')
+
+
+class EnedisStore:
+    """Magasin colonne des données Enedis, une partition par mois (UTC)"""
+
+    def __init__(self, directory=STORE_DIR):
+        self.directory = Path(directory)
+
+    def partitions(self):
+        return sorted(self.directory.glob(f"*.{PARTITION_FORMAT}"))
+
+    def _path(self, month):
+        return self.directory / f"{month}.{PARTITION_FORMAT}"
+
+    def _read(self, path):
+        if PARTITION_FORMAT == 'parquet':
+            return pd.read_parquet(path)
+        frame = pd.read_csv(path)
+        frame['horodate'] = pd.to_datetime(frame['horodate'], utc=True, format='ISO8601')
+        return frame
+
+    def _write(self, frame, path):
+        tmp_path = path.with_name(path.name + '.tmp')
+        if PARTITION_FORMAT == 'parquet':
+            frame.to_parquet(tmp_path, index=False)
+        else:
+            frame.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def upsert(self, frame):
+        """
+        Fusionne des lignes normalisées (voir normalize_records)
+
+        Les lignes dont l'horodate existe déjà remplacent l'ancienne valeur.
+
+        Returns:
+            dict: Nombre de lignes 'added' et 'updated', mois réécrits
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stats = {'added': 0, 'updated': 0, 'months': []}
+        if frame.empty:
+            return stats
+        months = frame['horodate'].dt.strftime('%Y-%m')
+        for month, rows in frame.groupby(months.to_numpy(), sort=True):
+            path = self._path(month)
+            if path.exists():
+                existing = self._read(path)
+                updated = int(existing['horodate'].isin(rows['horodate']).sum())
+                merged = pd.concat([existing, rows], ignore_index=True)
+                merged = merged.drop_duplicates('horodate', keep='last')
+            else:
+                updated, merged = 0, rows
+            merged = merged.sort_values('horodate', ignore_index=True)
+            self._write(merged, path)
+            stats['added'] += len(rows) - updated
+            stats['updated'] += updated
+            stats['months'].append(month)
+        return stats
+
+    def read(self, start=None, end=None):
+        """
+        Lignes du magasin sur [start, end[ (horodatages UTC ou avec décalage)
+
+        Seules les partitions des mois concernés sont lues.
+        """
+        start, end = to_utc(start), to_utc(end)
+
+        frames = []
+        for path in self.partitions():
+            month = pd.Timestamp(path.stem, tz='UTC')
+            if start is not None and month + pd.offsets.MonthBegin(1) <= start:
+                continue
+            if end is not None and month >= end:
+                continue
+            frames.append(self._read(path))
+        if not frames:
+            return normalize_records([])
+        frame = pd.concat(frames, ignore_index=True)
+        if start is not None:
+            frame = frame[frame['horodate'] >= start]
+        if end is not None:
+            frame = frame[frame['horodate'] < end]
+        return frame.reset_index(drop=True)
+
+    def last_timestamp(self):
+        """Dernière horodate stockée (UTC), None si le magasin est vide"""
+        partitions = self.partitions()
+        if not partitions:
+            return None
+        return self._read(partitions[-1])['horodate'].max()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Module d'export statique des données pour le front web
+Découpe les séries alignées de production et de consommation en fragments
+JSON compressés (gzip) par jour et par mois, accompagnés d'un manifeste.
+Le front ne télécharge plus que la journée affichée (quelques Ko) au lieu
+des CSV de l'année complète. En option, les fragments journaliers
+embarquent les séries batterie / état de charge / réseau précalculées par
+le moteur Python pour une grille de capacités, quantifiées en int16.
+
+Exemple:
+    python export_static.py --output-dir ../web-app/public/data --battery
+"""
+import argparse
+import base64
+import gzip
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from battery import INITIAL_SOC, simulate_battery_batch
+from dataset import DATA_DIR, load_default_dataset
+
+# Répertoire servi tel quel par le front (Vite)
+OUTPUT_DIR = Path(__file__).parent.parent / "web-app" / "public" / "data"
+MANIFEST_FILE = "manifest.json"
+
+# Version du format des fragments (à incrémenter si la structure change)
+FORMAT_VERSION = 1
+
+# Décimales conservées sur les puissances (kW)
+DECIMALS = 3
+
+# Simulation du front (web-app/src/services/dataProcessor.js) : grille du
+# slider, bornes d'état de charge, batterie à 50 % au début de chaque jour
+WEB_CAPACITIES = np.arange(0, 1501, 50)
+WEB_MIN_SOC = 0.10
+WEB_MAX_SOC = 0.80
+
+# Valeur entière maximale de la quantification int16
+QUANTIZED_MAX = 32767
+
+
+def write_gzip_json(path, payload):
+    """
+    Écrit un fichier JSON compressé, de manière atomique
+
+    L'en-tête gzip ne contient pas de date : un fragment inchangé reste
+    identique à l'octet près d'un export à l'autre.
+
+    Returns:
+        int: Taille du fichier écrit (octets)
+    """
+    data = gzip.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'), mtime=0)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+def group_bounds(keys):
+    """Bornes (début, fin) des groupes de clés consécutives égales"""
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)]
+    return list(zip(starts, ends))
+
+
+def shard_payload(timestamps, production, consumption, origin):
+    """
+    Contenu d'un fragment : séries alignées et décalages depuis l'origine
+
+    Args:
+        timestamps: Horodatages du fragment (datetime64[ns])
+        production: Production (kW)
+        consumption: Consommation (kW)
+        origin: Début du jour ou du mois (datetime64)
+
+    Returns:
+        dict: Origine ("AAAA-MM-JJ HH:MM:SS"), décalages (minutes) et valeurs
+    """
+    origin = np.datetime64(origin, 's')
+    offsets = (timestamps - origin) // np.timedelta64(1, 'm')
+    return {
+        'start': str(origin).replace('T', ' '),
+        'offsets': offsets.astype(np.int64).tolist(),
+        'production': np.round(production, DECIMALS).tolist(),
+        'consumption': np.round(consumption, DECIMALS).tolist(),
+    }
+
+
+def quantize(values):
+    """
+    Quantifie un tableau en int16 (petit-boutiste) avec un facteur d'échelle
+
+    valeur ≈ entier × scale ; l'erreur maximale est scale / 2, soit
+    max(|valeurs|) / 65534. Décodé par dequantize (web-app/src/services/dataLoader.js).
+
+    Returns:
+        dict: {'scale': float, 'data': octets int16 encodés en base64}
+    """
+    values = np.asarray(values, dtype=float)
+    peak = float(np.abs(values).max()) if values.size else 0.0
+    scale = peak / QUANTIZED_MAX if peak > 0 else 1.0
+    data = np.round(values / scale).astype('<i2')
+    return {'scale': scale, 'data': base64.b64encode(data.tobytes()).decode('ascii')}
+
+
+def simulate_days(dataset, bounds, capacities, min_soc=WEB_MIN_SOC, max_soc=WEB_MAX_SOC,
+                  initial_soc=INITIAL_SOC):
+    """
+    Simule chaque journée pour toutes les capacités, état initial chaque jour
+
+    Les journées de même longueur sont simulées ensemble : une ligne par
+    couple (jour, capacité), en une passe de simulate_battery_batch.
+
+    Args:
+        dataset: Données alignées (Dataset)
+        bounds: Bornes (début, fin) de chaque journée
+        capacities: Capacités (kWh), shape (C,)
+        min_soc, max_soc, initial_soc: Paramètres de la batterie
+
+    Returns:
+        list: Par journée, dict des séries quantifiées de shape (C, S)
+    """
+    capacities = np.asarray(capacities, dtype=float)
+    n_capacities = len(capacities)
+    lengths = np.array([stop - start for start, stop in bounds])
+    results = [None] * len(bounds)
+
+    for length in np.unique(lengths):
+        days = np.flatnonzero(lengths == length)
+        index = np.array([bounds[d][0] for d in days])[:, None] + np.arange(length)
+
+        def rows(values):
+            return np.repeat(values[index], n_capacities, axis=0)
+
+        battery_power, battery_soc, network = simulate_battery_batch(
+            rows(dataset.production), rows(dataset.consumption), np.tile(capacities, len(days)),
+            dataset.time_step_hours, min_soc=min_soc, max_soc=max_soc, initial_soc=initial_soc
+        )
+        for i, day in enumerate(days):
+            block = slice(i * n_capacities, (i + 1) * n_capacities)
+            results[day] = {
+                'battery_power': quantize(battery_power[block]),
+                'battery_soc': quantize(battery_soc[block]),
+                'network_power': quantize(network[block]),
+            }
+    return results
+
+
+def export_static(dataset, output_dir=OUTPUT_DIR, battery=False, capacities=WEB_CAPACITIES):
+    """
+    Exporte les fragments journaliers et mensuels et le manifeste
+
+    Le manifeste est écrit en dernier : le front ne voit jamais un
+    manifeste qui référence un fragment absent. Les fragments d'un export
+    précédent qui ne sont plus référencés sont supprimés.
+
+    Args:
+        dataset: Données alignées (Dataset)
+        output_dir: Répertoire de sortie (public/data du front)
+        battery: Ajoute aux fragments journaliers les séries batterie
+            précalculées (clé 'battery', séries de shape (C, S))
+        capacities: Capacités précalculées (kWh)
+
+    Returns:
+        dict: Manifeste écrit
+    """
+    output_dir = Path(output_dir)
+    timestamps = dataset.timestamps
+    manifest = {
+        'version': FORMAT_VERSION,
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'name': dataset.name,
+        'step_minutes': int(round(dataset.time_step_hours * 60)),
+        'days': [],
+        'months': [],
+        'bytes': 0,
+        'battery': None,
+    }
+    if battery:
+        manifest['battery'] = {'capacities': np.asarray(capacities).tolist(), 'min_soc': WEB_MIN_SOC,
+                               'max_soc': WEB_MAX_SOC, 'initial_soc': INITIAL_SOC}
+
+    for unit, key_type in (('day', 'datetime64[D]'), ('month', 'datetime64[M]')):
+        directory = output_dir / f"{unit}s"
+        directory.mkdir(parents=True, exist_ok=True)
+        keys = timestamps.astype(key_type)
+
+        bounds = group_bounds(keys)
+        simulations = simulate_days(dataset, bounds, capacities) if battery and unit == 'day' else None
+
+        written = set()
+        for i, (start, stop) in enumerate(bounds):
+            label = str(keys[start])
+            payload = {unit: label, **shard_payload(timestamps[start:stop], dataset.production[start:stop],
+                                                    dataset.consumption[start:stop], keys[start])}
+            if simulations is not None:
+                payload['battery'] = {'capacities': manifest['battery']['capacities'], **simulations[i]}
+            filename = f"{label}.json.gz"
+            manifest['bytes'] += write_gzip_json(directory / filename, payload)
+            manifest[f"{unit}s"].append(label)
+            written.add(filename)
+
+        for stale in directory.glob('*.json.gz'):
+            if stale.name not in written:
+                stale.unlink()
+
+    tmp_manifest = output_dir / (MANIFEST_FILE + '.tmp')
+    with open(tmp_manifest, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_manifest, output_dir / MANIFEST_FILE)
+    return manifest
+
+
+def main(argv=None):
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Export des données en fragments JSON compressés pour le front web")
+    parser.add_argument('--data-dir', default=str(DATA_DIR), help="Répertoire des CSV (défaut: data/)")
+    parser.add_argument('--output-dir', default=str(OUTPUT_DIR), help="Répertoire de sortie (défaut: web-app/public/data)")
+    parser.add_argument('--battery', action='store_true',
+                        help="Précalcule les séries batterie (0 à 1500 kWh par pas de 50)")
+    args = parser.parse_args(argv)
+
+    dataset = load_default_dataset(Path(args.data_dir))
+    start = time.perf_counter()
+    manifest = export_static(dataset, args.output_dir, battery=args.battery)
+    print(f"📦 {len(manifest['days'])} jours et {len(manifest['months'])} mois exportés "
+          f"({manifest['bytes'] / 1024:.0f} Ko) en {time.perf_counter() - start:.1f} s")
+    print(f"📁 {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
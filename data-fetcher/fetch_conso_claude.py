@@ -3,6 +3,8 @@ import pandas as pd
 from datetime import datetime
 import time
 
+from enedis_store import STORE_DIR, EnedisStore, normalize_records
+
 def recuperer_donnees_enedis_2024():
     """
     Récupère les données de puissance électrique pour l'année 2024
@@ -67,33 +69,9 @@ def recuperer_donnees_enedis_2024():
 def traiter_donnees(records):
     """
     Traite les données brutes et crée un DataFrame pandas
+    (aplatissement vectorisé, horodate en UTC, puissances typées : voir enedis_store.py)
     """
-    donnees_traitees = []
-    
-    for record in records:
-        fields = record.get('fields', {})
-        
-        donnee = {
-            'horodate': fields.get('horodate'),
-            'injection_rte': fields.get('injection_rte'),
-            'soutirage_rte': fields.get('soutirage_rte'),
-            'consommation_totale': fields.get('consommation_totale'),
-            'production_totale': fields.get('production_totale'),
-            'production_photovoltaique': fields.get('production_photovoltaique'),
-        }
-        
-        donnees_traitees.append(donnee)
-    
-    # Créer un DataFrame
-    df = pd.DataFrame(donnees_traitees)
-    
-    # Convertir la colonne horodate en datetime
-    df['horodate'] = pd.to_datetime(df['horodate'])
-    
-    # Trier par date
-    df = df.sort_values('horodate')
-    
-    return df
+    return normalize_records(records)
 
 def sauvegarder_donnees(df, format='csv'):
     """
@@ -152,8 +130,13 @@ if __name__ == "__main__":
         # 3. Afficher les statistiques
         afficher_statistiques(df)
         
-        # 4. Sauvegarder les données (choisir le format)
-        sauvegarder_donnees(df, format='csv')
+        # 4. Fusionner dans le magasin local (une partition par mois, sans doublon)
+        stats = EnedisStore().upsert(df)
+        print(f"💾 {STORE_DIR}: {stats['added']} ajoutés, {stats['updated']} mis à jour "
+              f"({len(stats['months'])} mois réécrits)")
+        
+        # Export horodaté ponctuel (choisir le format)
+        # sauvegarder_donnees(df, format='csv')    # Décommenter pour CSV
         # sauvegarder_donnees(df, format='excel')  # Décommenter pour Excel
         # sauvegarder_donnees(df, format='json')   # Décommenter pour JSON
         
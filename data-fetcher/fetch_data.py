@@ -2,28 +2,65 @@
 """
 Script principal de récupération et mise à l'échelle des données
 """
+import argparse
 import os
+import shutil
 import sys
 from pathlib import Path
 import json
 from datetime import datetime
 
+from clouds import CloudModel
 from solar_data import fetch_solar_data
 from consumption_data import fetch_consumption_data
+from enedis_resample import DEFAULT_FIELD as ENEDIS_FIELD, fetch_enedis_consumption
+from enedis_store import STORE_DIR as ENEDIS_DIR
 from scaler import scale_production_to_consumption
+from dataset import load_dataset
+from export_static import OUTPUT_DIR as STATIC_DIR, export_static
 
 # Chemins
 PROJECT_ROOT = Path(__file__).parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
+# Les fichiers sont d'abord écrits ici, puis publiés d'un bloc dans data/
+STAGING_DIR = DATA_DIR / ".staging"
 
-def main():
+OUTPUT_FILES = ["solar_production.csv", "consumption.csv", "solar_production_scaled.csv", "metadata.json"]
+
+
+def publish_outputs(staging_dir=STAGING_DIR, data_dir=DATA_DIR, names=OUTPUT_FILES):
+    """
+    Publie les fichiers générés dans data/ par renommage atomique
+
+    Les dashboards qui surveillent data/ ne voient jamais un fichier à
+    moitié écrit : chaque fichier est remplacé par os.replace (même
+    système de fichiers), après que toutes les étapes ont réussi.
+    """
+    for name in names:
+        os.replace(staging_dir / name, data_dir / name)
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def main(argv=None):
     """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Récupération et mise à l'échelle des données")
+    parser.add_argument('--consumption', choices=['synthetic', 'enedis'], default='synthetic',
+                        help="Source de la consommation : profil synthétique ou bilan Enedis")
+    parser.add_argument('--enedis-source', default=str(ENEDIS_DIR),
+                        help="Magasin Enedis (enedis_store.py) ou CSV de fetch_conso.py")
+    parser.add_argument('--enedis-field', default=ENEDIS_FIELD, help=f"Champ Enedis (défaut: {ENEDIS_FIELD})")
+    parser.add_argument('--homes', type=int, default=50, help="Nombre de foyers du quartier")
+    parser.add_argument('--clouds', choices=['markov', 'simple'], default='markov',
+                        help="Nébulosité des données solaires synthétiques de repli (défaut: markov)")
+    args = parser.parse_args(argv)
+
     print("=" * 60)
     print("RÉCUPÉRATION DES DONNÉES - DASHBOARD SOLAIRE")
     print("=" * 60)
     
     # Créer le répertoire data s'il n'existe pas
     DATA_DIR.mkdir(exist_ok=True)
+    STAGING_DIR.mkdir(exist_ok=True)
     
     # Paramètres
     year = 2024
@@ -35,42 +72,53 @@ def main():
     
     # Étape 1: Récupération production solaire
     print("=" * 60)
-    print("ÉTAPE 1/3: Récupération données production solaire")
+    print("ÉTAPE 1/4: Récupération données production solaire")
     print("=" * 60)
-    solar_file = DATA_DIR / "solar_production.csv"
+    solar_file = STAGING_DIR / "solar_production.csv"
     try:
         fetch_solar_data(
             latitude=latitude,
             longitude=longitude,
             year=year,
-            output_file=solar_file
+            output_file=solar_file,
+            cloud_model=CloudModel() if args.clouds == 'markov' else None
         )
-        print(f"✅ Production solaire sauvegardée: {solar_file}")
+        print(f"✅ Production solaire générée: {solar_file.name}")
     except Exception as e:
         print(f"❌ Erreur: {e}")
         sys.exit(1)
     
     # Étape 2: Récupération consommation
     print("\n" + "=" * 60)
-    print("ÉTAPE 2/3: Récupération données consommation")
+    print("ÉTAPE 2/4: Récupération données consommation")
     print("=" * 60)
-    consumption_file = DATA_DIR / "consumption.csv"
+    consumption_file = STAGING_DIR / "consumption.csv"
     try:
-        fetch_consumption_data(
-            year=year,
-            output_file=consumption_file
-        )
-        print(f"✅ Consommation sauvegardée: {consumption_file}")
+        if args.consumption == 'enedis':
+            fetch_enedis_consumption(
+                year=year,
+                output_file=consumption_file,
+                source=args.enedis_source,
+                field=args.enedis_field,
+                num_homes=args.homes
+            )
+        else:
+            fetch_consumption_data(
+                year=year,
+                output_file=consumption_file,
+                num_homes=args.homes
+            )
+        print(f"✅ Consommation générée: {consumption_file.name}")
     except Exception as e:
         print(f"❌ Erreur: {e}")
         sys.exit(1)
     
     # Étape 3: Mise à l'échelle
     print("\n" + "=" * 60)
-    print("ÉTAPE 3/3: Mise à l'échelle production/consommation")
+    print("ÉTAPE 3/4: Mise à l'échelle production/consommation")
     print("=" * 60)
-    scaled_file = DATA_DIR / "solar_production_scaled.csv"
-    metadata_file = DATA_DIR / "metadata.json"
+    scaled_file = STAGING_DIR / "solar_production_scaled.csv"
+    metadata_file = STAGING_DIR / "metadata.json"
     
     try:
         metadata = scale_production_to_consumption(
@@ -84,12 +132,14 @@ def main():
         metadata['latitude'] = latitude
         metadata['longitude'] = longitude
         metadata['year'] = year
+        metadata['consumption_source'] = args.consumption
+        metadata['clouds'] = args.clouds
         
         with open(metadata_file, 'w', encoding='utf-8') as f:
             json.dump(metadata, f, indent=2, ensure_ascii=False)
         
-        print(f"✅ Production mise à l'échelle: {scaled_file}")
-        print(f"✅ Métadonnées: {metadata_file}")
+        print(f"✅ Production mise à l'échelle: {scaled_file.name}")
+        print(f"✅ Métadonnées: {metadata_file.name}")
         print(f"\n📊 Facteur d'échelle appliqué: {metadata['scale_factor']:.2f}")
         print(f"📊 Cumul journalier moyen production: {metadata['avg_daily_production_kwh']:.2f} kWh")
         print(f"📊 Cumul journalier moyen consommation: {metadata['avg_daily_consumption_kwh']:.2f} kWh")
@@ -98,6 +148,23 @@ def main():
         print(f"❌ Erreur: {e}")
         sys.exit(1)
     
+    # Publication atomique (les dashboards en cours rechargent en arrière-plan)
+    publish_outputs()
+    
+    # Étape 4: Export statique pour le front web
+    print("\n" + "=" * 60)
+    print("ÉTAPE 4/4: Export des fragments journaliers pour le front web")
+    print("=" * 60)
+    try:
+        dataset = load_dataset(DATA_DIR / "solar_production_scaled.csv", DATA_DIR / "consumption.csv",
+                               name=f"{latitude}N-{longitude}E-{year}")
+        manifest = export_static(dataset, STATIC_DIR, battery=True)
+        print(f"✅ {len(manifest['days'])} jours et {len(manifest['months'])} mois exportés "
+              f"({manifest['bytes'] / 1024:.0f} Ko): {STATIC_DIR}")
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+        sys.exit(1)
+    
     print("\n" + "=" * 60)
     print("✅ RÉCUPÉRATION TERMINÉE AVEC SUCCÈS")
     print("=" * 60)
@@ -106,6 +173,7 @@ def main():
     print("   - consumption.csv")
     print("   - solar_production_scaled.csv")
     print("   - metadata.json")
+    print(f"   + fragments web (manifest.json, days/, months/) dans: {STATIC_DIR}")
     print("\n🚀 Vous pouvez maintenant lancer l'application web!\n")
 
 if __name__ == "__main__":
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Module d'ingestion au fil de l'eau de nouvelles mesures
+Les points reçus (fichiers CSV déposés dans data/inbox/, ou envoyés au
+point d'accès POST /api/ingest de api_server.py qui les dépose au même
+endroit) sont ajoutés au magasin colonne sans réécrire l'existant : un
+fichier Parquet par lot. Les agrégats (pyramide, dont les totaux
+journaliers), l'index des jours similaires et l'état de charge des
+batteries suivies sont mis à jour à partir des seuls nouveaux points.
+
+Format d'un fichier déposé (pas de 15 ou 30 min, heure locale avec
+décalage ; sans décalage, l'heure doublée d'octobre doit figurer deux fois):
+    timestamp,production_kw,consumption_kw
+    2025-01-01 00:00:00+01:00,0.0,412.5
+
+Le magasin et l'état des batteries sont repérés en epochs UTC (timebase.py).
+
+Exemples:
+    python ingest.py --init           # amorce data/live/ avec les CSV de data/
+    python ingest.py --watch          # ingère data/inbox/*.csv en continu
+"""
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from battery import INITIAL_SOC, final_soc, simulate_battery_batch
+from dataset import DATA_DIR, Dataset, load_default_dataset
+from pyramid import Pyramid
+from similar_days import DayIndex
+from timebase import LOCAL_TZ, parse_timestamps, to_epoch, to_local
+
+try:
+    import pyarrow  # noqa: F401  (moteur de pd.read_parquet / to_parquet)
+    PART_FORMAT = 'parquet'
+except ImportError:
+    PART_FORMAT = 'csv'
+
+# Chemins
+STORE_DIR = DATA_DIR / "live"
+INBOX_DIR = DATA_DIR / "inbox"
+STATE_FILE = "state.json"
+
+# Capacités dont l'état de charge est suivi en continu (kWh)
+CAPACITIES = (0, 100, 250, 500, 1000)
+
+# Intervalle de scrutation de la boîte de réception (secondes)
+POLL_INTERVAL = 2.0
+
+# Colonnes d'un lot de mesures
+COLUMNS = ('timestamp', 'production_kw', 'consumption_kw')
+
+
+def read_points(path):
+    """
+    Lit un fichier de mesures déposé
+
+    Returns:
+        tuple: (epochs UTC int64 ns, production, consommation), triés
+    """
+    df = pd.read_csv(path)
+    missing = [c for c in COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"{path}: colonnes manquantes: {', '.join(missing)}")
+    epochs = parse_timestamps(df['timestamp'])[0]
+    order = np.argsort(epochs, kind='stable')
+    return (epochs[order], df['production_kw'].to_numpy(dtype=float)[order],
+            df['consumption_kw'].to_numpy(dtype=float)[order])
+
+
+def to_time_step(epochs, production, consumption, time_step_hours):
+    """
+    Ramène des points au pas du jeu de données
+
+    Les valeurs sont des puissances moyennes : un point à 30 min devient
+    deux points à 15 min de même valeur. Le pas source est déduit de
+    l'écart minimal entre points (pas du jeu de données pour un point seul).
+    """
+    timestamps = np.asarray(epochs, dtype=np.int64).view('datetime64[ns]')
+    step = np.timedelta64(int(round(time_step_hours * 3600)), 's')
+    if len(timestamps) < 2:
+        return epochs, production, consumption
+    source = np.diff(timestamps).min()
+    ratio, remainder = divmod(source, step)
+    if remainder or ratio < 1:
+        raise ValueError(f"Pas des mesures ({source}) incompatible avec le pas du jeu de données ({step})")
+    if ratio == 1:
+        return epochs, production, consumption
+
+    ratio = int(ratio)
+    offsets = np.arange(ratio) * step
+    return ((timestamps[:, np.newaxis] + offsets).ravel().view(np.int64),
+            np.repeat(production, ratio), np.repeat(consumption, ratio))
+
+
+class SeriesStore:
+    """Magasin colonne en ajout seul : un fichier (Parquet) par lot ingéré"""
+
+    def __init__(self, directory=STORE_DIR):
+        self.directory = Path(directory)
+
+    def parts(self):
+        return sorted(self.directory.glob('part-*.*'))
+
+    def append(self, epochs, production, consumption):
+        """Écrit un nouveau lot (atomique : fichier temporaire puis renommage)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        parts = self.parts()
+        number = int(parts[-1].name.split('.')[0].split('-')[1]) + 1 if parts else 0
+        path = self.directory / f"part-{number:06d}.{PART_FORMAT}"
+        tmp_path = path.with_name(path.name + '.tmp')
+        # Horodatages avec fuseau : décalage écrit en CSV, instant UTC en Parquet
+        timestamps = pd.DatetimeIndex(np.asarray(epochs, dtype=np.int64).view('datetime64[ns]'),
+                                      tz='UTC').tz_convert(LOCAL_TZ)
+        frame = pd.DataFrame(dict(zip(COLUMNS, (timestamps, production, consumption))))
+        if PART_FORMAT == 'parquet':
+            frame.to_parquet(tmp_path, index=False)
+        else:
+            frame.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        return path
+
+    def read(self):
+        """Séries complètes (epochs UTC), lots concaténés dans l'ordre d'ingestion"""
+        frames = [pd.read_parquet(p) if p.suffix == '.parquet' else pd.read_csv(p) for p in self.parts()]
+        if not frames:
+            return np.array([], dtype=np.int64), np.array([]), np.array([])
+        epochs = np.concatenate([to_epoch(f['timestamp']) for f in frames])
+        frame = pd.concat(frames, ignore_index=True)
+        return (epochs, frame['production_kw'].to_numpy(dtype=float), frame['consumption_kw'].to_numpy(dtype=float))
+
+
+class LiveDataset:
+    """
+    Jeu de données alimenté au fil de l'eau
+
+    Attributs:
+        dataset: Séries complètes (Dataset)
+        pyramid: Agrégats année / mois / jour / heure (Pyramid)
+        day_index: Index des jours similaires (DayIndex)
+        capacities: Capacités suivies (kWh)
+        soc: État de charge courant par capacité (fraction)
+        totals: Soutirage / injection cumulés par capacité (kWh)
+    """
+
+    def __init__(self, store, capacities=CAPACITIES):
+        self.store = store
+        epochs, production, consumption = store.read()
+        if len(epochs) == 0:
+            raise ValueError(f"Magasin vide: {store.directory} (amorcer avec --init)")
+        timestamps = to_local(epochs)
+        self.dataset = Dataset(store.directory.name, timestamps, production, consumption, epochs=epochs)
+        self.pyramid = Pyramid(timestamps, production, consumption, self.dataset.time_step_hours, epochs)
+        self.day_index = DayIndex(timestamps, production, consumption)
+        self.capacities = np.asarray(capacities, dtype=float)
+
+        state = self._read_state()
+        if (state is not None and state.get('last_epoch') == int(epochs[-1])
+                and state['capacities'] == self.capacities.tolist()):
+            self.soc = np.array(state['soc'])
+            self.totals = {k: np.array(v) for k, v in state['totals'].items()}
+        else:
+            # État absent ou périmé : une simulation complète, une seule fois
+            self.soc = np.full(len(self.capacities), INITIAL_SOC)
+            self.totals = {'import_kwh': np.zeros(len(self.capacities)),
+                           'export_kwh': np.zeros(len(self.capacities))}
+            self._simulate(production, consumption)
+            self._write_state()
+
+    @property
+    def state_path(self):
+        return self.store.directory / STATE_FILE
+
+    def _read_state(self):
+        if not self.state_path.exists():
+            return None
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_state(self):
+        state = {
+            'last_epoch': int(self.dataset.epochs[-1]),
+            'capacities': self.capacities.tolist(),
+            'soc': self.soc.tolist(),
+            'totals': {k: v.tolist() for k, v in self.totals.items()},
+        }
+        tmp_path = self.state_path.with_name(STATE_FILE + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _simulate(self, production, consumption):
+        """Prolonge la simulation des capacités suivies depuis l'état courant"""
+        dt = self.dataset.time_step_hours
+        battery_power, battery_soc, network = simulate_battery_batch(
+            production, consumption, self.capacities, dt, initial_soc=self.soc)
+        self.soc = final_soc(self.capacities, battery_power, battery_soc, dt)
+        self.totals['import_kwh'] += np.maximum(-network, 0).sum(axis=1) * dt
+        self.totals['export_kwh'] += np.maximum(network, 0).sum(axis=1) * dt
+
+    def append(self, epochs, production, consumption):
+        """
+        Ajoute des mesures ; les points déjà ingérés sont ignorés
+
+        Args:
+            epochs: Instants UTC (int64, ns), triés
+            production: Production (kW)
+            consumption: Consommation (kW)
+
+        Returns:
+            int: Nombre de points ajoutés (au pas du jeu de données)
+        """
+        dataset = self.dataset
+        epochs, production, consumption = to_time_step(
+            np.asarray(epochs, dtype=np.int64), np.asarray(production, dtype=float),
+            np.asarray(consumption, dtype=float), dataset.time_step_hours)
+        new = epochs > dataset.epochs[-1]
+        if not new.any():
+            return 0
+        epochs, production, consumption = epochs[new], production[new], consumption[new]
+        timestamps = to_local(epochs)
+
+        self.store.append(epochs, production, consumption)
+        self.pyramid.append(timestamps, production, consumption, epochs)
+        self.dataset = Dataset(dataset.name, np.concatenate([dataset.timestamps, timestamps]),
+                               np.concatenate([dataset.production, production]),
+                               np.concatenate([dataset.consumption, consumption]), dataset.time_step_hours,
+                               np.concatenate([dataset.epochs, epochs]))
+
+        # Index : jours touchés par le lot, depuis le début du premier d'entre eux
+        first = np.searchsorted(self.dataset.timestamps, timestamps[0].astype('datetime64[D]'))
+        self.day_index.extend(self.dataset.timestamps[first:], self.dataset.production[first:],
+                              self.dataset.consumption[first:])
+
+        self._simulate(production, consumption)
+        self._write_state()
+        return len(timestamps)
+
+
+def ingest_inbox(live, inbox=INBOX_DIR):
+    """
+    Ingère les fichiers CSV présents dans la boîte de réception
+
+    Les fichiers traités sont déplacés dans done/, ceux en erreur dans
+    errors/. Les déposants écrivent sous un autre nom puis renomment en
+    .csv : un fichier partiel n'est jamais lu.
+
+    Returns:
+        int: Nombre de points ajoutés
+    """
+    inbox = Path(inbox)
+    added = 0
+    for path in sorted(inbox.glob('*.csv')):
+        start = time.perf_counter()
+        try:
+            count = live.append(*read_points(path))
+        except (ValueError, KeyError, pd.errors.ParserError) as e:
+            print(f"❌ {path.name}: {e}")
+            target = inbox / "errors"
+        else:
+            added += count
+            socs = ', '.join(f"{c:.0f} kWh {s * 100:.0f} %" for c, s in zip(live.capacities, live.soc) if c > 0)
+            print(f"📥 {path.name}: {count} points ajoutés en {(time.perf_counter() - start) * 1000:.0f} ms "
+                  f"(jusqu'au {live.dataset.timestamps[-1].astype('datetime64[m]')}, SOC: {socs})")
+            target = inbox / "done"
+        target.mkdir(exist_ok=True)
+        os.replace(path, target / path.name)
+    return added
+
+
+def main(argv=None):
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Ingestion au fil de l'eau de nouvelles mesures")
+    parser.add_argument('--store', default=str(STORE_DIR), help="Magasin colonne (défaut: data/live)")
+    parser.add_argument('--inbox', default=str(INBOX_DIR), help="Boîte de réception (défaut: data/inbox)")
+    parser.add_argument('--init', action='store_true', help="Amorce le magasin avec les CSV de --data-dir")
+    parser.add_argument('--data-dir', default=str(DATA_DIR), help="Répertoire des CSV pour --init")
+    parser.add_argument('--watch', action='store_true', help="Scrute la boîte de réception en continu")
+    args = parser.parse_args(argv)
+
+    store = SeriesStore(args.store)
+    if args.init:
+        if store.parts():
+            parser.error(f"Magasin déjà amorcé: {store.directory}")
+        dataset = load_default_dataset(Path(args.data_dir))
+        store.append(dataset.epochs, dataset.production, dataset.consumption)
+        print(f"✅ Magasin amorcé avec {len(dataset)} points: {store.directory}")
+
+    start = time.perf_counter()
+    live = LiveDataset(store)
+    print(f"📦 {len(live.dataset)} points chargés en {time.perf_counter() - start:.2f} s "
+          f"({len(store.parts())} lots)")
+    Path(args.inbox).mkdir(parents=True, exist_ok=True)
+
+    ingest_inbox(live, args.inbox)
+    while args.watch:
+        time.sleep(POLL_INTERVAL)
+        ingest_inbox(live, args.inbox)
+
+
+if __name__ == "__main__":
+    main()
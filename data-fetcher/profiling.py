@@ -0,0 +1,193 @@
+"""
+Module d'instrumentation légère des dashboards
+Mesure la durée des étapes d'une exécution (chargement, filtrage du jour,
+simulation, statistiques, graphiques, SVG), compte les succès de cache et
+exporte les métriques en JSON (log structuré) ou au format texte Prometheus.
+
+Variables d'environnement:
+    MOONLIGHT_PROFILE_STARTUP: si "1", affiche le profil de démarrage
+        (imports, chargement des données, premier affichage)
+    MOONLIGHT_METRICS_FILE: fichier texte Prometheus réécrit à chaque exécution
+        (à lire par le collecteur "textfile" de node_exporter, par exemple)
+    MOONLIGHT_TIMING_LOG: fichier de log JSON (une ligne par exécution)
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger("moonlight.timing")
+
+
+class RunTimings:
+    """Durées des étapes d'une exécution (un rerun Streamlit, une mise à jour NiceGUI)"""
+
+    def __init__(self, app_name):
+        self.app_name = app_name
+        self.spans = {}
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def span(self, name):
+        """Mesure le bloc et cumule sa durée sous `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans[name] = self.spans.get(name, 0.0) + time.perf_counter() - start
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.started
+
+
+class MetricsRegistry:
+    """Agrégats des exécutions du processus (partagés entre sessions)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._span_sum = {}
+        self._span_count = {}
+        self._span_last = {}
+        self._cache_calls = {}
+        self._cache_misses = {}
+        self._log_file = None
+
+    def cache_call(self, name):
+        """Appel d'une fonction mise en cache (succès ou échec)"""
+        with self._lock:
+            self._cache_calls[name] = self._cache_calls.get(name, 0) + 1
+
+    def cache_miss(self, name):
+        """À appeler dans le corps de la fonction cachée : exécuté uniquement en cas d'échec"""
+        with self._lock:
+            self._cache_misses[name] = self._cache_misses.get(name, 0) + 1
+
+    def cache_stats(self):
+        """Appels, échecs et taux de succès par cache"""
+        with self._lock:
+            stats = {}
+            for name, calls in self._cache_calls.items():
+                misses = min(self._cache_misses.get(name, 0), calls)
+                stats[name] = {
+                    'calls': calls,
+                    'hits': calls - misses,
+                    'misses': misses,
+                    'hit_rate': (calls - misses) / calls if calls else 0.0,
+                }
+            return stats
+
+    def record(self, timings):
+        """Enregistre une exécution terminée, écrit le log et le fichier de métriques"""
+        spans = dict(timings.spans)
+        spans['total'] = timings.total
+        with self._lock:
+            for name, duration in spans.items():
+                key = (timings.app_name, name)
+                self._span_sum[key] = self._span_sum.get(key, 0.0) + duration
+                self._span_count[key] = self._span_count.get(key, 0) + 1
+                self._span_last[key] = duration
+
+        self._log(timings.app_name, spans)
+        metrics_file = os.environ.get("MOONLIGHT_METRICS_FILE")
+        if metrics_file:
+            self.write_prometheus(metrics_file)
+        return spans
+
+    def _log(self, app_name, spans):
+        log_path = os.environ.get("MOONLIGHT_TIMING_LOG")
+        if log_path and self._log_file != log_path:
+            handler = logging.FileHandler(log_path, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            self._log_file = log_path
+        logger.info(json.dumps({
+            'event': 'run',
+            'app': app_name,
+            'time': time.time(),
+            'spans_ms': {name: round(duration * 1000, 3) for name, duration in spans.items()},
+            'cache': self.cache_stats(),
+        }))
+
+    def to_prometheus(self):
+        """Export au format texte Prometheus"""
+        lines = [
+            "# HELP moonlight_span_seconds Durée des étapes des dashboards",
+            "# TYPE moonlight_span_seconds summary",
+        ]
+        with self._lock:
+            for (app_name, span), total in sorted(self._span_sum.items()):
+                labels = f'app="{app_name}",span="{span}"'
+                lines.append(f"moonlight_span_seconds_sum{{{labels}}} {total:.6f}")
+                lines.append(f"moonlight_span_seconds_count{{{labels}}} {self._span_count[(app_name, span)]}")
+            lines.append("# HELP moonlight_span_last_seconds Durée de l'étape lors de la dernière exécution")
+            lines.append("# TYPE moonlight_span_last_seconds gauge")
+            for (app_name, span), last in sorted(self._span_last.items()):
+                lines.append(f'moonlight_span_last_seconds{{app="{app_name}",span="{span}"}} {last:.6f}')
+
+        lines.append("# HELP moonlight_cache_requests_total Appels aux fonctions mises en cache")
+        lines.append("# TYPE moonlight_cache_requests_total counter")
+        for name, stats in sorted(self.cache_stats().items()):
+            lines.append(f'moonlight_cache_requests_total{{cache="{name}",result="hit"}} {stats["hits"]}')
+            lines.append(f'moonlight_cache_requests_total{{cache="{name}",result="miss"}} {stats["misses"]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Écrit l'export Prometheus de façon atomique (fichier temporaire + renommage)"""
+        path = Path(path)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(self.to_prometheus(), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+
+class StartupProfile:
+    """
+    Jalons du démarrage à froid d'un dashboard
+
+    L'origine est l'import de ce module, à faire avant les imports lourds.
+    Chaque jalon n'est enregistré qu'une fois par processus : les reruns
+    Streamlit suivants ne modifient pas le profil.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.marks = {}
+        self.finished = False
+
+    @property
+    def enabled(self):
+        return os.environ.get("MOONLIGHT_PROFILE_STARTUP") == "1"
+
+    def mark(self, label):
+        """Enregistre le temps écoulé depuis l'origine (une seule fois par jalon)"""
+        if label not in self.marks:
+            self.marks[label] = time.perf_counter() - self.origin
+
+    def finish(self, app_name, label="first_paint"):
+        """Clôt le profil au premier affichage, l'enregistre et l'affiche si demandé"""
+        if self.finished:
+            return
+        self.mark(label)
+        self.finished = True
+
+        timings = RunTimings(f"{app_name}_startup")
+        timings.started = self.origin
+        previous = 0.0
+        for name, elapsed in self.marks.items():
+            timings.spans[name] = elapsed - previous
+            previous = elapsed
+        METRICS.record(timings)
+
+        if self.enabled:
+            print(f"⏱️  Démarrage {app_name}:")
+            for name, elapsed in self.marks.items():
+                print(f"   {name:<20} +{timings.spans[name] * 1000:8.1f} ms  (cumul {elapsed * 1000:8.1f} ms)")
+
+
+# Registre unique par processus
+METRICS = MetricsRegistry()
+STARTUP = StartupProfile()
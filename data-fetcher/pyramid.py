@@ -0,0 +1,138 @@
+"""
+Module de pyramide d'agrégats temporels
+Agrège la production et la consommation par année, mois, jour et heure
+(énergies, pointes, import / export sans batterie). Chaque niveau est un
+ensemble de tableaux NumPy alignés sur le début des intervalles ; l'ajout
+de nouveaux points ne recalcule que les intervalles concernés.
+"""
+import numpy as np
+import pandas as pd
+
+from timebase import NS_PER_HOUR
+
+# Niveaux de la pyramide (nom -> unité datetime64), du plus grossier au plus fin
+LEVELS = {
+    'year': 'Y',
+    'month': 'M',
+    'day': 'D',
+    'hour': 'h',
+}
+
+# Agrégats additifs et agrégats maximum
+SUM_FIELDS = ('production_kwh', 'consumption_kwh', 'import_kwh', 'export_kwh', 'count')
+MAX_FIELDS = ('production_max_kw', 'consumption_max_kw')
+
+
+def aggregate(timestamps, production, consumption, unit, time_step_hours, epochs=None):
+    """
+    Agrège une série triée par intervalle de l'unité donnée
+
+    Args:
+        timestamps: Horodatages triés (datetime64[ns])
+        production: Production (kW)
+        consumption: Consommation (kW)
+        unit: Unité datetime64 de l'intervalle ('Y', 'M', 'D', 'h')
+        time_step_hours: Pas de temps en heures
+        epochs: Instants UTC (int64, ns) ; séparent les deux occurrences de
+            l'heure doublée d'octobre au niveau horaire
+
+    Returns:
+        dict: 'start' (début des intervalles) et un tableau par agrégat
+    """
+    timestamps = np.asarray(timestamps, dtype='datetime64[ns]')
+    production = np.asarray(production, dtype=float)
+    consumption = np.asarray(consumption, dtype=float)
+    if len(timestamps) == 0:
+        return {'start': np.array([], dtype='datetime64[ns]'),
+                **{name: np.array([]) for name in SUM_FIELDS + MAX_FIELDS}}
+
+    keys = timestamps.astype(f'datetime64[{unit}]')
+    changes = keys[1:] != keys[:-1]
+    if epochs is not None and unit == 'h':
+        hours = np.asarray(epochs, dtype=np.int64) // NS_PER_HOUR
+        changes |= hours[1:] != hours[:-1]
+    starts = np.flatnonzero(np.r_[True, changes])
+    net = production - consumption
+    return {
+        'start': keys[starts].astype('datetime64[ns]'),
+        'production_kwh': np.add.reduceat(production, starts) * time_step_hours,
+        'consumption_kwh': np.add.reduceat(consumption, starts) * time_step_hours,
+        'import_kwh': np.add.reduceat(np.maximum(-net, 0), starts) * time_step_hours,
+        'export_kwh': np.add.reduceat(np.maximum(net, 0), starts) * time_step_hours,
+        'count': np.diff(np.r_[starts, len(keys)]).astype(float),
+        'production_max_kw': np.maximum.reduceat(production, starts),
+        'consumption_max_kw': np.maximum.reduceat(consumption, starts),
+    }
+
+
+class Pyramid:
+    """
+    Agrégats année / mois / jour / heure d'un jeu de données
+
+    Attributs:
+        levels: Niveau -> dict de tableaux (voir aggregate)
+        time_step_hours: Pas de temps en heures
+        last_timestamp: Dernier horodatage agrégé
+        last_epoch: Instant UTC du dernier point agrégé (None si inconnu)
+    """
+
+    def __init__(self, timestamps, production, consumption, time_step_hours, epochs=None):
+        self.time_step_hours = time_step_hours
+        self.levels = {name: aggregate(timestamps, production, consumption, unit, time_step_hours, epochs)
+                       for name, unit in LEVELS.items()}
+        self.last_timestamp = np.datetime64(timestamps[-1], 'ns') if len(timestamps) else None
+        self.last_epoch = int(epochs[-1]) if epochs is not None and len(epochs) else None
+
+    def append(self, timestamps, production, consumption, epochs=None):
+        """
+        Ajoute des points postérieurs au dernier horodatage agrégé
+
+        Seuls les nouveaux points sont agrégés ; le dernier intervalle
+        existant est complété si les nouveaux points y tombent. Avec les
+        epochs UTC, la seconde occurrence de l'heure doublée d'octobre (mêmes
+        heures locales) est acceptée et forme une heure distincte.
+        """
+        timestamps = np.asarray(timestamps, dtype='datetime64[ns]')
+        if len(timestamps) == 0:
+            return
+        if epochs is not None and self.last_epoch is not None:
+            epochs = np.asarray(epochs, dtype=np.int64)
+            if epochs[0] <= self.last_epoch:
+                raise ValueError(f"Points antérieurs au dernier horodatage agrégé ({self.last_timestamp})")
+            same_hour = epochs[0] // NS_PER_HOUR == self.last_epoch // NS_PER_HOUR
+        elif self.last_timestamp is not None and timestamps[0] <= self.last_timestamp:
+            raise ValueError(f"Points antérieurs au dernier horodatage agrégé ({self.last_timestamp})")
+        else:
+            same_hour = True
+
+        for name, unit in LEVELS.items():
+            level = self.levels[name]
+            new = aggregate(timestamps, production, consumption, unit, self.time_step_hours, epochs)
+            merge = len(level['start']) > 0 and new['start'][0] == level['start'][-1] and (unit != 'h' or same_hour)
+            for field in SUM_FIELDS + MAX_FIELDS:
+                values = new[field]
+                if merge:
+                    combine = np.add if field in SUM_FIELDS else np.maximum
+                    level[field][-1] = combine(level[field][-1], values[0])
+                    values = values[1:]
+                level[field] = np.concatenate([level[field], values])
+            level['start'] = np.concatenate([level['start'], new['start'][1:] if merge else new['start']])
+        self.last_timestamp = timestamps[-1]
+        if epochs is not None:
+            self.last_epoch = int(epochs[-1])
+
+    def level(self, name, start=None, end=None):
+        """
+        Agrégats d'un niveau, éventuellement restreints à [start, end[
+
+        Returns:
+            pd.DataFrame: Une ligne par intervalle
+        """
+        if name not in LEVELS:
+            raise ValueError(f"Niveau inconnu: {name} (disponibles: {', '.join(LEVELS)})")
+        frame = pd.DataFrame(self.levels[name])
+        if start is not None:
+            frame = frame[frame['start'] >= pd.Timestamp(start)]
+        if end is not None:
+            frame = frame[frame['start'] < pd.Timestamp(end)]
+        return frame.reset_index(drop=True)
@@ -0,0 +1,190 @@
+"""
+Module de rejeu « en direct » d'une série à vitesse accélérée
+Un flux de rejeu avance dans la série au rythme de N× le temps réel et
+fait réagir la batterie échantillon par échantillon (BatteryStepper). Les
+échantillons dus sont regroupés à chaque tic d'horloge en un message,
+sérialisé une seule fois et diffusé à tous les abonnés du même flux :
+le coût par client se limite à l'envoi.
+"""
+import asyncio
+import json
+
+import numpy as np
+
+from battery import INITIAL_SOC, BatteryStepper
+
+# Période d'émission des messages (secondes)
+TICK_SECONDS = 0.05
+
+# Messages en attente par abonné (les plus anciens sont abandonnés au-delà)
+QUEUE_SIZE = 64
+
+# Décimales conservées sur les valeurs diffusées
+DECIMALS = 3
+
+
+class ReplayMessage:
+    """Lot d'échantillons diffusé aux abonnés (texte JSON calculé une fois)"""
+
+    def __init__(self, data):
+        self.data = data
+        self._text = None
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = json.dumps(self.data, separators=(',', ':'))
+        return self._text
+
+
+class ReplayStream:
+    """
+    Rejeu d'une série à partir d'un indice, à `speed` fois le temps réel
+
+    Args:
+        timestamps: Horodatages (datetime64[ns])
+        production: Production (kW)
+        consumption: Consommation (kW)
+        capacity: Capacité de la batterie (kWh)
+        speed: Facteur d'accélération (3600 : une heure de données par seconde)
+        start: Indice du premier échantillon
+        time_step_hours: Pas de temps en heures
+        grid_floor: Plancher de soutirage (None, scalaire ou par pas)
+        initial_soc: État de charge au départ (fraction)
+    """
+
+    def __init__(self, timestamps, production, consumption, capacity, speed, start=0,
+                 time_step_hours=0.25, grid_floor=None, initial_soc=INITIAL_SOC):
+        self.timestamps = timestamps
+        self.production = np.asarray(production, dtype=float)
+        self.consumption = np.asarray(consumption, dtype=float)
+        self.stepper = BatteryStepper(capacity, time_step_hours, initial_soc=initial_soc)
+        self.speed = speed
+        self.index = int(start)
+        self.start = int(start)
+        self.grid_floor = grid_floor
+        self.sample_seconds = time_step_hours * 3600 / speed
+
+    def advance(self, stop):
+        """Simule les échantillons jusqu'à `stop` (exclu) et renvoie le lot"""
+        start, stop = self.index, min(stop, len(self.production))
+        production = self.production[start:stop].tolist()
+        consumption = self.consumption[start:stop].tolist()
+        if self.grid_floor is None or np.ndim(self.grid_floor) == 0:
+            floors = [self.grid_floor] * len(production)
+        else:
+            floors = self.grid_floor[start:stop].tolist()
+
+        battery_power, battery_soc, network = [], [], []
+        step = self.stepper.step
+        for p, c, f in zip(production, consumption, floors):
+            b, s, n = step(p, c, f)
+            battery_power.append(round(b, DECIMALS))
+            battery_soc.append(round(s, DECIMALS))
+            network.append(round(n, DECIMALS))
+        self.index = stop
+
+        return {
+            'index': start,
+            'timestamp': np.datetime_as_string(self.timestamps[start:stop], unit='s').tolist(),
+            'production': [round(p, DECIMALS) for p in production],
+            'consumption': [round(c, DECIMALS) for c in consumption],
+            'battery_power': battery_power,
+            'battery_soc': battery_soc,
+            'network_power': network,
+        }
+
+    async def run(self, publish, tick_seconds=TICK_SECONDS):
+        """Émet les échantillons dus à chaque tic jusqu'à la fin de la série"""
+        loop = asyncio.get_running_loop()
+        origin = loop.time()
+        while self.index < len(self.production):
+            await asyncio.sleep(tick_seconds)
+            due = self.start + int((loop.time() - origin) / self.sample_seconds) + 1
+            if due > self.index:
+                publish(ReplayMessage(self.advance(due)))
+        publish(ReplayMessage({'done': True, 'index': self.index}))
+
+
+class Subscription:
+    """Abonnement à un flux : itérateur asynchrone de ReplayMessage"""
+
+    def __init__(self, hub, key, queue_size=QUEUE_SIZE):
+        self.hub = hub
+        self.key = key
+        self.queue = asyncio.Queue(queue_size)
+        self.dropped = 0
+
+    def put(self, message):
+        if self.queue.full():
+            # Client trop lent : on abandonne le lot le plus ancien
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        message = await self.queue.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class ReplayHub:
+    """
+    Flux de rejeu partagés entre abonnés
+
+    Un flux est identifié par une clé (version des données, départ,
+    capacité, vitesse...). Il démarre avec son premier abonné et s'arrête
+    quand le dernier se désabonne.
+    """
+
+    def __init__(self, tick_seconds=TICK_SECONDS, queue_size=QUEUE_SIZE):
+        self.tick_seconds = tick_seconds
+        self.queue_size = queue_size
+        self._streams = {}
+
+    def __len__(self):
+        return len(self._streams)
+
+    def subscribe(self, key, factory):
+        """
+        S'abonne au flux `key`, créé par factory() s'il n'existe pas
+
+        Returns:
+            Subscription: À parcourir avec `async for`, puis fermer
+        """
+        subscription = Subscription(self, key, self.queue_size)
+        if key not in self._streams:
+            subscribers = set()
+            task = asyncio.ensure_future(factory().run(lambda message: self._publish(key, message),
+                                                       self.tick_seconds))
+            self._streams[key] = (task, subscribers)
+        self._streams[key][1].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        entry = self._streams.get(subscription.key)
+        if entry is None:
+            return
+        task, subscribers = entry
+        subscribers.discard(subscription)
+        if not subscribers:
+            task.cancel()
+            del self._streams[subscription.key]
+
+    def _publish(self, key, message):
+        task, subscribers = self._streams[key]
+        done = message.data.get('done', False)
+        for subscription in list(subscribers):
+            subscription.put(message)
+            if done:
+                subscription.put(None)
+        if done:
+            # Flux terminé : un nouvel abonné relancera un flux neuf
+            del self._streams[key]
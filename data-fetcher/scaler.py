@@ -5,6 +5,8 @@ pour correspondre à la consommation du quartier
 import pandas as pd
 import numpy as np
 
+from timebase import parse_timestamps
+
 def scale_production_to_consumption(solar_file, consumption_file, output_file):
     """
     Met à l'échelle la production solaire pour que le cumul journalier moyen
@@ -24,13 +26,13 @@ def scale_production_to_consumption(solar_file, consumption_file, output_file):
     df_solar = pd.read_csv(solar_file)
     df_consumption = pd.read_csv(consumption_file)
     
-    # Convertir timestamps
-    df_solar['timestamp'] = pd.to_datetime(df_solar['timestamp'])
-    df_consumption['timestamp'] = pd.to_datetime(df_consumption['timestamp'])
+    # Convertir timestamps (heures locales ; les chaînes d'origine sont conservées en sortie)
+    solar_local = parse_timestamps(df_solar['timestamp'])[1]
+    consumption_local = parse_timestamps(df_consumption['timestamp'])[1]
     
     # Extraire date (sans heure)
-    df_solar['date'] = df_solar['timestamp'].dt.date
-    df_consumption['date'] = df_consumption['timestamp'].dt.date
+    df_solar['date'] = solar_local.astype('datetime64[D]')
+    df_consumption['date'] = consumption_local.astype('datetime64[D]')
     
     # Calculer cumuls journaliers (kWh = kW * 0.25h pour pas de 15 min)
     solar_daily = df_solar.groupby('date')['production_kw'].sum() * 0.25
@@ -63,8 +65,8 @@ def scale_production_to_consumption(solar_file, consumption_file, output_file):
         'avg_daily_consumption_kwh': float(avg_consumption_daily),
         'total_records_solar': int(len(df_solar)),
         'total_records_consumption': int(len(df_consumption)),
-        'date_start': str(df_solar['timestamp'].min()),
-        'date_end': str(df_solar['timestamp'].max())
+        'date_start': str(pd.Timestamp(solar_local.min())),
+        'date_end': str(pd.Timestamp(solar_local.max()))
     }
     
     print(f"✅ Production mise à l'échelle sauvegardée")
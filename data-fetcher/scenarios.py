@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Moteur de scénarios Monte-Carlo (météo et aléas de consommation)
+Génère K années stochastiques à partir des profils de base de solar_data et
+consumption_data, simule la batterie sur chacune et résume les indicateurs
+en quantiles P10 / P50 / P90.
+
+Chaque scénario dispose de ses propres flux aléatoires indépendants (nuages,
+pics d'appareils, chauffage), dérivés d'une SeedSequence : le scénario i
+donne le même tirage quel que soit le découpage en lots ou le nombre de
+processus. La génération et la simulation sont vectorisées par lot de
+scénarios ; les lots sont répartis sur un pool de processus.
+
+Exemple:
+    python scenarios.py --scenarios 1000 --capacities 0,100,200,400 --tariff tempo
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from battery import STRATEGIES, battery_kpis, simulate_battery_batch, strategy_grid_floor
+from clouds import CloudModel
+from consumption_data import consumption_profile_components
+from dataset import DATA_DIR
+from solar_data import solar_base_profile
+from tariff import TARIFS, day_codes, get_tariff
+from timebase import year_grid
+
+# Nuages (modèle 'simple') : facteur journalier ~ Beta(a, b) ramené à une
+# moyenne de 1, bruit intra-journalier identique au générateur synthétique
+# Le modèle 'markov' (clouds.CloudModel) est utilisé par défaut
+CLOUD_DAY_ALPHA = 4.0
+CLOUD_DAY_BETA = 1.5
+CLOUD_NOISE_STD = 0.15
+CLOUD_NOISE_CLIP = (0.3, 1.2)
+
+# Consommation : bruit, pics d'appareils électroménagers, plancher
+CONSUMPTION_NOISE_STD = 0.1
+CONSUMPTION_NOISE_CLIP = (0.7, 1.3)
+APPLIANCE_PEAK_PROBABILITY = 0.05
+APPLIANCE_PEAK_FACTOR = 1.5
+CONSUMPTION_FLOOR = 5.0
+
+# Chauffage : anomalie journalière AR(1) (vague de froid / redoux)
+HEATING_AR_PHI = 0.8
+HEATING_AR_STD = 0.15
+HEATING_SCALE_CLIP = (0.3, 2.0)
+
+# Modèles de nébulosité disponibles
+CLOUD_MODELS = ('markov', 'simple')
+
+# Quantiles du résumé
+QUANTILES = (10, 50, 90)
+
+# Contexte partagé par les processus du pool (profils de base, prix...)
+_CONTEXT = {}
+
+
+def build_context(year=2024, num_homes=50, pv_scale=None, tariff_name='hphc',
+                  strategy='self_consumption', capacities=(0.0,), seed=42, clouds='markov'):
+    """
+    Prépare les profils de base et les paramètres communs à tous les scénarios
+
+    Args:
+        year: Année simulée
+        num_homes: Nombre de foyers du quartier
+        pv_scale: Facteur de la production ; None = production annuelle de ciel clair
+            égale à la consommation (comme scaler.py)
+        tariff_name: Tarif ('base', 'hphc', 'tempo')
+        strategy: Stratégie de pilotage de la batterie
+        capacities: Capacités simulées (kWh)
+        seed: Graine racine de la SeedSequence
+        clouds: Modèle de nébulosité ('markov' ou 'simple')
+
+    Returns:
+        dict: Contexte sérialisable transmis aux processus
+    """
+    timestamps = year_grid(year).tz_localize(None)
+    solar = solar_base_profile(timestamps)
+    parts = consumption_profile_components(timestamps, num_homes)
+    mean_consumption = parts['load'] * (1 + parts['heating'] + parts['cooling']) * parts['weekend']
+    if pv_scale is None:
+        pv_scale = mean_consumption.sum() / solar.sum()
+
+    tariff = get_tariff(tariff_name)
+    codes = tariff.period_codes(timestamps, mean_consumption)
+    days, _ = day_codes(timestamps)
+
+    return {
+        'timestamps': timestamps.to_numpy(),
+        'solar': solar * pv_scale,
+        'parts': parts,
+        'days': days,
+        'n_days': int(days.max()) + 1,
+        'prices': tariff.import_prices[codes],
+        'tariff_name': tariff_name,
+        'feed_in_price': tariff.feed_in_price,
+        'strategy': strategy,
+        'capacities': np.asarray(capacities, dtype=float),
+        'seed': seed,
+        'cloud_model': CloudModel() if clouds == 'markov' else None,
+        'time_step_hours': 0.25,
+    }
+
+
+def scenario_streams(seed, index):
+    """Générateurs indépendants (nuages, appareils, chauffage) du scénario `index`"""
+    sequence = np.random.SeedSequence(seed, spawn_key=(index,))
+    return [np.random.default_rng(child) for child in sequence.spawn(3)]
+
+
+def generate_scenarios(context, indices):
+    """
+    Génère un lot de scénarios
+
+    Args:
+        context: Contexte (build_context)
+        indices: Numéros des scénarios
+
+    Returns:
+        tuple: (production, consumption), shape (B, T) en kW
+    """
+    solar = context['solar']
+    parts = context['parts']
+    days = context['days']
+    n_days = context['n_days']
+    n_steps = len(solar)
+    batch = len(indices)
+
+    day_factor = np.empty((batch, n_days))
+    cloud_noise = np.empty((batch, n_steps))
+    consumption_noise = np.empty((batch, n_steps))
+    peaks = np.empty((batch, n_steps), dtype=bool)
+    heating_shocks = np.empty((batch, n_days))
+    cloud_model = context['cloud_model']
+    cloud_rngs = []
+    for row, index in enumerate(indices):
+        cloud_rng, appliance_rng, heating_rng = scenario_streams(context['seed'], index)
+        cloud_rngs.append(cloud_rng)
+        if cloud_model is None:
+            day_factor[row] = cloud_rng.beta(CLOUD_DAY_ALPHA, CLOUD_DAY_BETA, n_days)
+            cloud_noise[row] = cloud_rng.normal(1, CLOUD_NOISE_STD, n_steps)
+        consumption_noise[row] = appliance_rng.normal(1, CONSUMPTION_NOISE_STD, n_steps)
+        peaks[row] = appliance_rng.random(n_steps) < APPLIANCE_PEAK_PROBABILITY
+        heating_shocks[row] = heating_rng.normal(0, HEATING_AR_STD, n_days)
+
+    # Production : profil de ciel clair × indice de clarté
+    if cloud_model is not None:
+        production = solar * cloud_model.sample(context['timestamps'], rng=cloud_rngs)
+    else:
+        day_factor *= (CLOUD_DAY_ALPHA + CLOUD_DAY_BETA) / CLOUD_DAY_ALPHA
+        np.clip(cloud_noise, *CLOUD_NOISE_CLIP, out=cloud_noise)
+        production = solar * day_factor[:, days] * cloud_noise
+
+    # Chauffage : anomalie AR(1) jour par jour, vectorisée sur le lot
+    anomaly = np.empty((batch, n_days))
+    anomaly[:, 0] = heating_shocks[:, 0]
+    for day in range(1, n_days):
+        anomaly[:, day] = HEATING_AR_PHI * anomaly[:, day - 1] + heating_shocks[:, day]
+    heating_scale = np.clip(1 + anomaly, *HEATING_SCALE_CLIP)[:, days]
+
+    seasonal_factor = 1 + parts['heating'] * heating_scale + parts['cooling']
+    consumption = parts['load'] * seasonal_factor * parts['weekend']
+    np.clip(consumption_noise, *CONSUMPTION_NOISE_CLIP, out=consumption_noise)
+    consumption *= consumption_noise
+    consumption[peaks] *= APPLIANCE_PEAK_FACTOR
+    np.maximum(consumption, CONSUMPTION_FLOOR, out=consumption)
+    return production, consumption
+
+
+def simulate_scenarios(context, indices):
+    """
+    Génère et simule un lot de scénarios pour toutes les capacités
+
+    Returns:
+        dict: Indicateurs {nom: array (B, C)}
+    """
+    production, consumption = generate_scenarios(context, indices)
+    capacities = context['capacities']
+    dt = context['time_step_hours']
+    batch, n_capacities = len(indices), len(capacities)
+
+    # Une ligne par couple (scénario, capacité)
+    floor = None
+    if context['strategy'] != 'self_consumption':
+        tariff = get_tariff(context['tariff_name'])
+        floor = np.stack([
+            np.broadcast_to(strategy_grid_floor(context['strategy'], context['timestamps'],
+                                                production[row], consumption[row], tariff),
+                            production.shape[1:])
+            for row in range(batch)
+        ])
+        floor = np.repeat(floor, n_capacities, axis=0)
+    production = np.repeat(production, n_capacities, axis=0)
+    consumption = np.repeat(consumption, n_capacities, axis=0)
+    battery_power, _, network = simulate_battery_batch(
+        production, consumption, np.tile(capacities, batch), dt, grid_floor=floor
+    )
+
+    kpis = battery_kpis(production, consumption, battery_power, network, dt)
+    import_cost = (np.maximum(-network, 0) * dt) @ context['prices']
+    kpis['net_cost'] = import_cost - kpis['export_kwh'] * context['feed_in_price']
+    return {name: values.reshape(batch, n_capacities) for name, values in kpis.items()}
+
+
+def _init_worker(context):
+    """Initialisation d'un processus du pool"""
+    _CONTEXT.update(context)
+
+
+def _run_batch(indices):
+    return simulate_scenarios(_CONTEXT, indices)
+
+
+def run_scenarios(context, n_scenarios, workers=None, batch_size=16):
+    """
+    Simule K scénarios, en parallèle par lots
+
+    Returns:
+        dict: Indicateurs {nom: array (K, C)}, dans l'ordre des scénarios
+    """
+    batches = [list(range(i, min(i + batch_size, n_scenarios)))
+               for i in range(0, n_scenarios, batch_size)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = [simulate_scenarios(context, batch) for batch in batches]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(context,)) as pool:
+            results = list(pool.map(_run_batch, batches))
+    return {name: np.concatenate([r[name] for r in results]) for name in results[0]}
+
+
+def summarize(results, capacities, quantiles=QUANTILES):
+    """
+    Quantiles des indicateurs sur les scénarios
+
+    Returns:
+        pd.DataFrame: Une ligne par (capacité, indicateur), colonnes p10, p50, p90, mean
+    """
+    rows = []
+    for name, values in results.items():
+        percentiles = np.percentile(values, quantiles, axis=0)
+        means = values.mean(axis=0)
+        for column, capacity in enumerate(capacities):
+            row = {'capacity_kwh': capacity, 'kpi': name}
+            for q, p in zip(quantiles, percentiles[:, column]):
+                row[f"p{q}"] = p
+            row['mean'] = means[column]
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Scénarios Monte-Carlo météo / consommation")
+    parser.add_argument('--scenarios', type=int, default=100, help="Nombre d'années simulées (défaut: 100)")
+    parser.add_argument('--capacities', default='0,50,100,200,400', help="Capacités en kWh (défaut: 0,50,100,200,400)")
+    parser.add_argument('--strategy', default='self_consumption', choices=list(STRATEGIES))
+    parser.add_argument('--tariff', default='hphc', choices=list(TARIFS))
+    parser.add_argument('--year', type=int, default=2024)
+    parser.add_argument('--num-homes', type=int, default=50)
+    parser.add_argument('--pv-scale', type=float, help="Facteur de production (défaut: production = consommation)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--clouds', default='markov', choices=list(CLOUD_MODELS),
+                        help="Modèle de nébulosité (défaut: markov)")
+    parser.add_argument('--workers', type=int, help="Nombre de processus (défaut: nombre de cœurs)")
+    parser.add_argument('--batch-size', type=int, default=16, help="Scénarios par lot (défaut: 16)")
+    parser.add_argument('--output', default=str(DATA_DIR / "scenarios_summary.csv"))
+    args = parser.parse_args(argv)
+
+    capacities = [float(v) for v in args.capacities.split(',')]
+    context = build_context(args.year, args.num_homes, args.pv_scale, args.tariff,
+                            args.strategy, capacities, args.seed, args.clouds)
+
+    print(f"🎲 {args.scenarios} scénarios × {len(capacities)} capacités ({STRATEGIES[args.strategy]}, {args.tariff})")
+    start = time.perf_counter()
+    results = run_scenarios(context, args.scenarios, args.workers, args.batch_size)
+    print(f"✅ Simulation terminée en {time.perf_counter() - start:.1f} s")
+
+    summary = summarize(results, capacities)
+    summary.to_csv(args.output, index=False)
+
+    for kpi in ('self_sufficiency_pct', 'net_cost', 'peak_import_kw'):
+        table = summary[summary['kpi'] == kpi].set_index('capacity_kwh')
+        print(f"\n📊 {kpi}")
+        print(table[[f"p{q}" for q in QUANTILES]].round(1).to_string())
+    print(f"\n📁 Résumé: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
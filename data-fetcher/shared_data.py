@@ -0,0 +1,146 @@
+"""
+Module de partage des jeux de données entre processus
+Le processus principal charge et aligne les CSV une seule fois, puis publie
+les tableaux (horodatages, production, consommation) dans un segment de
+mémoire partagée ou un fichier mappé en mémoire. Les processus du pool s'y
+attachent sans copie : la mémoire et le temps de démarrage ne croissent
+plus avec le nombre de processus.
+
+Usage:
+    with SharedDataset(dataset) as shared:
+        handle = shared.handle          # petit dict sérialisable (pickle)
+        ...                             # transmis à l'initialiseur du pool
+    dataset = attach_dataset(handle)    # dans le processus du pool
+"""
+import tempfile
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+
+from dataset import Dataset
+
+# Modes de publication
+MODES = ('shm', 'mmap')
+
+# Segments attachés par ce processus (gardés vivants tant que les vues existent)
+_ATTACHED = {}
+
+
+def _layout(length):
+    """Décalages (octets) des trois tableaux dans le bloc : int64, float64, float64"""
+    size = length * 8
+    return {'timestamps': 0, 'production': size, 'consumption': 2 * size}, 3 * size
+
+
+class SharedDataset:
+    """Publication d'un Dataset en mémoire partagée (propriétaire du segment)"""
+
+    def __init__(self, dataset, mode='shm', directory=None):
+        """
+        Args:
+            dataset: Jeu de données aligné (Dataset)
+            mode: 'shm' (multiprocessing.shared_memory) ou 'mmap' (fichier)
+            directory: Répertoire du fichier en mode 'mmap' (temporaire si None)
+        """
+        if mode not in MODES:
+            raise ValueError(f"Mode de partage inconnu: {mode} (disponibles: {', '.join(MODES)})")
+        self.mode = mode
+        length = len(dataset)
+        offsets, size = _layout(length)
+        self._shm = None
+        self._path = None
+
+        if mode == 'shm':
+            self._shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+            buffer = self._shm.buf
+            location = self._shm.name
+        else:
+            directory = Path(directory or tempfile.gettempdir())
+            with tempfile.NamedTemporaryFile(prefix='moonlight_', suffix='.bin',
+                                             dir=directory, delete=False) as f:
+                self._path = Path(f.name)
+            buffer = np.memmap(self._path, dtype=np.uint8, mode='w+', shape=(max(size, 1),))
+            location = str(self._path)
+
+        arrays = _views(buffer, offsets, length, readonly=False)
+        arrays['timestamps'][:] = dataset.timestamps.view(np.int64)
+        arrays['production'][:] = dataset.production
+        arrays['consumption'][:] = dataset.consumption
+        del arrays
+        if mode == 'mmap':
+            buffer.flush()
+            del buffer
+
+        self.handle = {
+            'mode': mode,
+            'location': location,
+            'length': length,
+            'name': dataset.name,
+            'time_step_hours': dataset.time_step_hours,
+        }
+
+    def close(self):
+        """Libère le segment (à appeler une fois les processus du pool terminés)"""
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+        if self._path is not None:
+            self._path.unlink(missing_ok=True)
+            self._path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _views(buffer, offsets, length, readonly=True):
+    """Vues NumPy sur le bloc partagé"""
+    arrays = {
+        'timestamps': np.frombuffer(buffer, dtype=np.int64, count=length,
+                                    offset=offsets['timestamps']),
+        'production': np.frombuffer(buffer, dtype=np.float64, count=length,
+                                    offset=offsets['production']),
+        'consumption': np.frombuffer(buffer, dtype=np.float64, count=length,
+                                     offset=offsets['consumption']),
+    }
+    if readonly:
+        for array in arrays.values():
+            array.flags.writeable = False
+    return arrays
+
+
+def attach_dataset(handle):
+    """
+    Reconstruit un Dataset à partir d'un handle publié (sans copie)
+
+    Les tableaux sont en lecture seule ; le segment reste attaché pour la
+    durée de vie du processus.
+
+    Args:
+        handle: Dictionnaire SharedDataset.handle
+
+    Returns:
+        Dataset: Vues sur la mémoire partagée
+    """
+    key = (handle['mode'], handle['location'])
+    if key not in _ATTACHED:
+        if handle['mode'] == 'shm':
+            segment = shared_memory.SharedMemory(name=handle['location'])
+            _ATTACHED[key] = (segment, segment.buf)
+        else:
+            _ATTACHED[key] = (None, np.memmap(handle['location'], dtype=np.uint8, mode='r'))
+    buffer = _ATTACHED[key][1]
+
+    offsets, _ = _layout(handle['length'])
+    arrays = _views(buffer, offsets, handle['length'])
+    return Dataset(
+        handle['name'],
+        arrays['timestamps'].view('datetime64[ns]'),
+        arrays['production'],
+        arrays['consumption'],
+        handle['time_step_hours'],
+    )
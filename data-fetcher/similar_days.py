@@ -0,0 +1,133 @@
+"""
+Module de recherche de jours similaires
+Chaque jour est décrit par ses profils de production et de consommation
+(96 valeurs chacun au pas de 15 min). Les vecteurs sont réduits par ACP
+(décomposition SVD) ; la recherche des k plus proches voisins se fait par
+force brute NumPy dans l'espace réduit, en quelques millisecondes pour
+plusieurs années de données.
+"""
+import numpy as np
+import pandas as pd
+
+# Nombre de composantes principales conservées
+N_COMPONENTS = 8
+
+
+def daily_matrix(timestamps, values):
+    """
+    Range une série en matrice jours × créneaux
+
+    Args:
+        timestamps: Horodatages (pas régulier)
+        values: Valeurs de la série
+
+    Returns:
+        tuple: (dates uniques, matrice (D, S)) ; NaN pour les créneaux absents
+    """
+    index = pd.DatetimeIndex(timestamps)
+    codes, days = pd.factorize(index.normalize(), sort=True)
+    step_minutes = (index[1] - index[0]).total_seconds() / 60 if len(index) > 1 else 15
+    steps = int(round(24 * 60 / step_minutes))
+    slots = ((index.hour * 60 + index.minute) // step_minutes).to_numpy().astype(np.intp)
+
+    matrix = np.full((len(days), steps), np.nan)
+    matrix[codes, slots] = np.asarray(values, dtype=float)
+    return days, matrix
+
+
+class DayIndex:
+    """
+    Index des profils journaliers pour la recherche de jours similaires
+
+    Les deux séries sont normalisées par leur écart-type global afin de
+    peser autant l'une que l'autre ; les jours incomplets sont ignorés.
+    """
+
+    def __init__(self, timestamps, production, consumption, n_components=N_COMPONENTS):
+        """
+        Args:
+            timestamps: Horodatages communs aux deux séries
+            production: Production (kW)
+            consumption: Consommation (kW)
+            n_components: Nombre de composantes principales conservées
+        """
+        days, production_matrix = daily_matrix(timestamps, production)
+        _, consumption_matrix = daily_matrix(timestamps, consumption)
+
+        self.scales = (np.nanstd(production_matrix) or 1.0, np.nanstd(consumption_matrix) or 1.0)
+        features = self._features(production_matrix, consumption_matrix)
+        complete = ~np.isnan(features).any(axis=1)
+        features = features[complete]
+
+        self.dates = np.array(days[complete].date)
+        self._positions = {d: i for i, d in enumerate(self.dates)}
+
+        # ACP par SVD sur les profils centrés
+        self.mean = features.mean(axis=0)
+        _, singular_values, components = np.linalg.svd(features - self.mean, full_matrices=False)
+        n_components = min(n_components, len(singular_values))
+        self.components = components[:n_components]
+        variance = singular_values ** 2
+        self.explained_variance_ratio = variance[:n_components] / variance.sum() if variance.sum() else variance[:n_components]
+        self.coordinates = (features - self.mean) @ self.components.T
+
+    def _features(self, production_matrix, consumption_matrix):
+        return np.hstack([production_matrix / self.scales[0], consumption_matrix / self.scales[1]])
+
+    def __len__(self):
+        return len(self.dates)
+
+    def extend(self, timestamps, production, consumption):
+        """
+        Ajoute les jours complets d'une série récente, sans recalculer l'ACP
+
+        Les nouveaux jours sont projetés sur les composantes existantes
+        (mêmes normalisations) ; les jours déjà indexés ou incomplets sont
+        ignorés.
+
+        Returns:
+            int: Nombre de jours ajoutés
+        """
+        if len(timestamps) == 0:
+            return 0
+        days, production_matrix = daily_matrix(timestamps, production)
+        _, consumption_matrix = daily_matrix(timestamps, consumption)
+        if production_matrix.shape[1] * 2 != len(self.mean):
+            raise ValueError("Pas de temps différent de celui de l'index")
+        features = self._features(production_matrix, consumption_matrix)
+        new = ~np.isnan(features).any(axis=1) & np.array([d not in self._positions for d in days.date])
+        if not new.any():
+            return 0
+
+        dates = np.array(days[new].date)
+        self._positions.update({d: len(self.dates) + i for i, d in enumerate(dates)})
+        self.dates = np.concatenate([self.dates, dates])
+        self.coordinates = np.vstack([self.coordinates, (features[new] - self.mean) @ self.components.T])
+        return len(dates)
+
+    def __contains__(self, date):
+        return date in self._positions
+
+    def query(self, date, k=5):
+        """
+        Jours les plus proches d'une date de l'index
+
+        Args:
+            date: Date de référence (datetime.date)
+            k: Nombre de jours renvoyés (la date elle-même est exclue)
+
+        Returns:
+            list: [(date, distance), ...] du plus proche au plus éloigné
+        """
+        if date not in self._positions:
+            return []
+        position = self._positions[date]
+        distances = np.sqrt(((self.coordinates - self.coordinates[position]) ** 2).sum(axis=1))
+        distances[position] = np.inf
+
+        k = min(k, len(distances) - 1)
+        if k <= 0:
+            return []
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest])]
+        return [(self.dates[i], float(distances[i])) for i in nearest]
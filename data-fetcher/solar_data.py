@@ -4,11 +4,12 @@ Utilise PVGIS (Photovoltaic Geographical Information System)
 """
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 import requests
 from pathlib import Path
 
-def fetch_solar_data(latitude, longitude, year, output_file):
+from timebase import format_timestamps, to_epoch, year_grid
+
+def fetch_solar_data(latitude, longitude, year, output_file, cloud_model=None):
     """
     Récupère les données de production solaire via PVGIS
     
@@ -17,6 +18,7 @@ def fetch_solar_data(latitude, longitude, year, output_file):
         longitude: Longitude du lieu
         year: Année de simulation
         output_file: Chemin du fichier CSV de sortie
+        cloud_model: Modèle de nébulosité des données synthétiques de repli
     """
     print(f"🔍 Tentative de récupération via PVGIS...")
     print(f"   Latitude: {latitude}, Longitude: {longitude}")
@@ -51,21 +53,22 @@ def fetch_solar_data(latitude, longitude, year, output_file):
             # Convertir en DataFrame
             df = pd.DataFrame(hourly_data)
             
-            # Créer timestamp
-            df['timestamp'] = pd.to_datetime(
-                df[['year', 'month', 'day', 'hour']].rename(columns={'hour': 'hour'})
-            )
+            # Horodatages PVGIS : heures UTC ('20240101:0010')
+            if 'time' in df.columns:
+                utc = pd.to_datetime(df['time'], format='%Y%m%d:%H%M', utc=True)
+            else:
+                utc = pd.to_datetime(df[['year', 'month', 'day', 'hour']]).dt.tz_localize('UTC')
             
             # Convertir P (W) en kW
-            df['production_kw'] = df['P'] / 1000
-            
-            # Interpoler pour obtenir des données au quart d'heure
-            df = df.set_index('timestamp')
-            df_15min = df[['production_kw']].resample('15min').interpolate(method='linear')
-            df_15min = df_15min.reset_index()
+            production_kw = df['P'].to_numpy(dtype=float) / 1000
             
-            # Formater timestamp
-            df_15min['timestamp'] = df_15min['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
+            # Interpoler sur la grille locale au quart d'heure (celle de la consommation),
+            # en temps UTC : la production reste calée sur le soleil aux changements d'heure
+            grid = year_grid(year)
+            df_15min = pd.DataFrame({
+                'timestamp': format_timestamps(grid),
+                'production_kw': np.interp(to_epoch(grid), to_epoch(utc), production_kw),
+            })
             
             # Sauvegarder
             df_15min.to_csv(output_file, index=False)
@@ -80,54 +83,69 @@ def fetch_solar_data(latitude, longitude, year, output_file):
     except requests.exceptions.RequestException as e:
         print(f"⚠️  Échec PVGIS: {e}")
         print("🔄 Génération de données synthétiques...")
-        generate_synthetic_solar_data(latitude, year, output_file)
+        generate_synthetic_solar_data(latitude, year, output_file, cloud_model)
 
-def generate_synthetic_solar_data(latitude, year, output_file):
+def solar_base_profile(timestamps, base_production=80):
     """
-    Génère des données solaires synthétiques réalistes
+    Profil de production solaire déterministe (ciel clair, sans nuages)
+
+    Args:
+        timestamps: Horodatages (DatetimeIndex, Series ou datetime64)
+        base_production: Production maximale en kW (pour 100 kWc)
+
+    Returns:
+        np.ndarray: Production en kW, nulle la nuit
     """
-    start_date = datetime(year, 1, 1)
-    end_date = datetime(year, 12, 31, 23, 45)
-    
-    # Générer timestamps toutes les 15 minutes
-    timestamps = []
-    current = start_date
-    while current <= end_date:
-        timestamps.append(current)
-        current += timedelta(minutes=15)
-    
-    df = pd.DataFrame({'timestamp': timestamps})
-    df['day_of_year'] = df['timestamp'].dt.dayofyear
-    df['hour'] = df['timestamp'].dt.hour
-    df['minute'] = df['timestamp'].dt.minute
-    df['hour_decimal'] = df['hour'] + df['minute'] / 60
-    
-    # Modèle de production solaire
+    index = pd.DatetimeIndex(timestamps)
+    day_of_year = index.dayofyear.to_numpy()
+    hour_decimal = index.hour.to_numpy() + index.minute.to_numpy() / 60
+
     # Variation saisonnière
-    season_factor = 0.5 + 0.5 * np.cos(2 * np.pi * (df['day_of_year'] - 172) / 365)
-    
+    season_factor = 0.5 + 0.5 * np.cos(2 * np.pi * (day_of_year - 172) / 365)
+
     # Courbe journalière (gaussienne centrée à midi)
-    daily_curve = np.exp(-((df['hour_decimal'] - 12) ** 2) / 18)
+    daily_curve = np.exp(-((hour_decimal - 12) ** 2) / 18)
+
+    production = base_production * season_factor * daily_curve
+
+    # Production nulle la nuit
+    production[(hour_decimal < 6) | (hour_decimal > 20)] = 0
+    return production
+
+
+def generate_synthetic_solar_data(latitude, year, output_file, cloud_model=None):
+    """
+    Génère des données solaires synthétiques réalistes
+
+    Args:
+        latitude: Latitude du lieu
+        year: Année de simulation
+        output_file: Chemin du fichier CSV de sortie
+        cloud_model: Modèle de nébulosité (clouds.CloudModel) ; None = bruit
+            gaussien indépendant par pas de temps
+    """
+    # Générer timestamps toutes les 15 minutes (heure locale, 92 / 100 pas aux changements d'heure)
+    timestamps = year_grid(year)
     
-    # Production de base (kW pour 100 kWc)
-    base_production = 80  # kW max
+    df = pd.DataFrame({'timestamp': timestamps})
     
-    df['production_kw'] = base_production * season_factor * daily_curve
+    # Modèle de production solaire (kW pour 100 kWc)
+    df['production_kw'] = solar_base_profile(df['timestamp'])
     
     # Ajouter variabilité (nuages)
-    np.random.seed(42)
-    noise = np.random.normal(1, 0.15, len(df))
-    noise = np.clip(noise, 0.3, 1.2)
+    if cloud_model is not None:
+        noise = cloud_model.sample(df['timestamp'], seed=42)[0]
+    else:
+        np.random.seed(42)
+        noise = np.random.normal(1, 0.15, len(df))
+        noise = np.clip(noise, 0.3, 1.2)
     df['production_kw'] = df['production_kw'] * noise
     
-    # Production nulle la nuit
-    df.loc[(df['hour_decimal'] < 6) | (df['hour_decimal'] > 20), 'production_kw'] = 0
-    
     # Limiter à 0
     df['production_kw'] = df['production_kw'].clip(lower=0)
     
     # Formater
-    df['timestamp'] = df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    df['timestamp'] = format_timestamps(df['timestamp'])
     df[['timestamp', 'production_kw']].to_csv(output_file, index=False)
     
     print(f"✅ {len(df)} enregistrements synthétiques générés")
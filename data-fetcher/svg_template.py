@@ -0,0 +1,65 @@
+"""
+Module de rendu SVG par gabarit précompilé
+Le squelette statique du diagramme (formes, icônes, styles) est compilé une
+seule fois ; chaque rendu ne fait que substituer les attributs dynamiques.
+Le mode « frames » produit toutes les images d'une journée en une passe.
+"""
+from string import Template
+
+
+class SvgTemplate:
+    """
+    Gabarit SVG compilé
+
+    Le source utilise la syntaxe de string.Template ($nom ou ${nom}).
+    Les champs fournis dans `static` sont substitués à la compilation
+    (icônes, couleurs fixes) ; les autres restent dynamiques.
+    """
+
+    def __init__(self, source, static=None):
+        static = static or {}
+        chunks = []
+        self.fields = []
+        position = 0
+        for match in Template.pattern.finditer(source):
+            literal = source[position:match.start()]
+            position = match.end()
+            name = match.group('named') or match.group('braced')
+            if match.group('escaped') is not None:
+                chunks.append(literal + '$')
+            elif name in static:
+                chunks.append(literal + str(static[name]))
+            elif name is not None:
+                chunks.append(literal)
+                chunks.append(None)
+                self.fields.append(name)
+            else:
+                raise ValueError(f"Champ de gabarit invalide à la position {match.start()}")
+        chunks.append(source[position:])
+
+        # Chaîne de format positionnelle : les accolades du SVG/CSS sont échappées
+        parts = []
+        for chunk in chunks:
+            if chunk is None:
+                parts.append('{}')
+            else:
+                parts.append(chunk.replace('{', '{{').replace('}', '}}'))
+        self._format = ''.join(parts)
+
+    def render(self, **values):
+        """Rendu d'une image à partir des valeurs des champs dynamiques"""
+        return self._format.format(*(values[name] for name in self.fields))
+
+    def render_frames(self, columns):
+        """
+        Rendu de toutes les images en une passe
+
+        Args:
+            columns: {champ: séquence de valeurs déjà formatées}, une valeur par image
+
+        Returns:
+            list: Une chaîne SVG par image
+        """
+        fmt = self._format.format
+        rows = zip(*(columns[name] for name in self.fields))
+        return [fmt(*row) for row in rows]
@@ -0,0 +1,350 @@
+"""
+Module de tarification de l'électricité
+Calcule le coût des soutirages et la valorisation des injections réseau
+(tarif base, heures pleines / heures creuses, Tempo, rachat du surplus)
+
+Tous les calculs sont vectorisés : chaque pas de temps reçoit un code de
+période tarifaire, puis les énergies sont agrégées par période et par jour
+avec np.bincount (aucune boucle Python sur les échantillons).
+"""
+import numpy as np
+import pandas as pd
+
+from battery import simulate_battery_batch
+
+# Tarifs réglementés 2024 (€/kWh TTC)
+PRIX_BASE = 0.2516
+PRIX_HP = 0.2700
+PRIX_HC = 0.2068
+PRIX_TEMPO = {
+    'bleu': {'hc': 0.1296, 'hp': 0.1609},
+    'blanc': {'hc': 0.1486, 'hp': 0.1894},
+    'rouge': {'hc': 0.1568, 'hp': 0.7562},
+}
+# Rachat du surplus (obligation d'achat, installation 9-100 kWc)
+PRIX_RACHAT = 0.0761
+
+# Plages heures creuses par défaut (heures décimales, fin exclue)
+PLAGES_HC = [(22.0, 24.0), (0.0, 6.0)]
+
+# Calendrier Tempo : nombre de jours rouges / blancs par an
+JOURS_ROUGES = 22
+JOURS_BLANCS = 43
+COULEURS_TEMPO = ['bleu', 'blanc', 'rouge']
+
+
+class Tariff:
+    """
+    Tarif d'électricité : prix par période tarifaire et prix de rachat
+
+    Les périodes sont numérotées de 0 à n-1 ; `period_codes` associe
+    chaque horodatage à une période, `import_prices[code]` donne le prix.
+    """
+
+    def __init__(self, name, kind, import_prices, period_names, feed_in_price=PRIX_RACHAT,
+                 hc_ranges=None, tempo_colors=None):
+        """
+        Args:
+            name: Libellé affiché
+            kind: 'base', 'hphc' ou 'tempo'
+            import_prices: Prix de soutirage par période (€/kWh)
+            period_names: Noms des périodes
+            feed_in_price: Prix de rachat de l'injection (€/kWh)
+            hc_ranges: Plages heures creuses [(début, fin), ...] en heures
+            tempo_colors: Couleur par jour {date: 'bleu'|'blanc'|'rouge'}
+                (calendrier estimé à partir de la consommation si absent)
+        """
+        self.name = name
+        self.kind = kind
+        self.import_prices = np.asarray(import_prices, dtype=float)
+        self.period_names = list(period_names)
+        self.feed_in_price = feed_in_price
+        self.hc_ranges = hc_ranges or PLAGES_HC
+        self.tempo_colors = tempo_colors
+
+    def off_peak_mask(self, timestamps):
+        """Masque booléen des pas de temps en heures creuses"""
+        index = pd.DatetimeIndex(timestamps)
+        hours = index.hour.to_numpy() + index.minute.to_numpy() / 60
+        mask = np.zeros(len(hours), dtype=bool)
+        for start, end in self.hc_ranges:
+            mask |= (hours >= start) & (hours < end)
+        return mask
+
+    def period_codes(self, timestamps, consumption=None):
+        """
+        Code de période tarifaire pour chaque horodatage
+
+        Args:
+            timestamps: Horodatages (Series, DatetimeIndex ou datetime64)
+            consumption: Consommation (kW), utilisée pour estimer le
+                calendrier Tempo si aucun n'est fourni
+
+        Returns:
+            np.ndarray: Codes entiers dans [0, len(period_names))
+        """
+        if self.kind == 'base':
+            return np.zeros(len(timestamps), dtype=np.intp)
+
+        is_hp = (~self.off_peak_mask(timestamps)).astype(np.intp)
+        if self.kind == 'hphc':
+            return is_hp
+
+        # Tempo : code = 2 * couleur + (HP ? 1 : 0)
+        colors = tempo_day_colors(timestamps, consumption, self.tempo_colors)
+        return 2 * colors + is_hp
+
+
+def tarif_base(price=PRIX_BASE, feed_in_price=PRIX_RACHAT):
+    """Tarif base (prix unique)"""
+    return Tariff('Base', 'base', [price], ['base'], feed_in_price)
+
+
+def tarif_hphc(hp=PRIX_HP, hc=PRIX_HC, hc_ranges=None, feed_in_price=PRIX_RACHAT):
+    """Tarif heures pleines / heures creuses"""
+    return Tariff('Heures pleines / creuses', 'hphc', [hc, hp], ['hc', 'hp'],
+                  feed_in_price, hc_ranges=hc_ranges)
+
+
+def tarif_tempo(prices=None, tempo_colors=None, hc_ranges=None, feed_in_price=PRIX_RACHAT):
+    """Tarif Tempo (jours bleus / blancs / rouges, HP / HC)"""
+    prices = prices or PRIX_TEMPO
+    import_prices = []
+    period_names = []
+    for color in COULEURS_TEMPO:
+        for period in ('hc', 'hp'):
+            import_prices.append(prices[color][period])
+            period_names.append(f"{color}_{period}")
+    return Tariff('Tempo', 'tempo', import_prices, period_names, feed_in_price,
+                  hc_ranges=hc_ranges, tempo_colors=tempo_colors)
+
+
+TARIFS = {
+    'base': tarif_base,
+    'hphc': tarif_hphc,
+    'tempo': tarif_tempo,
+}
+
+
+def get_tariff(name, **kwargs):
+    """Construit un tarif à partir de son identifiant ('base', 'hphc', 'tempo')"""
+    if name not in TARIFS:
+        raise ValueError(f"Tarif inconnu: {name} (disponibles: {', '.join(TARIFS)})")
+    return TARIFS[name](**kwargs)
+
+
+def day_codes(timestamps):
+    """
+    Numérote les jours d'une série d'horodatages
+
+    Returns:
+        tuple: (codes par pas de temps, dates uniques triées)
+    """
+    days = pd.DatetimeIndex(timestamps).normalize()
+    codes, uniques = pd.factorize(days, sort=True)
+    return codes, uniques
+
+
+def tempo_day_colors(timestamps, consumption=None, tempo_colors=None):
+    """
+    Couleur Tempo (0=bleu, 1=blanc, 2=rouge) pour chaque pas de temps
+
+    Sans calendrier fourni, les jours rouges puis blancs sont attribués aux
+    jours ouvrés d'hiver (novembre-mars, hors dimanche) les plus consommateurs,
+    ce qui reproduit la logique de RTE (jours de forte demande).
+    """
+    codes, days = day_codes(timestamps)
+
+    if tempo_colors is not None:
+        lookup = {pd.Timestamp(d).normalize(): COULEURS_TEMPO.index(c) for d, c in tempo_colors.items()}
+        day_colors = np.array([lookup.get(d, 0) for d in days], dtype=np.intp)
+        return day_colors[codes]
+
+    day_colors = np.zeros(len(days), dtype=np.intp)
+    if consumption is None:
+        return day_colors[codes]
+
+    daily_load = np.bincount(codes, weights=np.asarray(consumption, dtype=float), minlength=len(days))
+    eligible = days.month.isin([11, 12, 1, 2, 3]) & (days.weekday != 6)
+    candidates = np.flatnonzero(eligible)
+    ranked = candidates[np.argsort(-daily_load[candidates], kind='stable')]
+    day_colors[ranked[:JOURS_ROUGES]] = 2
+    day_colors[ranked[JOURS_ROUGES:JOURS_ROUGES + JOURS_BLANCS]] = 1
+    return day_colors[codes]
+
+
+def tempo_calendar(timestamps, consumption):
+    """
+    Calendrier Tempo estimé sur toute la série
+
+    Returns:
+        dict: {date: 'bleu'|'blanc'|'rouge'}
+    """
+    codes, days = day_codes(timestamps)
+    colors = tempo_day_colors(timestamps, consumption)
+    day_colors = np.zeros(len(days), dtype=np.intp)
+    day_colors[codes] = colors
+    return {d.date(): COULEURS_TEMPO[c] for d, c in zip(days, day_colors)}
+
+
+def infer_time_step_hours(timestamps, default=0.25):
+    """Pas de temps (heures) déduit des deux premiers horodatages"""
+    index = pd.DatetimeIndex(timestamps)
+    if len(index) < 2:
+        return default
+    return (index[1] - index[0]).total_seconds() / 3600
+
+
+def grid_energy(network_power, time_step_hours):
+    """
+    Sépare la puissance réseau en énergies soutirée et injectée
+
+    Args:
+        network_power: Puissance réseau (kW), positif = injection
+        time_step_hours: Pas de temps en heures
+
+    Returns:
+        tuple: (énergie soutirée kWh, énergie injectée kWh) par pas de temps
+    """
+    network_power = np.asarray(network_power, dtype=float)
+    imported = np.maximum(-network_power, 0) * time_step_hours
+    exported = np.maximum(network_power, 0) * time_step_hours
+    return imported, exported
+
+
+def price_grid(timestamps, network_power, tariff, time_step_hours=None, consumption=None):
+    """
+    Calcule la facture réseau sur une période quelconque (jour, année...)
+
+    Args:
+        timestamps: Horodatages des pas de temps
+        network_power: Puissance réseau (kW), positif = injection
+        tariff: Tarif (Tariff)
+        time_step_hours: Pas de temps (déduit des horodatages si None)
+        consumption: Consommation (kW) pour le calendrier Tempo estimé
+
+    Returns:
+        dict: Énergies et montants par période et totaux
+    """
+    if time_step_hours is None:
+        time_step_hours = infer_time_step_hours(timestamps)
+
+    imported, exported = grid_energy(network_power, time_step_hours)
+    codes = tariff.period_codes(timestamps, consumption)
+    n_periods = len(tariff.period_names)
+
+    import_kwh = np.bincount(codes, weights=imported, minlength=n_periods)
+    import_cost = import_kwh * tariff.import_prices
+    export_kwh = exported.sum()
+    export_revenue = export_kwh * tariff.feed_in_price
+
+    return {
+        'import_kwh': float(import_kwh.sum()),
+        'export_kwh': float(export_kwh),
+        'import_cost': float(import_cost.sum()),
+        'export_revenue': float(export_revenue),
+        'net_cost': float(import_cost.sum() - export_revenue),
+        'periods': {
+            name: {'kwh': float(kwh), 'cost': float(cost)}
+            for name, kwh, cost in zip(tariff.period_names, import_kwh, import_cost)
+        }
+    }
+
+
+def daily_costs(timestamps, network_power, tariff, time_step_hours=None, consumption=None):
+    """
+    Facture réseau jour par jour sur toute la série (agrégation vectorisée)
+
+    Returns:
+        pd.DataFrame: Une ligne par jour (import_kwh, export_kwh,
+            import_cost, export_revenue, net_cost)
+    """
+    if time_step_hours is None:
+        time_step_hours = infer_time_step_hours(timestamps)
+
+    imported, exported = grid_energy(network_power, time_step_hours)
+    codes = tariff.period_codes(timestamps, consumption)
+    days, unique_days = day_codes(timestamps)
+    n_days = len(unique_days)
+
+    import_cost = imported * tariff.import_prices[codes]
+    export_revenue = exported * tariff.feed_in_price
+
+    result = pd.DataFrame({
+        'import_kwh': np.bincount(days, weights=imported, minlength=n_days),
+        'export_kwh': np.bincount(days, weights=exported, minlength=n_days),
+        'import_cost': np.bincount(days, weights=import_cost, minlength=n_days),
+        'export_revenue': np.bincount(days, weights=export_revenue, minlength=n_days),
+    }, index=pd.Index(unique_days.date, name='date'))
+    result['net_cost'] = result['import_cost'] - result['export_revenue']
+    return result
+
+
+def capacity_sweep_economics(timestamps, production, consumption, capacities, tariff,
+                             battery_cost_per_kwh=400.0, lifetime_years=15,
+                             time_step_hours=None, **battery_kwargs):
+    """
+    Bilan économique annuel pour une gamme de capacités de batterie
+
+    Toutes les capacités sont simulées en une passe (simulate_battery_batch),
+    puis valorisées avec le tarif : facture, économies par rapport à
+    l'absence de batterie, temps de retour simple.
+
+    Args:
+        timestamps: Horodatages de la série complète
+        production: Production (kW)
+        consumption: Consommation (kW)
+        capacities: Capacités à évaluer (kWh)
+        tariff: Tarif (Tariff)
+        battery_cost_per_kwh: Coût d'investissement (€/kWh)
+        lifetime_years: Durée de vie de la batterie (années)
+        time_step_hours: Pas de temps (déduit des horodatages si None)
+        **battery_kwargs: Paramètres transmis à simulate_battery_batch
+
+    Returns:
+        pd.DataFrame: Une ligne par capacité
+    """
+    if time_step_hours is None:
+        time_step_hours = infer_time_step_hours(timestamps)
+
+    capacities = np.asarray(capacities, dtype=float)
+    production = np.asarray(production, dtype=float)
+    consumption = np.asarray(consumption, dtype=float)
+
+    _, _, network = simulate_battery_batch(
+        production, consumption, capacities, time_step_hours, **battery_kwargs
+    )
+
+    # Prix par pas de temps, calculés une seule fois pour toutes les capacités
+    codes = tariff.period_codes(timestamps, consumption)
+    prices = tariff.import_prices[codes]
+
+    imported = np.maximum(-network, 0) * time_step_hours
+    exported = np.maximum(network, 0) * time_step_hours
+    import_cost = imported @ prices
+    export_revenue = exported.sum(axis=1) * tariff.feed_in_price
+    net_cost = import_cost - export_revenue
+
+    # Référence sans batterie
+    reference = price_grid(timestamps, production - consumption, tariff,
+                           time_step_hours, consumption)['net_cost']
+
+    n_years = max(len(timestamps) * time_step_hours / 8760, 1e-9)
+    annual_savings = (reference - net_cost) / n_years
+    investment = capacities * battery_cost_per_kwh
+    with np.errstate(divide='ignore', invalid='ignore'):
+        payback = np.where(annual_savings > 1e-6, investment / annual_savings, np.inf)
+    annualized = investment / lifetime_years
+
+    return pd.DataFrame({
+        'capacity_kwh': capacities,
+        'import_kwh': imported.sum(axis=1),
+        'export_kwh': exported.sum(axis=1),
+        'import_cost': import_cost,
+        'export_revenue': export_revenue,
+        'net_cost': net_cost,
+        'annual_savings': annual_savings,
+        'investment': investment,
+        'payback_years': payback,
+        'annual_gain': annual_savings - annualized,
+    })
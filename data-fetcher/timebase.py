@@ -0,0 +1,213 @@
+"""
+Module de base de temps commune (UTC en interne, heure de Paris à l'affichage)
+Les sources n'ont pas la même convention : PVGIS fournit des heures UTC,
+Enedis des horodates avec décalage. Les générateurs écrivent des heures
+locales avec décalage ('2024-10-27 02:00:00+02:00') sur une grille
+régulière en UTC : au pas de 15 min, la journée du passage à l'heure
+d'été compte 92 pas et celle du passage à l'heure d'hiver 100. Toutes
+les séries sont ramenées à des epochs UTC (int64, ns) : les jointures et
+découpages se font sur des entiers, et l'heure locale n'est reconstituée
+que pour l'affichage.
+
+Les heures locales sans fuseau restent acceptées tant qu'elles sont
+cohérentes avec l'heure légale (heure doublée présente deux fois, dans
+l'ordre) ; une grille de 96 pas par jour toute l'année est rejetée.
+
+Les journées sont découpées aux minuits locaux (table des bornes calculée
+une fois par searchsorted) : le passage à l'heure d'été donne une journée
+de 23 h, celui à l'heure d'hiver une journée de 25 h.
+"""
+import re
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+# Fuseau d'affichage et des horodatages sans fuseau
+LOCAL_TZ = 'Europe/Paris'
+
+NS_PER_MINUTE = 60 * 10 ** 9
+NS_PER_HOUR = 60 * NS_PER_MINUTE
+
+# Décalage UTC des horodatages écrits par format_timestamps
+OFFSET_PATTERN = re.compile(r'[+-]\d\d:\d\d')
+
+
+def _offset_epochs(values):
+    """
+    Epochs de chaînes 'AAAA-MM-JJ HH:MM:SS+HH:MM' (format des CSV), ou None
+
+    Heure locale au format fixe, décalages factorisés : bien plus rapide que
+    l'analyse ISO 8601 générale des décalages mélangés.
+    """
+    strings = pd.Series(values, copy=False)
+    if len(strings) == 0 or not isinstance(strings.iloc[0], str) or len(strings.iloc[0]) != 25:
+        return None
+    codes, suffixes = pd.factorize(strings.str.slice(19))
+    if (codes < 0).any() or not all(OFFSET_PATTERN.fullmatch(suffix) for suffix in suffixes):
+        return None
+    try:
+        wall = pd.to_datetime(strings.str.slice(0, 19), format='%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        return None
+    offsets = np.array([(-1 if suffix[0] == '-' else 1) * (int(suffix[1:3]) * 60 + int(suffix[4:6]))
+                        for suffix in suffixes], dtype=np.int64) * NS_PER_MINUTE
+    return wall.to_numpy(dtype='datetime64[ns]').view(np.int64) - offsets[codes]
+
+
+def to_epoch(values, tz=LOCAL_TZ):
+    """
+    Horodatages -> epochs UTC (ns, int64)
+
+    Les horodatages avec fuseau ou décalage sont convertis exactement.
+    Les horodatages sans fuseau sont des heures locales de `tz`, dans
+    l'ordre chronologique : l'heure doublée du passage à l'heure d'hiver
+    doit apparaître deux fois, l'heure sautée au printemps jamais.
+
+    Args:
+        values: datetime64, DatetimeIndex, Series ou chaînes ISO 8601
+        tz: Fuseau des horodatages sans fuseau
+
+    Returns:
+        np.ndarray: Epochs UTC (int64, ns)
+
+    Raises:
+        ValueError: Heures locales sans fuseau incompatibles avec l'heure légale
+    """
+    if not isinstance(values, pd.DatetimeIndex):
+        epochs = _offset_epochs(values)
+        if epochs is not None:
+            return epochs
+    if isinstance(values, pd.Series):
+        values = pd.DatetimeIndex(values) if isinstance(values.dtype, pd.DatetimeTZDtype) else values.to_numpy()
+    if isinstance(values, pd.DatetimeIndex):
+        index = values
+    else:
+        try:
+            index = pd.DatetimeIndex(values)
+        except ValueError:
+            # Décalages mélangés (+01:00 / +02:00, horodates Enedis)
+            index = pd.DatetimeIndex(pd.to_datetime(values, utc=True, format='ISO8601'))
+    if index.tz is None:
+        try:
+            index = index.tz_localize(tz, ambiguous='infer', nonexistent='raise')
+        except ValueError as error:
+            raise ValueError(f"Heures locales sans fuseau incompatibles avec l'heure légale de {tz} ({error}) : "
+                             "régénérer les données avec fetch_data.py (horodatages avec décalage)") from error
+    return index.tz_convert('UTC').as_unit('ns').asi8
+
+
+def parse_timestamps(values, tz=LOCAL_TZ):
+    """
+    Horodatages -> (epochs UTC, heures locales sans fuseau)
+
+    Les heures locales servent aux regroupements par jour et à l'affichage ;
+    elles se répètent pendant l'heure doublée d'octobre, les jointures se
+    font donc sur les epochs.
+
+    Returns:
+        tuple: (epochs int64 ns, heures locales datetime64[ns])
+    """
+    epochs = to_epoch(values, tz)
+    return epochs, to_local(epochs, tz)
+
+
+def to_local(epochs, tz=LOCAL_TZ):
+    """Epochs UTC (ns) -> heures locales de `tz` sans fuseau (datetime64[ns]), pour l'affichage"""
+    index = pd.DatetimeIndex(np.asarray(epochs, dtype=np.int64).view('datetime64[ns]'), tz='UTC')
+    return index.tz_convert(tz).tz_localize(None).to_numpy(dtype='datetime64[ns]')
+
+
+def year_grid(year, freq='15min', tz=LOCAL_TZ):
+    """
+    Grille d'une année locale, régulière en UTC
+
+    Returns:
+        pd.DatetimeIndex: Horodatages avec fuseau, du 1er janvier 00:00 au
+            31 décembre inclus (23 h et 25 h aux changements d'heure)
+    """
+    return pd.date_range(f"{year}-01-01", f"{year + 1}-01-01", freq=freq, tz=tz, inclusive='left')
+
+
+def format_timestamps(values, tz=LOCAL_TZ):
+    """
+    Horodatages -> chaînes ISO 8601 en heure locale avec décalage
+
+    Format des CSV : '2024-10-27 02:00:00+02:00' puis '2024-10-27 02:00:00+01:00'
+    pendant l'heure doublée, sans ambiguïté à la relecture.
+    """
+    index = pd.DatetimeIndex(to_epoch(values, tz).view('datetime64[ns]'), tz='UTC').tz_convert(tz)
+    offsets = index.strftime('%z')
+    return (index.strftime('%Y-%m-%d %H:%M:%S') + offsets.str[:3] + ':' + offsets.str[3:]).to_numpy()
+
+
+class TimeBase:
+    """
+    Base de temps d'une série : epochs UTC triés et journées locales
+
+    Attributs:
+        epochs: Epochs UTC (int64, ns), strictement croissants
+        tz: Fuseau des journées et de l'affichage
+    """
+
+    def __init__(self, epochs, tz=LOCAL_TZ):
+        self.epochs = np.asarray(epochs, dtype=np.int64)
+        if (np.diff(self.epochs) <= 0).any():
+            raise ValueError("Epochs non strictement croissants (horodatages en double ou non triés)")
+        self.tz = tz
+
+    @classmethod
+    def from_timestamps(cls, values, tz=LOCAL_TZ):
+        """Base de temps d'horodatages quelconques (voir to_epoch)"""
+        return cls(to_epoch(values, tz), tz)
+
+    def __len__(self):
+        return len(self.epochs)
+
+    @cached_property
+    def local(self):
+        """Heures locales sans fuseau (datetime64[ns])"""
+        return to_local(self.epochs, self.tz)
+
+    @cached_property
+    def day_table(self):
+        """
+        Journées locales et leurs bornes
+
+        Returns:
+            tuple: (dates datetime64[D] (D,), débuts des journées (D + 1,),
+                minuits locaux en epochs UTC (D + 1,))
+        """
+        if len(self.epochs) == 0:
+            return np.array([], dtype='datetime64[D]'), np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64)
+        dates = np.unique(self.local.astype('datetime64[D]'))
+        # Minuit existe toujours à Paris : la localisation est sans ambiguïté
+        midnights = to_epoch(np.r_[dates, dates[-1] + np.timedelta64(1, 'D')].astype('datetime64[ns]'), self.tz)
+        bounds = np.searchsorted(self.epochs, midnights)
+        bounds[-1] = len(self.epochs)
+        return dates, bounds, midnights
+
+    @cached_property
+    def _positions(self):
+        return {d: i for i, d in enumerate(self.day_table[0].tolist())}
+
+    @property
+    def dates(self):
+        return self.day_table[0]
+
+    def day_slice(self, date):
+        """Tranche de la série correspondant à une journée locale"""
+        position = self._positions.get(np.datetime64(date, 'D').item())
+        if position is None:
+            raise KeyError(f"Date absente des données: {date}")
+        bounds = self.day_table[1]
+        return slice(int(bounds[position]), int(bounds[position + 1]))
+
+    def day_slices(self):
+        """Journée locale (AAAA-MM-JJ) -> tranche de la série"""
+        dates, bounds, _ = self.day_table
+        return {str(d): slice(int(start), int(stop)) for d, start, stop in zip(dates, bounds[:-1], bounds[1:])}
+
+    def day_hours(self):
+        """Durée de chaque journée locale en heures (23, 24 ou 25)"""
+        return np.diff(self.day_table[2]) / NS_PER_HOUR
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Module de réduction d'une année en jours types
+Regroupe les profils journaliers (production + consommation) par k-means
+(implémenté en NumPy, initialisation k-means++) et retient pour chaque
+groupe le jour réel le plus proche du centre, pondéré par la taille du
+groupe. Les simulations sur les k jours types, pondérées, approchent les
+indicateurs annuels pour une fraction du coût.
+
+Exemple:
+    python typical_days.py --k 12
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from battery import MIN_SOC, battery_kpis, simulate_battery_batch
+from dataset import Dataset, load_default_dataset
+from similar_days import daily_matrix
+
+# Paramètres par défaut
+N_TYPICAL_DAYS = 12
+N_INIT = 4
+MAX_ITER = 100
+
+# Jours de mise en régime avant le jour mesuré (état de charge périodique)
+WARMUP_DAYS = 2
+
+
+def _squared_distances(features, centers):
+    """Distances euclidiennes au carré (n, k)"""
+    distances = ((features ** 2).sum(axis=1)[:, None]
+                 - 2 * features @ centers.T
+                 + (centers ** 2).sum(axis=1)[None, :])
+    return np.maximum(distances, 0)
+
+
+def _kmeans_plus_plus(features, k, rng):
+    """Initialisation k-means++ : centres tirés proportionnellement à D²"""
+    n = len(features)
+    centers = np.empty((k, features.shape[1]))
+    centers[0] = features[rng.integers(n)]
+    closest = ((features - centers[0]) ** 2).sum(axis=1)
+    for j in range(1, k):
+        total = closest.sum()
+        index = rng.choice(n, p=closest / total) if total > 0 else rng.integers(n)
+        centers[j] = features[index]
+        np.minimum(closest, ((features - centers[j]) ** 2).sum(axis=1), out=closest)
+    return centers
+
+
+def kmeans(features, k, seed=0, n_init=N_INIT, max_iter=MAX_ITER, tol=1e-8):
+    """
+    K-means (algorithme de Lloyd) avec initialisation k-means++
+
+    Args:
+        features: Observations, shape (n, f)
+        k: Nombre de groupes
+        seed: Graine du générateur
+        n_init: Nombre d'initialisations (la meilleure inertie est gardée)
+        max_iter: Nombre maximum d'itérations par initialisation
+        tol: Seuil de déplacement des centres pour l'arrêt
+
+    Returns:
+        tuple: (labels (n,), centres (k, f), inertie)
+    """
+    features = np.asarray(features, dtype=float)
+    k = min(k, len(features))
+    rng = np.random.default_rng(seed)
+    best = None
+    for _ in range(n_init):
+        centers = _kmeans_plus_plus(features, k, rng)
+        for _ in range(max_iter):
+            labels = _squared_distances(features, centers).argmin(axis=1)
+            counts = np.bincount(labels, minlength=k)
+            sums = np.zeros_like(centers)
+            np.add.at(sums, labels, features)
+            # Un groupe vide conserve son centre précédent
+            new_centers = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centers)
+            shift = ((new_centers - centers) ** 2).sum()
+            centers = new_centers
+            if shift <= tol:
+                break
+        distances = _squared_distances(features, centers)
+        labels = distances.argmin(axis=1)
+        inertia = distances[np.arange(len(features)), labels].sum()
+        if best is None or inertia < best[2]:
+            best = (labels, centers, inertia)
+    return best
+
+
+class TypicalDays:
+    """
+    Jours types d'un jeu de données
+
+    Attributs:
+        dates: Dates des jours types (ordre chronologique)
+        weights: Nombre de jours représentés par chaque jour type
+        labels: Groupe de chaque jour complet de l'année (hors changements d'heure)
+        dataset: Dataset réduit (jours types concaténés)
+        step_weights: Poids de chaque pas de temps du Dataset réduit
+        step_mask: Pas de temps du jeu complet retenus dans le Dataset réduit
+        steps_per_day: Nombre de pas de temps par jour
+    """
+
+    def __init__(self, dataset, k=N_TYPICAL_DAYS, seed=0):
+        """
+        Args:
+            dataset: Jeu de données complet (Dataset)
+            k: Nombre de jours types
+            seed: Graine du k-means
+        """
+        days, production_matrix = daily_matrix(dataset.timestamps, dataset.production)
+        _, consumption_matrix = daily_matrix(dataset.timestamps, dataset.consumption)
+        features = np.hstack([
+            production_matrix / (np.nanstd(production_matrix) or 1.0),
+            consumption_matrix / (np.nanstd(consumption_matrix) or 1.0),
+        ])
+        # Jours de 23 h / 25 h (changement d'heure) exclus : les jours types sont
+        # simulés en matrice jours × créneaux ; leur poids est réparti sur les autres
+        day_of_step = pd.DatetimeIndex(dataset.timestamps).normalize()
+        day_lengths = day_of_step.value_counts().reindex(days, fill_value=0).to_numpy()
+        whole = day_lengths == np.round(dataset.timebase.day_hours() / dataset.time_step_hours)
+        complete = np.flatnonzero(whole & (day_lengths == production_matrix.shape[1])
+                                  & ~np.isnan(features).any(axis=1))
+        features = features[complete]
+
+        labels, centers, self.inertia = kmeans(features, k, seed)
+        distances = _squared_distances(features, centers)
+
+        # Médoïde : jour réel le plus proche du centre de chaque groupe non vide
+        counts = np.bincount(labels, minlength=len(centers))
+        members = []
+        for group in np.flatnonzero(counts):
+            candidates = np.flatnonzero(labels == group)
+            members.append((candidates[distances[candidates, group].argmin()], counts[group]))
+        members.sort()
+
+        self.labels = labels
+        self.steps_per_day = production_matrix.shape[1]
+        self.dates = np.array([days[complete[i]].date() for i, _ in members])
+        self.weights = np.array([float(w) for _, w in members]) * whole.sum() / len(complete)
+
+        # Jeu de données réduit, pas de temps pondérés par leur jour type
+        selected = pd.DatetimeIndex([days[complete[i]] for i, _ in members])
+        mask = day_of_step.isin(selected)
+        self.step_mask = mask
+        self.dataset = Dataset(dataset.name, dataset.timestamps[mask], dataset.production[mask],
+                               dataset.consumption[mask], dataset.time_step_hours, dataset.epochs[mask])
+        weight_by_day = pd.Series(self.weights, index=selected)
+        self.step_weights = weight_by_day.reindex(day_of_step[mask]).to_numpy()
+
+    def __len__(self):
+        return len(self.dates)
+
+
+def simulate_typical_days(typical, capacities, warmup_days=WARMUP_DAYS, grid_floor=None,
+                          pv_scale=1.0, **battery_kwargs):
+    """
+    Simule la batterie sur chaque jour type en régime périodique
+
+    Chaque jour type est répété `warmup_days` fois avant le jour mesuré, en
+    partant d'une batterie vide : l'énergie initiale n'est pas comptée comme
+    une production gratuite et l'état de charge du jour mesuré est proche du
+    régime périodique. Tous les couples (jour type, capacité) sont simulés
+    en une passe.
+
+    Args:
+        typical: Jours types (TypicalDays)
+        capacities: Capacités (kWh), shape (C,)
+        warmup_days: Nombre de répétitions de mise en régime
+        grid_floor: Plancher de soutirage (None, scalaire ou par pas du Dataset réduit)
+        pv_scale: Facteur multiplicatif de la production
+        **battery_kwargs: Paramètres transmis à simulate_battery_batch
+
+    Returns:
+        tuple: (battery_power, battery_soc, network_power), shape (C, T réduit)
+    """
+    capacities = np.atleast_1d(np.asarray(capacities, dtype=float))
+    n_days, steps = len(typical), typical.steps_per_day
+    n_capacities = len(capacities)
+    repeats = warmup_days + 1
+
+    def rows(values):
+        # (k, S) -> (k × C, (warmup + 1) × S), ligne = (jour type, capacité)
+        days = np.tile(np.asarray(values, dtype=float).reshape(n_days, steps), (1, repeats))
+        return np.repeat(days, n_capacities, axis=0)
+
+    data = typical.dataset
+    battery_kwargs.setdefault('initial_soc', battery_kwargs.get('min_soc', MIN_SOC))
+    if grid_floor is not None and np.ndim(grid_floor) > 0:
+        grid_floor = rows(grid_floor)
+    battery_power, battery_soc, network = simulate_battery_batch(
+        rows(data.production * pv_scale), rows(data.consumption), np.tile(capacities, n_days),
+        data.time_step_hours, grid_floor=grid_floor, **battery_kwargs
+    )
+
+    def measured(values):
+        # Dernière répétition, remise en (C, k × S) dans l'ordre du Dataset réduit
+        last = values[:, -steps:].reshape(n_days, n_capacities, steps)
+        return last.transpose(1, 0, 2).reshape(n_capacities, n_days * steps)
+
+    return measured(battery_power), measured(battery_soc), measured(network)
+
+
+def compare_kpis(dataset, typical, capacities, **battery_kwargs):
+    """
+    Écart des indicateurs annuels entre l'année complète et les jours types
+
+    Returns:
+        pd.DataFrame: Une ligne par (capacité, indicateur) : complet, jours types, écart %
+    """
+    dt = dataset.time_step_hours
+    battery_power, _, network = simulate_battery_batch(
+        dataset.production, dataset.consumption, capacities, dt, **battery_kwargs
+    )
+    results = {'full': battery_kpis(dataset.production, dataset.consumption,
+                                    battery_power, network, dt)}
+
+    data = typical.dataset
+    battery_power, _, network = simulate_typical_days(typical, capacities, **battery_kwargs)
+    results['typical'] = battery_kpis(data.production, data.consumption, battery_power, network,
+                                      dt, step_weights=typical.step_weights)
+
+    rows = []
+    for kpi, full in results['full'].items():
+        for capacity, reference, approx in zip(capacities, full, results['typical'][kpi]):
+            error = (approx - reference) / reference * 100 if reference else 0.0
+            rows.append({'capacity_kwh': capacity, 'kpi': kpi, 'full': reference,
+                         'typical': approx, 'error_pct': error})
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Réduction de l'année en jours types (k-means)")
+    parser.add_argument('--k', type=int, default=N_TYPICAL_DAYS, help="Nombre de jours types (défaut: 12)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--capacities', default='0,100,250,500,1000', help="Capacités de validation (kWh)")
+    args = parser.parse_args(argv)
+
+    dataset = load_default_dataset()
+    start = time.perf_counter()
+    typical = TypicalDays(dataset, args.k, args.seed)
+    print(f"📅 {len(typical)} jours types en {(time.perf_counter() - start) * 1000:.0f} ms")
+    for date, weight in zip(typical.dates, typical.weights):
+        print(f"   {date.strftime('%d/%m/%Y')}  × {weight:.0f}")
+
+    capacities = np.array([float(v) for v in args.capacities.split(',')])
+    comparison = compare_kpis(dataset, typical, capacities)
+    table = comparison.pivot(index='capacity_kwh', columns='kpi', values='error_pct')
+    print("\n📊 Écart jours types / année complète (%)")
+    print(table[['import_kwh', 'export_kwh', 'self_sufficiency_pct', 'discharge_kwh']].round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
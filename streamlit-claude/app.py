@@ -1,11 +1,23 @@
 
+import sys
+from pathlib import Path
+
+# Modules partagés du pipeline de données (tarifs, simulation batterie, instrumentation)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "data-fetcher"))
+from profiling import METRICS, STARTUP, RunTimings
+
 import streamlit as st
+STARTUP.mark('import_streamlit')
 import pandas as pd
-import plotly.graph_objects as go
-from pathlib import Path
-from datetime import datetime
 import numpy as np
-import base64
+from tariff import TARIFS, get_tariff, price_grid, tempo_calendar, capacity_sweep_economics
+from svg_template import SvgTemplate
+from similar_days import DayIndex
+from dataset_store import DatasetStore
+from continuous import SocCheckpoints
+from dataset import default_files
+from timebase import parse_timestamps
+STARTUP.mark('imports')
 
 # ========================================
 # CONFIGURATION
@@ -99,58 +111,63 @@ st.markdown("""
 # FONCTIONS UTILITAIRES
 # ========================================
 
+ICONS_DIR = Path(__file__).resolve().parent / "assets" / "icons"
+ICON_NAMES = ["solar-panel", "battery", "house", "grid"]
+
+# Icônes par défaut si les fichiers n'existent pas
+DEFAULT_ICONS = {
+    "solar-panel": """
+        <svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
+            <rect x="3" y="3" width="18" height="18" rx="2" ry="2"/>
+            <line x1="3" y1="9" x2="21" y2="9"/>
+            <line x1="3" y1="15" x2="21" y2="15"/>
+            <line x1="9" y1="3" x2="9" y2="21"/>
+            <line x1="15" y1="3" x2="15" y2="21"/>
+        </svg>
+    """,
+    "battery": """
+        <svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
+            <rect x="1" y="6" width="18" height="12" rx="2" ry="2"/>
+            <line x1="23" y1="10" x2="23" y2="14"/>
+            <line x1="5" y1="10" x2="13" y2="10"/>
+        </svg>
+    """,
+    "house": """
+        <svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
+            <path d="M3 12l2-2m0 0l7-7 7 7M5 10v10a1 1 0 001 1h3m10-11l2 2m-2-2v10a1 1 0 01-1 1h-3m-6 0a1 1 0 001-1v-4a1 1 0 011-1h2a1 1 0 011 1v4a1 1 0 001 1m-6 0h6"/>
+        </svg>
+    """,
+    "grid": """
+        <svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
+            <polyline points="13 2 3 14 12 14 11 22 21 10 12 10 13 2"/>
+        </svg>
+    """
+}
+
+
+@st.cache_resource
+def load_svg_icons():
+    """Charge les icônes SVG une seule fois par processus"""
+    icons = {}
+    for icon_name in ICON_NAMES:
+        icon_path = ICONS_DIR / f"{icon_name}.svg"
+        if icon_path.exists():
+            icons[icon_name] = icon_path.read_text(encoding="utf-8")
+        else:
+            icons[icon_name] = DEFAULT_ICONS[icon_name]
+    return icons
+
+
 def get_svg_icon(icon_name):
-    """Charge une icône SVG et la convertit en base64"""
-    icon_path = Path("assets/icons") / f"{icon_name}.svg"
-    
-    if icon_path.exists():
-        with open(icon_path, "r", encoding="utf-8") as f:
-            svg_content = f.read()
-        return svg_content
-    else:
-        # Retourne une icône par défaut si le fichier n'existe pas
-        default_icons = {
-            "solar-panel": """
-                <svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
-                    <rect x="3" y="3" width="18" height="18" rx="2" ry="2"/>
-                    <line x1="3" y1="9" x2="21" y2="9"/>
-                    <line x1="3" y1="15" x2="21" y2="15"/>
-                    <line x1="9" y1="3" x2="9" y2="21"/>
-                    <line x1="15" y1="3" x2="15" y2="21"/>
-                </svg>
-            """,
-            "battery": """
-                <svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
-                    <rect x="1" y="6" width="18" height="12" rx="2" ry="2"/>
-                    <line x1="23" y1="10" x2="23" y2="14"/>
-                    <line x1="5" y1="10" x2="13" y2="10"/>
-                </svg>
-            """,
-            "house": """
-                <svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
-                    <path d="M3 12l2-2m0 0l7-7 7 7M5 10v10a1 1 0 001 1h3m10-11l2 2m-2-2v10a1 1 0 01-1 1h-3m-6 0a1 1 0 001-1v-4a1 1 0 011-1h2a1 1 0 011 1v4a1 1 0 001 1m-6 0h6"/>
-                </svg>
-            """,
-            "grid": """
-                <svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
-                    <polyline points="13 2 3 14 12 14 11 22 21 10 12 10 13 2"/>
-                </svg>
-            """
-        }
-        return default_icons.get(icon_name, "<svg></svg>")
+    """Retourne une icône SVG préchargée"""
+    return load_svg_icons().get(icon_name, "<svg></svg>")
 
 
-def create_energy_flow_diagram(production_current, consumption_current, battery_power_current, network_current):
-    """Crée un diagramme de flux d'énergie en SVG"""
-    
-    # Déterminer les flux actifs
-    solar_to_house = production_current > 0 and consumption_current > 0
-    solar_to_battery = battery_power_current < 0  # Charge
-    battery_to_house = battery_power_current > 0  # Décharge
-    house_to_grid = network_current > 0  # Injection
-    grid_to_house = network_current < 0  # Soutirage
-    
-    svg_content = f"""
+# Préchargement des icônes dès l'import (premier affichage)
+load_svg_icons()
+
+
+FLOW_DIAGRAM_SOURCE = """
     <svg viewBox="0 0 600 400" xmlns="http://www.w3.org/2000/svg" style="width: 100%; height: 400px;">
         <defs>
             <marker id="arrowhead" markerWidth="10" markerHeight="10" refX="9" refY="3" orient="auto">
@@ -164,27 +181,27 @@ def create_energy_flow_diagram(production_current, consumption_current, battery_
         <!-- Connections (fils) -->
         <!-- Solaire -> Maison -->
         <path d="M 150 80 L 150 120 L 300 120 L 300 180" 
-              class="flow-arrow {'flow-active' if solar_to_house else 'flow-inactive'}"
+              class="flow-arrow $cls_solar_house"
               stroke-dasharray="10,5"/>
         
         <!-- Solaire -> Batterie -->
         <path d="M 150 80 L 150 200 L 200 200" 
-              class="flow-arrow {'flow-charge' if solar_to_battery else 'flow-inactive'}"
+              class="flow-arrow $cls_solar_battery"
               stroke-dasharray="10,5"/>
         
         <!-- Batterie -> Maison -->
         <path d="M 280 200 L 300 200" 
-              class="flow-arrow {'flow-discharge' if battery_to_house else 'flow-inactive'}"
+              class="flow-arrow $cls_battery_house"
               stroke-dasharray="10,5"/>
         
         <!-- Maison -> Réseau (injection) -->
         <path d="M 350 200 L 450 200 L 450 140" 
-              class="flow-arrow {'flow-inject' if house_to_grid else 'flow-inactive'}"
+              class="flow-arrow $cls_house_grid"
               stroke-dasharray="10,5"/>
         
         <!-- Réseau -> Maison (soutirage) -->
         <path d="M 450 100 L 450 60 L 300 60 L 300 180" 
-              class="flow-arrow {'flow-draw' if grid_to_house else 'flow-inactive'}"
+              class="flow-arrow $cls_grid_house"
               stroke-dasharray="10,5"/>
         
         <!-- Icônes et valeurs -->
@@ -194,12 +211,12 @@ def create_energy_flow_diagram(production_current, consumption_current, battery_
             <rect width="100" height="60" fill="#0f172a" rx="8" stroke="#334155" stroke-width="2"/>
             <foreignObject x="20" y="5" width="60" height="50">
                 <div xmlns="http://www.w3.org/1999/xhtml" style="color: #3b82f6; width: 60px; height: 50px;">
-                    {get_svg_icon('solar-panel')}
+                    $icon_solar
                 </div>
             </foreignObject>
         </g>
         <text x="150" y="100" text-anchor="middle" fill="#3b82f6" font-size="18" font-weight="bold">
-            {production_current:.1f} kW
+            $production kW
         </text>
         <text x="150" y="115" text-anchor="middle" fill="#94a3b8" font-size="12">Production</text>
         
@@ -208,15 +225,15 @@ def create_energy_flow_diagram(production_current, consumption_current, battery_
             <rect width="80" height="60" fill="#0f172a" rx="8" stroke="#334155" stroke-width="2"/>
             <foreignObject x="10" y="5" width="60" height="50">
                 <div xmlns="http://www.w3.org/1999/xhtml" style="color: #8b5cf6; width: 60px; height: 50px;">
-                    {get_svg_icon('battery')}
+                    $icon_battery
                 </div>
             </foreignObject>
         </g>
         <text x="240" y="250" text-anchor="middle" fill="#8b5cf6" font-size="18" font-weight="bold">
-            {abs(battery_power_current):.1f} kW
+            $battery kW
         </text>
         <text x="240" y="265" text-anchor="middle" fill="#94a3b8" font-size="12">
-            {'Charge' if battery_power_current < 0 else 'Décharge' if battery_power_current > 0 else 'Repos'}
+            $battery_label
         </text>
         
         <!-- Maison (au centre) -->
@@ -224,12 +241,12 @@ def create_energy_flow_diagram(production_current, consumption_current, battery_
             <rect width="100" height="80" fill="#0f172a" rx="8" stroke="#334155" stroke-width="2"/>
             <foreignObject x="20" y="10" width="60" height="60">
                 <div xmlns="http://www.w3.org/1999/xhtml" style="color: #10b981; width: 60px; height: 60px;">
-                    {get_svg_icon('house')}
+                    $icon_house
                 </div>
             </foreignObject>
         </g>
         <text x="300" y="280" text-anchor="middle" fill="#10b981" font-size="18" font-weight="bold">
-            {consumption_current:.1f} kW
+            $consumption kW
         </text>
         <text x="300" y="295" text-anchor="middle" fill="#94a3b8" font-size="12">Consommation</text>
         
@@ -238,47 +255,244 @@ def create_energy_flow_diagram(production_current, consumption_current, battery_
             <rect width="100" height="60" fill="#0f172a" rx="8" stroke="#334155" stroke-width="2"/>
             <foreignObject x="20" y="5" width="60" height="50">
                 <div xmlns="http://www.w3.org/1999/xhtml" 
-                     style="color: {'#10b981' if network_current > 0 else '#ef4444' if network_current < 0 else '#94a3b8'}; width: 60px; height: 50px;">
-                    {get_svg_icon('grid')}
+                     style="color: $grid_color; width: 60px; height: 50px;">
+                    $icon_grid
                 </div>
             </foreignObject>
         </g>
         <text x="450" y="160" text-anchor="middle" 
-              fill="{'#10b981' if network_current > 0 else '#ef4444' if network_current < 0 else '#94a3b8'}" 
+              fill="$grid_color" 
               font-size="18" font-weight="bold">
-            {abs(network_current):.1f} kW
+            $network kW
         </text>
         <text x="450" y="175" text-anchor="middle" fill="#94a3b8" font-size="12">
-            {'Injection' if network_current > 0 else 'Soutirage' if network_current < 0 else 'Équilibre'}
+            $network_label
         </text>
     </svg>
     """
+
+
+@st.cache_resource
+def load_flow_template():
+    """Compile le squelette SVG du diagramme (icônes incluses) une seule fois par processus"""
+    return SvgTemplate(FLOW_DIAGRAM_SOURCE, static={
+        'icon_solar': get_svg_icon('solar-panel'),
+        'icon_battery': get_svg_icon('battery'),
+        'icon_house': get_svg_icon('house'),
+        'icon_grid': get_svg_icon('grid'),
+    })
+
+
+def flow_frame_values(production, consumption, battery_power, network):
+    """Valeurs formatées des champs dynamiques du diagramme, pour chaque pas de temps"""
+    production = np.asarray(production, dtype=float)
+    consumption = np.asarray(consumption, dtype=float)
+    battery_power = np.asarray(battery_power, dtype=float)
+    network = np.asarray(network, dtype=float)
     
-    return svg_content
+    return {
+        'cls_solar_house': np.where((production > 0) & (consumption > 0), 'flow-active', 'flow-inactive'),
+        'cls_solar_battery': np.where(battery_power < 0, 'flow-charge', 'flow-inactive'),
+        'cls_battery_house': np.where(battery_power > 0, 'flow-discharge', 'flow-inactive'),
+        'cls_house_grid': np.where(network > 0, 'flow-inject', 'flow-inactive'),
+        'cls_grid_house': np.where(network < 0, 'flow-draw', 'flow-inactive'),
+        'production': [f"{v:.1f}" for v in production.tolist()],
+        'battery': [f"{abs(v):.1f}" for v in battery_power.tolist()],
+        'battery_label': np.select([battery_power < 0, battery_power > 0], ['Charge', 'Décharge'], 'Repos'),
+        'consumption': [f"{v:.1f}" for v in consumption.tolist()],
+        'grid_color': np.select([network > 0, network < 0], ['#10b981', '#ef4444'], '#94a3b8'),
+        'network': [f"{abs(v):.1f}" for v in network.tolist()],
+        'network_label': np.select([network > 0, network < 0], ['Injection', 'Soutirage'], 'Équilibre'),
+    }
+
+
+def create_energy_flow_frames(production, consumption, battery_power, network):
+    """Crée les diagrammes SVG de toute la journée en une passe (un par pas de temps)"""
+    values = flow_frame_values(production, consumption, battery_power, network)
+    return load_flow_template().render_frames(values)
+
+
+def create_energy_flow_diagram(production_current, consumption_current, battery_power_current, network_current):
+    """Crée un diagramme de flux d'énergie en SVG"""
+    return create_energy_flow_frames(
+        [production_current], [consumption_current], [battery_power_current], [network_current]
+    )[0]
+
+
+# Libellés HH:MM indexés par minute de la journée (bien plus rapide que dt.strftime)
+TIME_LABELS = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60)])
+
+# Fichiers publiés par fetch_data.py dans data/ à la racine du dépôt (indépendant du cwd)
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DATA_FILES = default_files(DATA_DIR)
 
 
-@st.cache_data
 def load_csv_data():
-    """Charge et prépare les données CSV"""
-    data_path = Path("data")
-    
-    production_df = pd.read_csv(data_path / "production.csv")
-    consumption_df = pd.read_csv(data_path / "consumption.csv")
-    
-    production_df['timestamp'] = pd.to_datetime(production_df['timestamp'])
-    consumption_df['timestamp'] = pd.to_datetime(consumption_df['timestamp'])
+    """Charge et prépare les données CSV (chargeur du DatasetStore)"""
+    METRICS.cache_miss('load_csv_data')
+    production_df = pd.read_csv(DATA_FILES[0])
+    consumption_df = pd.read_csv(DATA_FILES[1])
     
     for df in [production_df, consumption_df]:
+        # Instant UTC (jointures, tri) et heure locale (journées, libellés)
+        df['epoch'], df['timestamp'] = parse_timestamps(df['timestamp'])
         df['date'] = df['timestamp'].dt.date
-        df['time'] = df['timestamp'].dt.strftime('%H:%M')
+        df['time'] = TIME_LABELS[(df['timestamp'].dt.hour * 60 + df['timestamp'].dt.minute).to_numpy()]
+        # Heure doublée du passage à l'heure d'hiver : libellés distincts
+        df.loc[df.duplicated(['date', 'time']), 'time'] += ' bis'
     
     return production_df, consumption_df
 
 
+@st.cache_resource
+def get_data_store():
+    """Données partagées par toutes les sessions, rechargées quand data/ change"""
+    return DatasetStore(load_csv_data, DATA_FILES, name="streamlit").start()
+
+
+def switch_dataset(version):
+    """Callback : passe la session sur une nouvelle version des données"""
+    st.session_state['dataset'] = version
+    production_df = version.payload[0]
+    if st.session_state.get('selected_date') not in set(production_df['date']):
+        st.session_state.pop('selected_date', None)
+
+
+def pinned_dataset(store):
+    """
+    Version des données épinglée par la session
+
+    Une session garde sa version tant que l'utilisateur ne bascule pas ;
+    les nouvelles sessions démarrent sur la dernière version.
+    """
+    if 'dataset' not in st.session_state:
+        st.session_state['dataset'] = store.current()
+    return st.session_state['dataset']
+
+
+def render_dataset_banner(store, pinned):
+    """Signale qu'une version plus récente des données est disponible"""
+    latest = store.current()
+    if latest.number == pinned.number:
+        return
+    col_text, col_button = st.columns([4, 1])
+    col_text.info(f"🔄 Nouvelles données disponibles (version {latest.number}, "
+                  f"affichée : version {pinned.number})")
+    col_button.button("Mettre à jour", on_click=switch_dataset, args=(latest,),
+                      use_container_width=True)
+
+
+@st.cache_data(max_entries=16)
+def load_tariff(tariff_name, data_version, _consumption_df):
+    """Construit le tarif (calendrier Tempo estimé sur l'année complète)"""
+    METRICS.cache_miss('load_tariff')
+    if tariff_name == 'tempo':
+        calendar = tempo_calendar(_consumption_df['timestamp'], _consumption_df['consumption_kw'])
+        return get_tariff(tariff_name, tempo_colors=calendar)
+    return get_tariff(tariff_name)
+
+
+@st.cache_data(max_entries=16)
+def load_capacity_economics(tariff_name, data_version, _production_df, _consumption_df):
+    """Bilan économique annuel pour les capacités du slider (0 à 1500 kWh)"""
+    METRICS.cache_miss('load_capacity_economics')
+    tariff = load_tariff(tariff_name, data_version, _consumption_df)
+    return capacity_sweep_economics(
+        _production_df['timestamp'],
+        _production_df['production_kw'].to_numpy(),
+        _consumption_df['consumption_kw'].to_numpy(),
+        np.arange(0, 1501, 50),
+        tariff
+    )
+
+
+@st.cache_resource(max_entries=4)
+def load_day_index(data_version, _production_df, _consumption_df):
+    """Index des profils journaliers pour la recherche de jours similaires"""
+    METRICS.cache_miss('load_day_index')
+    merged = _production_df[['epoch', 'timestamp', 'production_kw']].merge(
+        _consumption_df[['epoch', 'consumption_kw']], on='epoch'
+    )
+    return DayIndex(merged['timestamp'], merged['production_kw'], merged['consumption_kw'])
+
+
+# Capacités du slider, simulées ensemble sur l'année pour la simulation continue
+SLIDER_CAPACITIES = np.arange(0, 1501, 50)
+
+
+@st.cache_resource(max_entries=4)
+def load_soc_checkpoints(data_version, _production_df, _consumption_df):
+    """États de charge en début de jour de la simulation continue (une passe annuelle)"""
+    METRICS.cache_miss('load_soc_checkpoints')
+    merged = _production_df[['epoch', 'timestamp', 'production_kw']].merge(
+        _consumption_df[['epoch', 'consumption_kw']], on='epoch'
+    )
+    # Même pas de temps que simulate_battery
+    return SocCheckpoints(merged['timestamp'], merged['production_kw'], merged['consumption_kw'],
+                          SLIDER_CAPACITIES, time_step_hours=1/12)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def load_day_simulation(data_version, selected_date, battery_capacity, continuous, _production_df, _consumption_df):
+    """
+    Séries, simulation batterie et diagrammes de flux d'une journée
+
+    En cache par (version des données, date, capacité, mode continu) : le
+    slider de l'heure ne fait qu'indexer la liste des diagrammes.
+    """
+    METRICS.cache_miss('load_day_simulation')
+    times_prod, production = get_date_data(_production_df, selected_date, 'production_kw')
+    times_cons, consumption = get_date_data(_consumption_df, selected_date, 'consumption_kw')
+    day_timestamps = _production_df[_production_df['date'] == selected_date].sort_values('epoch')['timestamp']
+
+    checkpoints = None
+    if continuous:
+        METRICS.cache_call('load_soc_checkpoints')
+        checkpoints = load_soc_checkpoints(data_version, _production_df, _consumption_df)
+    if checkpoints is not None and selected_date in checkpoints:
+        battery_power, battery_soc, network = (
+            values.tolist() for values in checkpoints.simulate_day(battery_capacity, selected_date)
+        )
+    else:
+        battery_power, battery_soc, network = simulate_battery(production, consumption, battery_capacity)
+
+    # Diagrammes de toute la journée, calculés en une passe
+    frames = create_energy_flow_frames(production, consumption, battery_power, network) if len(production) else []
+    return {
+        'times_prod': times_prod, 'production': production,
+        'times_cons': times_cons, 'consumption': consumption,
+        'day_timestamps': day_timestamps,
+        'battery_power': battery_power, 'battery_soc': battery_soc, 'network': network,
+        'frames': frames,
+    }
+
+
+def select_date(date):
+    """Callback : sélectionne une date dans la sidebar"""
+    st.session_state['selected_date'] = date
+
+
+def render_similar_days(day_index, selected_date, k=5):
+    """Panneau des jours les plus proches de la date sélectionnée"""
+    with st.expander("🔎 Jours similaires"):
+        neighbours = day_index.query(selected_date, k)
+        if not neighbours:
+            st.caption("Aucun jour comparable (journée incomplète)")
+            return
+        for date, distance in neighbours:
+            st.button(
+                f"{date.strftime('%d/%m/%Y')}  ·  distance {distance:.2f}",
+                key=f"similar_{date}",
+                on_click=select_date,
+                args=(date,),
+                use_container_width=True
+            )
+
+
 def get_date_data(df, selected_date, value_col):
     """Filtre les données pour une date spécifique"""
     filtered = df[df['date'] == selected_date].copy()
-    filtered = filtered.sort_values('timestamp')
+    filtered = filtered.sort_values('epoch')
     return filtered['time'].tolist(), filtered[value_col].tolist()
 
 
@@ -338,6 +552,8 @@ def calculate_stats(production, consumption, network):
 
 def create_chart(times, data, title, color, fill=False, yaxis_range=None, yaxis_title="Puissance (kW)"):
     """Crée un graphique Plotly standardisé"""
+    import plotly.graph_objects as go  # import différé : hors du chemin de démarrage
+    
     fig = go.Figure()
     
     fig.add_trace(go.Scatter(
@@ -378,6 +594,8 @@ def create_chart(times, data, title, color, fill=False, yaxis_range=None, yaxis_
 
 def create_network_chart(times, network, battery_power):
     """Crée un graphique pour les flux réseau et batterie"""
+    import plotly.graph_objects as go
+    
     fig = go.Figure()
     
     fig.add_trace(go.Scatter(
@@ -414,9 +632,9 @@ def create_network_chart(times, network, battery_power):
     return fig
 
 
-def render_metrics(stats):
-    """Affiche les 4 métriques principales"""
-    col1, col2, col3, col4 = st.columns(4)
+def render_metrics(stats, cost=None):
+    """Affiche les métriques principales (et le coût réseau si disponible)"""
+    col1, col2, col3, col4, col5 = st.columns(5)
     
     metrics = [
         (col1, "☀️ Production Solaire", f"{stats['production_total']:.1f} kWh", "blue"),
@@ -424,7 +642,10 @@ def render_metrics(stats):
         (col3, "⚡ Réseau", 
          f"{'↑' if stats['network_balance'] > 0 else '↓'} {abs(stats['network_balance']):.1f} kWh",
          "green" if stats['network_balance'] > 0 else "red"),
-        (col4, "🔄 Autoconsommation", f"{stats['self_consumption']:.1f} %", "purple")
+        (col4, "🔄 Autoconsommation", f"{stats['self_consumption']:.1f} %", "purple"),
+        (col5, "💶 Coût Réseau",
+         f"{cost['net_cost']:.2f} €" if cost is not None else "-",
+         "red" if cost is not None and cost['net_cost'] > 0 else "green")
     ]
     
     for col, label, value, _ in metrics:
@@ -432,6 +653,36 @@ def render_metrics(stats):
             st.metric(label=label, value=value)
 
 
+def render_debug_panel(spans):
+    """Affiche les durées de l'exécution courante et les taux de succès des caches"""
+    with st.sidebar:
+        st.markdown("### 🐞 Performances")
+        st.dataframe(
+            pd.DataFrame({
+                'étape': list(spans),
+                'ms': [round(duration * 1000, 1) for duration in spans.values()]
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+        cache_stats = METRICS.cache_stats()
+        if cache_stats:
+            st.dataframe(
+                pd.DataFrame([
+                    {'cache': name, 'appels': c['calls'], 'succès': f"{c['hit_rate']:.0%}"}
+                    for name, c in cache_stats.items()
+                ]),
+                use_container_width=True,
+                hide_index=True
+            )
+        st.download_button(
+            "📥 Export Prometheus",
+            METRICS.to_prometheus(),
+            file_name="moonlight_metrics.prom",
+            mime="text/plain"
+        )
+
+
 # ========================================
 # APPLICATION PRINCIPALE
 # ========================================
@@ -440,8 +691,17 @@ def main():
     st.title("☀️ Dashboard Solaire")
     st.markdown("Visualisation de production et consommation énergétique")
     
+    timings = RunTimings("streamlit")
+    
     # Chargement des données
-    production_df, consumption_df = load_csv_data()
+    with timings.span('load'):
+        METRICS.cache_call('load_csv_data')
+        store = get_data_store()
+        dataset = pinned_dataset(store)
+        production_df, consumption_df = dataset.payload
+    STARTUP.mark('data')
+    
+    render_dataset_banner(store, dataset)
     
     # Obtenir les dates disponibles
     available_dates = sorted(production_df['date'].unique())
@@ -453,9 +713,14 @@ def main():
         selected_date = st.selectbox(
             "📅 Date",
             options=available_dates,
-            format_func=lambda d: d.strftime('%d/%m/%Y')
+            format_func=lambda d: d.strftime('%d/%m/%Y'),
+            key='selected_date'
         )
         
+        with timings.span('similar_days'):
+            METRICS.cache_call('load_day_index')
+            render_similar_days(load_day_index(dataset.number, production_df, consumption_df), selected_date)
+        
         battery_capacity = st.slider(
             "🔋 Capacité Batterie (kWh)",
             min_value=0,
@@ -464,73 +729,107 @@ def main():
             step=50
         )
         
+        tariff_name = st.selectbox(
+            "💶 Tarif",
+            options=list(TARIFS),
+            format_func=lambda name: TARIFS[name]().name
+        )
+        
+        continuous = st.checkbox(
+            "🔁 Simulation continue",
+            value=True,
+            help="L'état de charge est reporté d'un jour à l'autre au lieu de repartir de 50 % à minuit"
+        )
+        
         st.markdown("---")
         st.markdown("### 📊 Légende des flux")
         st.markdown("🔵 **Bleu** : Production solaire")
         st.markdown("🟣 **Violet** : Batterie (charge/décharge)")
         st.markdown("🟢 **Vert** : Injection réseau")
         st.markdown("🔴 **Rouge** : Soutirage réseau")
-    
-    # Récupération des données
-    times_prod, production = get_date_data(production_df, selected_date, 'production_kw')
-    times_cons, consumption = get_date_data(consumption_df, selected_date, 'consumption_kw')
-    
-    # Simulation batterie
-    battery_power, battery_soc, network = simulate_battery(
-        production, consumption, battery_capacity
-    )
-    
-    # Calcul des statistiques
-    stats = calculate_stats(production, consumption, network)
+        
+        st.markdown("---")
+        show_debug = st.checkbox("🐞 Debug performances", value=st.query_params.get("debug") == "1")
+    
+    # Journée, simulation batterie et diagrammes (en cache)
+    with timings.span('simulation'):
+        METRICS.cache_call('load_day_simulation')
+        day = load_day_simulation(dataset.number, selected_date, battery_capacity, continuous,
+                                  production_df, consumption_df)
+        times_prod, production = day['times_prod'], day['production']
+        times_cons, consumption = day['times_cons'], day['consumption']
+        day_timestamps = day['day_timestamps']
+        battery_power, battery_soc, network = day['battery_power'], day['battery_soc'], day['network']
+    
+    # Calcul des statistiques et du coût réseau de la journée
+    with timings.span('stats'):
+        stats = calculate_stats(production, consumption, network)
+        METRICS.cache_call('load_tariff')
+        tariff = load_tariff(tariff_name, dataset.number, consumption_df)
+        cost = price_grid(day_timestamps, network, tariff) if len(day_timestamps) == len(network) else None
     
     # Affichage des métriques
-    render_metrics(stats)
+    render_metrics(stats, cost)
     
     st.markdown("---")
     
     # Graphiques
     col1, col2 = st.columns(2)
     
-    with col1:
-        fig_prod = create_chart(times_prod, production, "Production Solaire", "#3b82f6", fill=True)
-        st.plotly_chart(fig_prod, use_container_width=True)
-        
-        fig_network = create_network_chart(times_prod, network, battery_power)
-        st.plotly_chart(fig_network, use_container_width=True)
-    
-    with col2:
-        fig_cons = create_chart(times_cons, consumption, "Consommation Quartier", "#10b981", fill=True)
-        st.plotly_chart(fig_cons, use_container_width=True)
+    with timings.span('figures'):
+        with col1:
+            fig_prod = create_chart(times_prod, production, "Production Solaire", "#3b82f6", fill=True)
+            st.plotly_chart(fig_prod, use_container_width=True)
+            
+            fig_network = create_network_chart(times_prod, network, battery_power)
+            st.plotly_chart(fig_network, use_container_width=True)
         
-        if battery_capacity > 0:
-            fig_soc = create_chart(
-                times_prod, 
-                battery_soc, 
-                "État de Charge Batterie (%)", 
-                "#8b5cf6", 
-                fill=True,
-                yaxis_range=[0, 100],
-                yaxis_title="État de charge (%)"
+        with col2:
+            fig_cons = create_chart(times_cons, consumption, "Consommation Quartier", "#10b981", fill=True)
+            st.plotly_chart(fig_cons, use_container_width=True)
+            
+            if battery_capacity > 0:
+                fig_soc = create_chart(
+                    times_prod, 
+                    battery_soc, 
+                    "État de Charge Batterie (%)", 
+                    "#8b5cf6", 
+                    fill=True,
+                    yaxis_range=[0, 100],
+                    yaxis_title="État de charge (%)"
+                )
+                st.plotly_chart(fig_soc, use_container_width=True)
+    
+    # Économie de la batterie sur l'année
+    with st.expander("💶 Économie de la batterie (année complète)"):
+        with timings.span('economics'):
+            METRICS.cache_call('load_capacity_economics')
+            economics = load_capacity_economics(tariff_name, dataset.number, production_df, consumption_df)
+            fig_eco = create_chart(
+                economics['capacity_kwh'],
+                economics['annual_gain'],
+                "Gain annuel net (€/an, amortissement inclus)",
+                "#10b981",
+                yaxis_title="€/an"
+            )
+            fig_eco.update_xaxes(title="Capacité (kWh)", tickformat=None)
+            st.plotly_chart(fig_eco, use_container_width=True)
+            st.dataframe(
+                economics[['capacity_kwh', 'net_cost', 'annual_savings', 'payback_years']].round(1),
+                use_container_width=True,
+                hide_index=True
             )
-            st.plotly_chart(fig_soc, use_container_width=True)
     
     # Diagramme de flux d'énergie
     st.markdown("---")
     st.markdown("### 🔄 Diagramme de Flux d'Énergie")
     
-    # Obtenir les valeurs moyennes pour le diagramme
+    # Diagrammes de toute la journée (en cache) : le slider indexe la liste
     if len(production) > 0:
-        mid_index = len(production) // 2
-        prod_current = production[mid_index]
-        cons_current = consumption[mid_index]
-        bat_current = battery_power[mid_index]
-        net_current = network[mid_index]
+        frames = day['frames']
         
-        # Afficher le diagramme SVG
-        energy_diagram = create_energy_flow_diagram(
-            prod_current, cons_current, bat_current, net_current
-        )
-        st.markdown(energy_diagram, unsafe_allow_html=True)
+        mid_index = len(production) // 2
+        st.markdown(frames[mid_index], unsafe_allow_html=True)
         
         # Slider pour naviguer dans le temps
         st.markdown("---")
@@ -543,14 +842,8 @@ def main():
         )
         
         # Mettre à jour le diagramme avec l'heure sélectionnée
-        energy_diagram_current = create_energy_flow_diagram(
-            production[time_index],
-            consumption[time_index],
-            battery_power[time_index],
-            network[time_index]
-        )
         st.markdown(f"**Flux à {times_prod[time_index]}**")
-        st.markdown(energy_diagram_current, unsafe_allow_html=True)
+        st.markdown(frames[time_index], unsafe_allow_html=True)
     
     # Footer
     st.markdown("---")
@@ -559,6 +852,11 @@ def main():
         f"Capacité batterie: {battery_capacity} kWh</p>",
         unsafe_allow_html=True
     )
+    
+    spans = METRICS.record(timings)
+    STARTUP.finish("streamlit")
+    if show_debug:
+        render_debug_panel(spans)
 
 
 if __name__ == "__main__":
@@ -1,10 +1,21 @@
+import os
+import sys
+from pathlib import Path
+
+# Modules partagés du pipeline de données (tarifs, instrumentation)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "data-fetcher"))
+from profiling import STARTUP
+
 import streamlit as st
+STARTUP.mark('import_streamlit')
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import os
-from datetime import datetime, timedelta
 import numpy as np
+import plotly.graph_objects as go
+from tariff import TARIFS, get_tariff, price_grid, tempo_calendar
+from duration_curves import load_duration_analysis, peaks_table
+from continuous import SocCheckpoints
+from timebase import parse_timestamps
+STARTUP.mark('imports')
 
 # --- 1. CONFIGURATION DE LA PAGE ---
 st.set_page_config(
@@ -53,6 +64,9 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- 3. FONCTIONS UTILITAIRES ---
+# Libellés HH:MM indexés par minute de la journée (bien plus rapide que dt.strftime)
+TIME_LABELS = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60)])
+
 @st.cache_data
 def load_csv_data(file_path):
     """Charge les données CSV avec gestion d'erreurs."""
@@ -63,14 +77,58 @@ def load_csv_data(file_path):
             st.error(f"Le fichier {file_path} doit contenir les colonnes 'timestamp' et 'value'.")
             return None
             
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        # Instant UTC (jointures) et heure locale (journées, libellés)
+        df['epoch'], df['timestamp'] = parse_timestamps(df['timestamp'])
         df['date'] = df['timestamp'].dt.date
-        df['time'] = df['timestamp'].dt.strftime('%H:%M')
+        df['time'] = TIME_LABELS[(df['timestamp'].dt.hour * 60 + df['timestamp'].dt.minute).to_numpy()]
+        # Heure doublée du passage à l'heure d'hiver : libellés distincts
+        df.loc[df.duplicated(['date', 'time']), 'time'] += ' bis'
         return df
     except Exception as e:
         st.error(f"Erreur lors du chargement de {file_path}: {e}")
         return None
 
+# Capacités de l'analyse des pointes (celles du slider, plus la référence sans batterie)
+DURATION_CAPACITIES = np.arange(0, 1001, 10)
+
+@st.cache_resource
+def load_peak_analysis(data_dir, _production_df, _consumption_df):
+    """Monotones et pointes de l'année complète (cache .npz dans data/cache)"""
+    merged = _production_df[['epoch', 'timestamp', 'value']].merge(
+        _consumption_df[['epoch', 'value']], on='epoch', suffixes=('_prod', '_cons')
+    )
+    return load_duration_analysis(
+        os.path.join(data_dir, 'cache'),
+        merged['timestamp'], merged['value_prod'], merged['value_cons'],
+        DURATION_CAPACITIES, min_soc=0.10, max_soc=0.80
+    )
+
+@st.cache_resource
+def load_soc_checkpoints(data_dir, _production_df, _consumption_df):
+    """États de charge en début de jour de la simulation continue (une passe annuelle)"""
+    merged = _production_df[['epoch', 'timestamp', 'value']].merge(
+        _consumption_df[['epoch', 'value']], on='epoch', suffixes=('_prod', '_cons')
+    )
+    return SocCheckpoints(
+        merged['timestamp'], merged['value_prod'], merged['value_cons'],
+        DURATION_CAPACITIES, min_soc=0.10, max_soc=0.80
+    )
+
+@st.cache_data
+def load_tariff(tariff_name, data_dir, _consumption_df):
+    """Tarif (calendrier Tempo estimé sur l'année complète)"""
+    if tariff_name == 'tempo':
+        calendar = tempo_calendar(_consumption_df['timestamp'], _consumption_df['value'])
+        return get_tariff(tariff_name, tempo_colors=calendar)
+    return get_tariff(tariff_name)
+
+def simulate_battery_continuous(checkpoints, battery_capacity_kwh, date):
+    """Journée de la simulation continue, aux conventions de simulate_battery"""
+    battery_power, battery_soc, network = checkpoints.simulate_day(battery_capacity_kwh, date)
+    # Ici positif = charge et état de charge après le pas de temps
+    soc_after = battery_soc - battery_power * checkpoints.time_step_hours / battery_capacity_kwh * 100
+    return (-battery_power).tolist(), soc_after.tolist(), network.tolist()
+
 def simulate_battery(production, consumption, battery_capacity_kwh):
     """Simule le comportement de la batterie et les flux réseau."""
     time_step_hours = 0.25 # Données supposées en pas de 15 min
@@ -120,8 +178,8 @@ def simulate_battery(production, consumption, battery_capacity_kwh):
     
     return battery_power, battery_soc, network_power
 
-def calculate_daily_stats(production, consumption, network, time_step=0.25):
-    """Calcule les statistiques globales pour la journée."""
+def calculate_daily_stats(production, consumption, network, time_step=0.25, timestamps=None, tariff=None):
+    """Calcule les statistiques globales pour la journée (et le coût réseau si un tarif est fourni)."""
     production_total = sum(production) * time_step
     consumption_total = sum(consumption) * time_step
     
@@ -139,13 +197,18 @@ def calculate_daily_stats(production, consumption, network, time_step=0.25):
     else:
         self_consumption_pct = 0
     
+    cost_total = None
+    if tariff is not None and timestamps is not None and len(timestamps) == len(network):
+        cost_total = price_grid(timestamps, network, tariff, time_step)['net_cost']
+    
     return {
         'production_total': production_total,
         'production_max': production_max,
         'consumption_total': consumption_total,
         'consumption_max': consumption_max,
         'network_balance': network_balance,
-        'self_consumption': max(0, min(100, self_consumption_pct))
+        'self_consumption': max(0, min(100, self_consumption_pct)),
+        'cost_total': cost_total
     }
 
 # --- 4. INTERFACE PRINCIPALE ---
@@ -195,6 +258,7 @@ def main():
     
     if production_df is None or consumption_df is None:
         return
+    STARTUP.mark('data')
     
     # --- Sidebar ---
     with st.sidebar:
@@ -215,6 +279,18 @@ def main():
             step=10
         )
         
+        tariff_name = st.selectbox(
+            "💶 Tarif",
+            list(TARIFS),
+            format_func=lambda name: TARIFS[name]().name
+        )
+        
+        continuous = st.checkbox(
+            "🔁 Simulation continue",
+            value=True,
+            help="L'état de charge est reporté d'un jour à l'autre au lieu de repartir de 50 % à minuit"
+        )
+        
         st.markdown("---")
         st.caption("Données sources : data/*.csv")
     
@@ -232,11 +308,23 @@ def main():
     time_labels = prod_day['time'].tolist()
     
     # --- Simulation ---
-    battery_power, battery_soc, network_power = simulate_battery(
-        production_values, consumption_values, battery_capacity
-    )
+    checkpoints = load_soc_checkpoints(data_dir, production_df, consumption_df) if continuous else None
+    if checkpoints is not None and selected_date in checkpoints:
+        battery_power, battery_soc, network_power = simulate_battery_continuous(
+            checkpoints, battery_capacity, selected_date
+        )
+    else:
+        battery_power, battery_soc, network_power = simulate_battery(
+            production_values, consumption_values, battery_capacity
+        )
+    
+    # Tarif (calendrier Tempo estimé sur l'année complète, en cache)
+    tariff = load_tariff(tariff_name, data_dir, consumption_df)
     
-    stats = calculate_daily_stats(production_values, consumption_values, network_power)
+    stats = calculate_daily_stats(
+        production_values, consumption_values, network_power,
+        timestamps=prod_day['timestamp'], tariff=tariff
+    )
     
     # --- Affichage des KPIs (Cartes) ---
     col1, col2, col3, col4 = st.columns(4)
@@ -274,6 +362,7 @@ def main():
         network_color = "#ef4444" if net_bal < 0 else "#10b981"
         network_icon = "⚡" if net_bal < 0 else "↗️"
         network_text = "soutiré" if net_bal < 0 else "injecté"
+        cost_text = f"{stats['cost_total']:.2f} €" if stats['cost_total'] is not None else "-"
         
         st.markdown(f"""
         <div class='card'>
@@ -283,7 +372,7 @@ def main():
             </div>
             <div style='color: #9ca3af; margin-top: 0.5rem;'>Réseau</div>
             <div style='color: #6b7280; font-size: 0.85rem; margin-top: 0.25rem;'>
-                {network_text} du réseau
+                {network_text} du réseau · {cost_text}
             </div>
         </div>
         """, unsafe_allow_html=True)
@@ -305,11 +394,12 @@ def main():
     st.markdown("<br>", unsafe_allow_html=True)
     
     # --- Graphiques (Tabs) ---
-    tab1, tab2, tab3, tab4 = st.tabs([
+    tab1, tab2, tab3, tab4, tab5 = st.tabs([
         "📈 Production", 
         "🏠 Consommation", 
         "⚡ Réseau", 
-        "🔋 Batterie"
+        "🔋 Batterie",
+        "📉 Monotones & Pointes"
     ])
     
     # Configuration commune pour les graphiques
@@ -356,7 +446,8 @@ def main():
         st.plotly_chart(fig_net, use_container_width=True)
     
     with tab4:
-        # Subplots pour la batterie
+        # Subplots pour la batterie (import différé : module plotly.subplots lourd)
+        from plotly.subplots import make_subplots
         fig_bat = make_subplots(
             rows=2, cols=1,
             subplot_titles=('Puissance Batterie (kW)', 'État de Charge (%)'),
@@ -388,6 +479,46 @@ def main():
         
         st.plotly_chart(fig_bat, use_container_width=True)
     
+    with tab5:
+        analysis = load_peak_analysis(data_dir, production_df, consumption_df)
+        hours = analysis['duration_hours']
+        cap_idx = int(np.abs(analysis['capacities'] - battery_capacity).argmin())
+        peak_ref = analysis['residual_peak'][0]
+        peak_bat = analysis['residual_peak'][cap_idx]
+        
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Pointe charge nette", f"{analysis['net_load_curve'][0]:.1f} kW")
+        m2.metric(f"Pointe résiduelle ({battery_capacity} kWh)", f"{peak_bat:.1f} kW",
+                  delta=f"{peak_bat - peak_ref:.1f} kW", delta_color="inverse")
+        m3.metric("Heures de soutirage / an", f"{analysis['hours_above_zero'][cap_idx]:.0f} h")
+        
+        fig_mono = go.Figure()
+        fig_mono.add_trace(go.Scatter(x=hours, y=analysis['load_curve'], name='Consommation',
+                                      line=dict(color='#8b5cf6', width=2)))
+        fig_mono.add_trace(go.Scatter(x=hours, y=analysis['net_load_curve'], name='Charge nette',
+                                      line=dict(color='#fbbf24', width=2)))
+        fig_mono.add_trace(go.Scatter(x=hours, y=analysis['residual_curves'][0], name='Soutirage sans batterie',
+                                      line=dict(color='#ef4444', width=2, dash='dot')))
+        fig_mono.add_trace(go.Scatter(x=hours, y=analysis['residual_curves'][cap_idx],
+                                      name=f'Soutirage avec {battery_capacity} kWh',
+                                      line=dict(color='#10b981', width=2)))
+        fig_mono.update_layout(title="Monotones annuelles (kW)", xaxis_title="Heures / an", **common_layout)
+        st.plotly_chart(fig_mono, use_container_width=True)
+        
+        fig_res = go.Figure()
+        fig_res.add_trace(go.Scatter(x=analysis['capacities'], y=analysis['residual_peak'],
+                                     line=dict(color='#3b82f6', width=2), name='Pointe résiduelle'))
+        fig_res.update_layout(title="Pointe de soutirage résiduelle par capacité (kW)",
+                              xaxis_title="Capacité (kWh)", **common_layout)
+        st.plotly_chart(fig_res, use_container_width=True)
+        
+        st.markdown("#### ⚠️ Journées de plus forte charge nette")
+        peaks = peaks_table(analysis)
+        st.dataframe(pd.DataFrame({
+            'Date': peaks['timestamp'].dt.strftime('%d/%m/%Y %H:%M'),
+            'Charge nette (kW)': peaks['net_load_kw'].round(1),
+        }), hide_index=True, use_container_width=True)
+    
     # --- Flux instantanés (Snapshot à midi) ---
     st.markdown("### 🔄 Flux d'Énergie (Aperçu à midi)")
     
@@ -422,4 +553,5 @@ def main():
             </div>""", unsafe_allow_html=True)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    STARTUP.finish("streamlit_app2")
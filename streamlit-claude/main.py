@@ -1,30 +1,121 @@
-from nicegui import ui, app
-import pandas as pd
-import plotly.graph_objects as go
+import asyncio
+import sys
 from pathlib import Path
-from datetime import datetime
+
+# Modules partagés du pipeline de données (instrumentation)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "data-fetcher"))
+from profiling import METRICS, STARTUP, RunTimings
+from svg_template import SvgTemplate
+from similar_days import DayIndex
+from dataset_store import DatasetStore
+from replay import ReplayHub, ReplayStream
+from continuous import SocCheckpoints
+from battery import INITIAL_SOC
+from dataset import default_files
+from timebase import parse_timestamps
+
+from nicegui import ui, app, run, background_tasks
+from fastapi.responses import PlainTextResponse
+STARTUP.mark('import_nicegui')
+import pandas as pd
 import numpy as np
+import plotly.graph_objects as go
+STARTUP.mark('imports')
 
 # ========================================
 # 1. LOGIQUE METIER & DONNEES
 # ========================================
 
+# Libellés HH:MM indexés par minute de la journée (bien plus rapide que dt.strftime)
+TIME_LABELS = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60)])
+
+# Fichiers publiés par fetch_data.py dans data/ à la racine du dépôt (indépendant du cwd)
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DATA_FILES = default_files(DATA_DIR)
+
+def read_series(path):
+    """Lit un CSV (timestamp + colonne de valeurs) trié par instant (epoch UTC, heure locale)"""
+    df = pd.read_csv(path)
+    if 'value' not in df.columns:
+        col = [c for c in df.columns if 'kw' in c.lower() or 'value' in c.lower()][0]
+        df['value'] = df[col]
+    df['epoch'], df['timestamp'] = parse_timestamps(df['timestamp'])
+    return df[['epoch', 'timestamp', 'value']].sort_values('epoch')
+
+# Capacités du slider, simulées ensemble sur l'année pour la simulation continue
+SLIDER_CAPACITIES = np.arange(0, 1501, 50)
+
+
+class AppData:
+    """
+    Données de l'application, chargées une fois par processus
+
+    Partagées en lecture seule par toutes les connexions : séries alignées
+    sur les instants communs et découpage par jour local (date -> tranche),
+    si bien qu'une connexion ne paie que le travail de la journée affichée.
+    """
+
+    def __init__(self, prod, cons):
+        merged = prod.merge(cons.drop(columns='timestamp'), on='epoch', suffixes=('_prod', '_cons'))
+        timestamps = merged['timestamp']
+        self.timestamps = timestamps.to_numpy(dtype='datetime64[ns]')
+        self.production = merged['value_prod'].to_numpy(dtype=float)
+        self.consumption = merged['value_cons'].to_numpy(dtype=float)
+        days = timestamps.dt.normalize().to_numpy()
+        self.times = TIME_LABELS[(timestamps.dt.hour * 60 + timestamps.dt.minute).to_numpy()]
+        # Heure doublée du passage à l'heure d'hiver : libellés distincts
+        repeated = pd.DataFrame({'day': days, 'time': self.times}).duplicated().to_numpy()
+        self.times = np.where(repeated, np.char.add(self.times, ' bis'), self.times)
+        for values in (self.timestamps, self.production, self.consumption, self.times):
+            values.setflags(write=False)
+
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        ends = np.r_[starts[1:], len(days)]
+        self.dates = [pd.Timestamp(days[i]).date() for i in starts]
+        self.day_slices = {d: slice(a, b) for d, a, b in zip(self.dates, starts, ends)}
+        self.date_options = {d: d.strftime('%d/%m/%Y') for d in self.dates}
+        self.day_index = DayIndex(timestamps, self.production, self.consumption)
+        # Simulation continue : même pas de temps que simulate_battery_logic
+        self.checkpoints = SocCheckpoints(self.timestamps, self.production, self.consumption,
+                                          SLIDER_CAPACITIES, time_step_hours=1/12)
+
+    def __len__(self):
+        return len(self.production)
+
+    def day(self, date):
+        """Séries d'une journée : (libellés horaires, production, consommation)"""
+        day_slice = self.day_slices.get(date)
+        if day_slice is None:
+            return [], [], []
+        return (self.times[day_slice].tolist(), self.production[day_slice].tolist(),
+                self.consumption[day_slice].tolist())
+
 def load_data():
-    data_dir = Path("data")
+    """Charge les CSV et prépare les données partagées (chargeur du DatasetStore)"""
+    METRICS.cache_miss('load_data')
+    return AppData(read_series(DATA_FILES[0]), read_series(DATA_FILES[1]))
+
+# Données partagées par toutes les pages, rechargées quand data/ change
+DATA_STORE = DatasetStore(load_data, DATA_FILES, name="nicegui")
+
+# Rejeu en direct : flux partagés entre les connexions (même jour, même
+# capacité, même vitesse -> une seule simulation pas à pas)
+REPLAY_HUB = ReplayHub()
+REPLAY_SPEEDS = {60: '60×', 600: '600×', 3600: '3600×'}
+
+def load_data_at_boot():
+    """Charge les données au démarrage du serveur puis lance la surveillance"""
     try:
-        prod = pd.read_csv(data_dir / "production.csv", parse_dates=['timestamp'])
-        cons = pd.read_csv(data_dir / "consumption.csv", parse_dates=['timestamp'])
-        
-        for df in [prod, cons]:
-            if 'value' not in df.columns:
-                col = [c for c in df.columns if 'kw' in c.lower() or 'value' in c.lower()][0]
-                df['value'] = df[col]
-            df['date'] = df['timestamp'].dt.date
-            df['time'] = df['timestamp'].dt.strftime('%H:%M')
-        return prod, cons
+        version = DATA_STORE.reload()
+        data = version.payload
+        print(f"📦 Données chargées en {version.load_seconds * 1000:.0f} ms "
+              f"({len(data)} pas de temps, {len(data.dates)} jours)")
     except Exception as e:
-        ui.notify(f"Erreur chargement: {e}", type='negative')
-        return None, None
+        print(f"❌ Erreur chargement: {e}")
+    STARTUP.mark('data')
+    DATA_STORE.start()
+
+app.on_startup(load_data_at_boot)
 
 def simulate_battery_logic(production, consumption, capacity_kwh, time_step_hours=1/12):
     soc = capacity_kwh * 0.5
@@ -71,67 +162,140 @@ def calculate_stats(production, consumption, network):
 # 2. GENERATION SVG
 # ========================================
 
-def get_svg_diagram(prod, cons, bat, net):
-    # Couleurs
-    active, charge, inject, draw, inactive = "#3b82f6", "#8b5cf6", "#10b981", "#ef4444", "#4b5563"
-    
-    # États booléens
-    is_solar = prod > 0.1
-    is_char = bat < -0.1
-    is_dis = bat > 0.1
-    is_inj = net > 0.1
-    is_draw = net < -0.1
-    
-    # Classes CSS pour animation
-    c_sol = "flow-active" if is_solar else "flow-inactive"
-    c_bat = "flow-charge" if is_char else ("flow-active" if is_dis else "flow-inactive")
-    c_grd = "flow-inject" if is_inj else ("flow-draw" if is_draw else "flow-inactive")
-    
-    # --- COORDINATES ---
-    # Solaire (Haut Gauche) : x=100
-    # Réseau (Haut Droite)  : x=400
-    # Batterie (Bas Gauche) : x=100 (Aligné sous solaire)
-    # Maison (Bas Droite)   : x=350 (Décalé pour laisser de l'espace)
-    
-    svg = f"""
+# Couleurs
+ACTIVE, CHARGE, INJECT, DRAW, INACTIVE = "#3b82f6", "#8b5cf6", "#10b981", "#ef4444", "#4b5563"
+
+# --- COORDINATES ---
+# Solaire (Haut Gauche) : x=100
+# Réseau (Haut Droite)  : x=400
+# Batterie (Bas Gauche) : x=100 (Aligné sous solaire)
+# Maison (Bas Droite)   : x=350 (Décalé pour laisser de l'espace)
+SVG_DIAGRAM = SvgTemplate("""
     <svg viewBox="0 0 600 350" xmlns="http://www.w3.org/2000/svg" style="width: 100%; height: 100%; background-color: #1e293b; border-radius: 0.5rem;">
         <defs>
             <marker id="arrow" markerWidth="10" markerHeight="10" refX="9" refY="3" orient="auto"><path d="M0,0 L0,6 L9,3 z" fill="#94a3b8" /></marker>
         </defs>
 
-        <path d="M 150 80 L 150 150 L 400 150 L 400 220" class="flow-line {c_sol}" stroke="{active if is_solar else inactive}" />
+        <path d="M 150 80 L 150 150 L 400 150 L 400 220" class="flow-line $cls_solar" stroke="$stroke_solar" />
         
-        <path d="M 150 80 L 150 220" class="flow-line {c_bat if is_char else 'flow-inactive'}" stroke="{charge if is_char else inactive}" />
+        <path d="M 150 80 L 150 220" class="flow-line $cls_charge" stroke="$stroke_charge" />
         
-        <path d="M 190 250 L 350 250" class="flow-line {c_bat if is_dis else 'flow-inactive'}" stroke="{charge if is_dis else inactive}" />
+        <path d="M 190 250 L 350 250" class="flow-line $cls_discharge" stroke="$stroke_discharge" />
         
-        <path d="M 450 80 L 450 150 L 400 150 L 400 220" class="flow-line {c_grd if is_inj else 'flow-inactive'}" stroke="{inject if is_inj else inactive}" />
-        <path d="M 450 80 L 450 150 L 400 150 L 400 220" class="flow-line {c_grd if is_draw else 'flow-inactive'}" stroke="{draw if is_draw else inactive}" />
+        <path d="M 450 80 L 450 150 L 400 150 L 400 220" class="flow-line $cls_inject" stroke="$stroke_inject" />
+        <path d="M 450 80 L 450 150 L 400 150 L 400 220" class="flow-line $cls_draw" stroke="$stroke_draw" />
 
 
         <rect x="100" y="20" width="100" height="60" rx="8" fill="#0f172a" stroke="#334155" stroke-width="2"/>
         <text x="150" y="45" text-anchor="middle" fill="#3b82f6" font-size="24">☀️</text>
-        <text x="150" y="70" text-anchor="middle" fill="#3b82f6" font-weight="bold">{prod:.1f} kW</text>
+        <text x="150" y="70" text-anchor="middle" fill="#3b82f6" font-weight="bold">$prod kW</text>
         
         <rect x="400" y="20" width="100" height="60" rx="8" fill="#0f172a" stroke="#334155" stroke-width="2"/>
-        <text x="450" y="45" text-anchor="middle" fill="{inject if is_inj else (draw if is_draw else '#94a3b8')}" font-size="24">⚡</text>
-        <text x="450" y="70" text-anchor="middle" fill="{inject if is_inj else (draw if is_draw else '#94a3b8')}" font-weight="bold">{abs(net):.1f} kW</text>
+        <text x="450" y="45" text-anchor="middle" fill="$grid_color" font-size="24">⚡</text>
+        <text x="450" y="70" text-anchor="middle" fill="$grid_color" font-weight="bold">$net kW</text>
 
         <rect x="110" y="220" width="80" height="60" rx="8" fill="#0f172a" stroke="#334155" stroke-width="2"/>
         <text x="150" y="245" text-anchor="middle" fill="#8b5cf6" font-size="24">🔋</text>
-        <text x="150" y="270" text-anchor="middle" fill="#8b5cf6" font-weight="bold">{abs(bat):.1f} kW</text>
+        <text x="150" y="270" text-anchor="middle" fill="#8b5cf6" font-weight="bold">$bat kW</text>
         
         <rect x="350" y="220" width="100" height="80" rx="8" fill="#0f172a" stroke="#334155" stroke-width="2"/>
         <text x="400" y="255" text-anchor="middle" fill="#10b981" font-size="24">🏠</text>
-        <text x="400" y="285" text-anchor="middle" fill="#10b981" font-weight="bold">{cons:.1f} kW</text>
+        <text x="400" y="285" text-anchor="middle" fill="#10b981" font-weight="bold">$cons kW</text>
         
     </svg>
-    """
-    return svg
+    """)
+
+def svg_frame_values(prod, cons, bat, net):
+    """Valeurs formatées des champs dynamiques du diagramme, pour chaque pas de temps"""
+    prod, cons = np.asarray(prod, dtype=float), np.asarray(cons, dtype=float)
+    bat, net = np.asarray(bat, dtype=float), np.asarray(net, dtype=float)
+    
+    # États booléens
+    is_solar = prod > 0.1
+    is_char = bat < -0.1
+    is_dis = (bat > 0.1) & ~is_char
+    is_inj = net > 0.1
+    is_draw = (net < -0.1) & ~is_inj
+    
+    # Classes CSS pour animation et couleurs des traits
+    return {
+        'cls_solar': np.where(is_solar, 'flow-active', 'flow-inactive'),
+        'stroke_solar': np.where(is_solar, ACTIVE, INACTIVE),
+        'cls_charge': np.where(is_char, 'flow-charge', 'flow-inactive'),
+        'stroke_charge': np.where(is_char, CHARGE, INACTIVE),
+        'cls_discharge': np.where(is_dis, 'flow-active', 'flow-inactive'),
+        'stroke_discharge': np.where(is_dis, CHARGE, INACTIVE),
+        'cls_inject': np.where(is_inj, 'flow-inject', 'flow-inactive'),
+        'stroke_inject': np.where(is_inj, INJECT, INACTIVE),
+        'cls_draw': np.where(is_draw, 'flow-draw', 'flow-inactive'),
+        'stroke_draw': np.where(is_draw, DRAW, INACTIVE),
+        'grid_color': np.select([is_inj, is_draw], [INJECT, DRAW], '#94a3b8'),
+        'prod': [f"{v:.1f}" for v in prod.tolist()],
+        'net': [f"{abs(v):.1f}" for v in net.tolist()],
+        'bat': [f"{abs(v):.1f}" for v in bat.tolist()],
+        'cons': [f"{v:.1f}" for v in cons.tolist()],
+    }
+
+def get_svg_frames(prod, cons, bat, net):
+    """Diagrammes de toute la journée en une passe (un par pas de temps)"""
+    return SVG_DIAGRAM.render_frames(svg_frame_values(prod, cons, bat, net))
+
+def get_svg_diagram(prod, cons, bat, net):
+    return get_svg_frames([prod], [cons], [bat], [net])[0]
 # ========================================
 # 3. INTERFACE NICEGUI
 # ========================================
 
+# Délai d'anti-rebond des contrôles (secondes)
+UPDATE_DELAY = 0.15
+
+class UpdateScheduler:
+    """
+    Planificateur des recalculs du tableau de bord
+
+    Les demandes rapprochées (glissement du slider) sont fusionnées : seule
+    la dernière, après UPDATE_DELAY sans nouvelle demande, est calculée. Le
+    calcul lourd tourne dans un thread hors de la boucle d'événements ; un
+    compteur de génération signale les calculs périmés, qui s'interrompent
+    à la prochaine étape et dont le résultat n'atteint jamais le navigateur.
+    """
+
+    def __init__(self, snapshot, compute, apply, delay=UPDATE_DELAY):
+        """
+        Args:
+            snapshot: Lit les contrôles (boucle d'événements), renvoie les entrées
+            compute: compute(entrées, is_stale) -> résultat, ou None si périmé
+            apply: Applique un résultat à l'interface (boucle d'événements)
+            delay: Délai d'anti-rebond (secondes)
+        """
+        self.snapshot = snapshot
+        self.compute = compute
+        self.apply = apply
+        self.delay = delay
+        self.generation = 0
+        self._task = None
+
+    def request(self, *_):
+        """Demande un recalcul (annule la demande en attente)"""
+        self.generation += 1
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = background_tasks.create(self._run(self.generation), name='dashboard_update')
+
+    def run_now(self):
+        """Calcul synchrone (premier affichage de la page)"""
+        result = self.compute(self.snapshot(), lambda: False)
+        if result is not None:
+            self.apply(result)
+
+    async def _run(self, generation):
+        await asyncio.sleep(self.delay)
+        is_stale = lambda: generation != self.generation
+        result = await run.io_bound(self.compute, self.snapshot(), is_stale)
+        if result is None or is_stale():
+            return
+        self.apply(result)
+
 @ui.page('/')
 def main_page():
     ui.add_head_html("""
@@ -150,24 +314,50 @@ def main_page():
     </style>
     """)
 
-    prod_df, cons_df = load_data()
-    if prod_df is None: return
+    page_timings = RunTimings("nicegui")
+    with page_timings.span('load'):
+        METRICS.cache_call('load_data')
+        try:
+            # La page garde sa version ; un rechargement de page passe sur la dernière
+            data_version = DATA_STORE.current()
+        except Exception as e:
+            ui.notify(f"Erreur chargement: {e}", type='negative')
+            return
+    data = data_version.payload
+    day_index = data.day_index
 
-    dates = sorted(prod_df['date'].unique())
-    date_options = {d: d.strftime('%d/%m/%Y') for d in dates}
+    dates = data.dates
+    date_options = dict(data.date_options)
     
-    state = {'date': dates[-1], 'capacity': 500, 'time_idx': 0, 'data_len': 0}
+    state = {'date': dates[-1], 'capacity': 500, 'continuous': True, 'time_idx': 0, 'data_len': 0}
 
     with ui.header().classes('bg-slate-900 border-b border-slate-700'):
         ui.label('☀️ Dashboard Solaire').classes('text-2xl font-bold text-white')
+        ui.space()
+        with ui.row().classes('items-center gap-2') as update_banner:
+            update_label = ui.label().classes('text-sm text-amber-400')
+            ui.button('Mettre à jour', on_click=ui.navigate.reload).props('dense flat color=amber')
+        update_banner.set_visibility(False)
+
+    def check_data_version():
+        latest = DATA_STORE.current()
+        if latest.number != data_version.number:
+            update_label.set_text(f"🔄 Nouvelles données disponibles (version {latest.number})")
+            update_banner.set_visibility(True)
+
+    ui.timer(5.0, check_data_version)
 
     with ui.left_drawer(value=True).classes('bg-slate-900 border-r border-slate-700 p-4'):
         ui.label('Paramètres').classes('text-xl font-bold mb-4 text-white')
         ui.label('Date').classes('text-gray-400 text-sm')
         date_select = ui.select(options=date_options, value=state['date']).classes('w-full mb-6').props('dark filled')
+        with ui.expansion('🔎 Jours similaires').classes('w-full mb-6 text-gray-400'):
+            similar_box = ui.column().classes('w-full gap-1')
         ui.label('Capacité Batterie (kWh)').classes('text-gray-400 text-sm')
         cap_slider = ui.slider(min=0, max=1500, step=50, value=state['capacity']).classes('w-full mb-2')
         ui.label().bind_text_from(cap_slider, 'value', backward=lambda x: f"{x} kWh")
+        continuous_switch = ui.switch('🔁 Simulation continue', value=True).classes('mt-4 text-gray-400')
+        ui.label("État de charge reporté d'un jour à l'autre").classes('text-xs text-gray-500')
         
     with ui.column().classes('w-full p-4 gap-4'):
         # --- CARTES KPI ---
@@ -215,6 +405,20 @@ def main_page():
                 ui.label('Heure:').classes('text-gray-400')
                 time_slider = ui.slider(min=0, max=96, step=1, value=0).classes('flex-grow')
                 time_label = ui.label('00:00').classes('w-16 font-mono text-white')
+            with ui.row().classes('w-full items-center gap-4'):
+                replay_switch = ui.switch('▶ Direct').props('color=amber')
+                speed_select = ui.select(REPLAY_SPEEDS, value=600).classes('w-24')
+                replay_label = ui.label('').classes('text-sm font-mono text-amber-400')
+
+        # --- DEBUG PERFORMANCES ---
+        with ui.expansion('🐞 Debug performances').classes('w-full card-dark'):
+            debug_table = ui.table(
+                columns=[{'name': 'span', 'label': 'Étape', 'field': 'span', 'align': 'left'},
+                         {'name': 'ms', 'label': 'ms', 'field': 'ms'}],
+                rows=[]
+            ).props('dense flat dark').classes('w-full')
+            debug_cache = ui.label().classes('text-sm text-gray-400')
+            ui.link('Export Prometheus (/metrics)', '/metrics', new_tab=True).classes('text-sm')
 
     # --- CONFIGURATION STYLE GRAPHIQUE ---
     def get_common_layout():
@@ -238,69 +442,183 @@ def main_page():
         )
 
     def update_flow_diagram():
+        if replay['subscription'] is not None: return
         idx = int(time_slider.value)
         if idx >= state['data_len']: idx = state['data_len'] - 1
         current_t = state['current_time'][idx]
         time_label.text = current_t
-        p, c = state['current_prod'][idx], state['current_cons'][idx]
-        b, n = state['current_bat'][idx], state['current_net'][idx]
-        svg_container.content = get_svg_diagram(p, c, b, n)
-
-    def update_dashboard():
-        sel_date, sel_cap = date_select.value, cap_slider.value
-        day_prod = prod_df[prod_df['date'] == sel_date].sort_values('timestamp')
-        day_cons = cons_df[cons_df['date'] == sel_date].sort_values('timestamp')
-        
-        if len(day_prod) == 0: return
+        svg_container.content = state['frames'][idx]
 
-        vals_prod, vals_cons = day_prod['value'].tolist(), day_cons['value'].tolist()
-        vals_time = day_prod['time'].tolist()
-        
-        state.update({'data_len': len(vals_prod), 'current_prod': vals_prod, 
-                      'current_cons': vals_cons, 'current_time': vals_time})
-        time_slider.props(f'max={len(vals_prod)-1}')
+    def update_similar_days(sel_date):
+        if state.get('similar_date') == sel_date: return
+        state['similar_date'] = sel_date
+        similar_box.clear()
+        with similar_box:
+            neighbours = day_index.query(sel_date, 5)
+            if not neighbours:
+                ui.label('Aucun jour comparable').classes('text-sm text-gray-400')
+            for d, dist in neighbours:
+                ui.button(f"{d.strftime('%d/%m/%Y')} · {dist:.2f}",
+                          on_click=lambda d=d: date_select.set_value(d)).props('flat dense no-caps').classes('w-full')
+
+    def update_debug_panel(spans):
+        debug_table.rows = [{'span': name, 'ms': round(duration * 1000, 1)} for name, duration in spans.items()]
+        debug_table.update()
+        debug_cache.text = ' · '.join(
+            f"{name}: {c['hit_rate']:.0%} ({c['calls']} appels)" for name, c in METRICS.cache_stats().items()
+        )
+
+    def dashboard_inputs():
+        return {'date': date_select.value, 'capacity': cap_slider.value, 'continuous': continuous_switch.value}
+
+    def compute_dashboard(inputs, is_stale):
+        """Calcul d'une mise à jour (thread), None si une demande plus récente existe"""
+        timings = RunTimings("nicegui")
+        with timings.span('day_slice'):
+            vals_time, vals_prod, vals_cons = data.day(inputs['date'])
+        if len(vals_prod) == 0 or is_stale(): return None
         
-        bat_pow, bat_soc, net_pow = simulate_battery_logic(vals_prod, vals_cons, sel_cap)
-        state.update({'current_bat': bat_pow, 'current_net': net_pow})
+        with timings.span('simulation'):
+            if inputs['continuous'] and inputs['date'] in data.checkpoints:
+                bat_pow, bat_soc, net_pow = (values.tolist() for values in
+                                             data.checkpoints.simulate_day(inputs['capacity'], inputs['date']))
+            else:
+                bat_pow, bat_soc, net_pow = simulate_battery_logic(vals_prod, vals_cons, inputs['capacity'])
+        with timings.span('stats'):
+            stats = calculate_stats(vals_prod, vals_cons, net_pow)
+        if is_stale(): return None
         
-        # Stats
-        stats = calculate_stats(vals_prod, vals_cons, net_pow)
-        m_prod.text = f"{stats['prod']:.1f} kWh"
-        m_cons.text = f"{stats['cons']:.1f} kWh"
-        m_net.text = f"{abs(stats['net']):.1f} kWh"
-        m_net.classes('text-green-500' if stats['net'] > 0 else 'text-red-500', remove='text-green-500 text-red-500')
-        m_self.text = f"{stats['self']:.1f} %"
+        with timings.span('figures'):
+            layout = get_common_layout()
+            
+            # 1. Chart Solar
+            fig_s = go.Figure(go.Scatter(x=vals_time, y=vals_prod, fill='tozeroy', line_color='#3b82f6'))
+            fig_s.update_layout(**layout)
+            
+            # 2. Chart Cons
+            fig_c = go.Figure(go.Scatter(x=vals_time, y=vals_cons, fill='tozeroy', line_color='#10b981'))
+            fig_c.update_layout(**layout)
+            
+            # 3. Chart Net
+            fig_n = go.Figure(go.Scatter(x=vals_time, y=net_pow, fill='tozeroy', line_color='#06b6d4')) # Cyan
+            fig_n.update_layout(**layout)
+            
+            # 4. Chart Battery SOC
+            fig_b = go.Figure(go.Scatter(x=vals_time, y=bat_soc, fill='tozeroy', line_color='#8b5cf6')) # Violet
+            fig_b.update_layout(**layout)
+            fig_b.update_yaxes(range=[0, 100])
+        if is_stale(): return None
         
-        layout = get_common_layout()
+        with timings.span('svg'):
+            frames = get_svg_frames(vals_prod, vals_cons, bat_pow, net_pow)
         
-        # 1. Chart Solar
-        fig_s = go.Figure(go.Scatter(x=vals_time, y=vals_prod, fill='tozeroy', line_color='#3b82f6'))
-        fig_s.update_layout(**layout)
-        chart_solar.update_figure(fig_s)
+        return {'inputs': inputs, 'timings': timings, 'stats': stats,
+                'figures': (fig_s, fig_c, fig_n, fig_b), 'frames': frames,
+                'state': {'data_len': len(vals_prod), 'current_prod': vals_prod, 'current_cons': vals_cons,
+                          'current_time': vals_time, 'current_bat': bat_pow, 'current_net': net_pow}}
+
+    def apply_dashboard(result):
+        """Pousse un résultat vers le navigateur (boucle d'événements)"""
+        timings = result['timings']
+        state.update(result['state'], **result['inputs'])
+        time_slider.props(f"max={state['data_len'] - 1}")
+
+        with timings.span('similar_days'):
+            update_similar_days(result['inputs']['date'])
         
-        # 2. Chart Cons
-        fig_c = go.Figure(go.Scatter(x=vals_time, y=vals_cons, fill='tozeroy', line_color='#10b981'))
-        fig_c.update_layout(**layout)
-        chart_cons.update_figure(fig_c)
+        # Stats
+        with timings.span('stats'):
+            stats = result['stats']
+            m_prod.text = f"{stats['prod']:.1f} kWh"
+            m_cons.text = f"{stats['cons']:.1f} kWh"
+            m_net.text = f"{abs(stats['net']):.1f} kWh"
+            m_net.classes('text-green-500' if stats['net'] > 0 else 'text-red-500', remove='text-green-500 text-red-500')
+            m_self.text = f"{stats['self']:.1f} %"
         
-        # 3. Chart Net
-        fig_n = go.Figure(go.Scatter(x=vals_time, y=net_pow, fill='tozeroy', line_color='#06b6d4')) # Cyan
-        fig_n.update_layout(**layout)
-        chart_net.update_figure(fig_n)
+        with timings.span('figures'):
+            for chart, fig in zip((chart_solar, chart_cons, chart_net, chart_batt), result['figures']):
+                chart.update_figure(fig)
         
-        # 4. Chart Battery SOC
-        fig_b = go.Figure(go.Scatter(x=vals_time, y=bat_soc, fill='tozeroy', line_color='#8b5cf6')) # Violet
-        fig_b.update_layout(**layout)
-        fig_b.update_yaxes(range=[0, 100])
-        chart_batt.update_figure(fig_b)
+        with timings.span('svg'):
+            state['frames'] = result['frames']
+            update_flow_diagram()
         
-        update_flow_diagram()
+        update_debug_panel(METRICS.record(timings))
+        # Le rejeu en cours suit la journée et la capacité affichées
+        restart_replay()
+
+    replay = {'subscription': None, 'task': None}
+
+    async def consume_replay(subscription):
+        async for message in subscription:
+            batch = message.data
+            if batch.get('done'):
+                break
+            # Seul le dernier échantillon du lot est affiché
+            timestamp = batch['timestamp'][-1]
+            time_label.text = timestamp[11:16]
+            replay_label.text = f"{timestamp[:10]} · SOC {batch['battery_soc'][-1]:.0f} %"
+            svg_container.content = get_svg_diagram(batch['production'][-1], batch['consumption'][-1],
+                                                    batch['battery_power'][-1], batch['network_power'][-1])
+        replay_switch.value = False
+
+    def start_replay():
+        stop_replay()
+        start = data.day_slices[state['date']].start
+        capacity, speed = state['capacity'], speed_select.value
+        initial_soc = INITIAL_SOC
+        if state['continuous'] and state['date'] in data.checkpoints:
+            initial_soc = data.checkpoints.initial_soc(capacity, state['date'])
+        key = (data_version.number, start, capacity, speed, initial_soc)
+        subscription = REPLAY_HUB.subscribe(key, lambda: ReplayStream(
+            data.timestamps, data.production, data.consumption, capacity, speed, start,
+            time_step_hours=1/12, initial_soc=initial_soc))  # même pas que simulate_battery_logic
+        replay['subscription'] = subscription
+        replay['task'] = background_tasks.create(consume_replay(subscription), name='replay')
 
-    date_select.on_value_change(update_dashboard)
-    cap_slider.on_value_change(update_dashboard)
-    cap_slider.on('change', update_dashboard)
+    def stop_replay():
+        subscription, task = replay['subscription'], replay['task']
+        replay['subscription'] = replay['task'] = None
+        if subscription is not None:
+            subscription.close()
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        replay_label.text = ''
+
+    def toggle_replay(e):
+        if e.value:
+            start_replay()
+        else:
+            stop_replay()
+            update_flow_diagram()
+
+    def restart_replay(*_):
+        if replay['subscription'] is not None:
+            start_replay()
+
+    scheduler = UpdateScheduler(dashboard_inputs, compute_dashboard, apply_dashboard)
+
+    date_select.on_value_change(scheduler.request)
+    cap_slider.on_value_change(scheduler.request)
+    continuous_switch.on_value_change(scheduler.request)
     time_slider.on_value_change(update_flow_diagram)
+    replay_switch.on_value_change(toggle_replay)
+    speed_select.on_value_change(restart_replay)
+    ui.context.client.on_disconnect(stop_replay)
+
+    METRICS.record(page_timings)
+    STARTUP.mark('first_visit_data')
+    scheduler.run_now()
+    STARTUP.finish("nicegui")
+
+
+app.on_startup(lambda: STARTUP.mark('server_ready'))
+
+
+@app.get('/metrics')
+def metrics():
+    """Export Prometheus des durées et des caches (à scraper en local)"""
+    return PlainTextResponse(METRICS.to_prometheus())
 
-    update_dashboard()
 
 ui.run(title='Dashboard Solaire', dark=True)
\ No newline at end of file
@@ -1,9 +1,19 @@
+import sys
+from pathlib import Path
+from datetime import timedelta
+
+# Modules partagés du pipeline de données (instrumentation)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "data-fetcher"))
+from profiling import STARTUP
+
 import streamlit as st
+STARTUP.mark('import_streamlit')
 import pandas as pd
 import plotly.graph_objects as go
-import plotly.express as px
-from datetime import timedelta
 import numpy as np
+from continuous import SocCheckpoints
+from timebase import parse_timestamps
+STARTUP.mark('imports')
 
 # --- CONFIGURATION DE LA PAGE ---
 st.set_page_config(
@@ -30,26 +40,42 @@ THEME = {
 def load_data():
     try:
         # Adaptation des noms de colonnes si nécessaire
-        prod_df = pd.read_csv('data/production.csv', parse_dates=['timestamp'])
-        cons_df = pd.read_csv('data/consumption.csv', parse_dates=['timestamp'])
+        prod_df = pd.read_csv('data/production.csv')
+        cons_df = pd.read_csv('data/consumption.csv')
+        
+        # Instant UTC (fusion) et heure locale (index d'affichage)
+        for frame in (prod_df, cons_df):
+            frame['epoch'], frame['timestamp'] = parse_timestamps(frame['timestamp'])
         
         # Renommage standard
         prod_df.rename(columns={'value': 'production'}, inplace=True)
         cons_df.rename(columns={'value': 'consumption'}, inplace=True)
         
-        # Fusion sur le timestamp
-        df = pd.merge(prod_df, cons_df, on='timestamp', how='inner')
+        # Fusion sur l'instant UTC (l'heure locale se répète en octobre)
+        df = pd.merge(prod_df, cons_df.drop(columns='timestamp'), on='epoch', how='inner')
+        df = df.sort_values('epoch').drop(columns='epoch')
         df.set_index('timestamp', inplace=True)
         return df
     except FileNotFoundError:
         st.error("⚠️ Fichiers CSV introuvables. Veuillez les placer dans le dossier 'data/'.")
         return pd.DataFrame()
 
+# Capacités du slider, simulées ensemble sur l'année pour la simulation continue
+SLIDER_CAPACITIES = np.arange(50, 1501, 50)
+
+@st.cache_resource
+def load_soc_checkpoints(_df):
+    """États de charge en début de jour de la simulation continue (batterie de 0 à 100 %)"""
+    return SocCheckpoints(_df.index, _df['production'], _df['consumption'], SLIDER_CAPACITIES,
+                          min_soc=0.0, max_soc=1.0)
+
 # --- LOGIQUE DE SIMULATION BATTERIE ---
-def process_energy_flow(df_day, battery_capacity_kwh):
+def process_energy_flow(df_day, battery_capacity_kwh, initial_soc=0.5):
     """
     Simule le comportement de la batterie et du réseau.
     Logique portée depuis le projet Vue.js.
+    initial_soc : état de charge en début de journée (fraction), reporté
+    de la veille en simulation continue.
     """
     # Conversion index temporel en heures pour le calcul de l'énergie (si données en kW)
     # On suppose un pas de temps constant
@@ -62,7 +88,7 @@ def process_energy_flow(df_day, battery_capacity_kwh):
     grid_power = []     # kW (Positif = Injection, Négatif = Soutirage)
     soc = []            # % de charge
     
-    current_battery_kwh = battery_capacity_kwh * 0.5 # On commence à 50%
+    current_battery_kwh = battery_capacity_kwh * initial_soc
     
     for _, row in df_day.iterrows():
         prod = row['production']
@@ -174,6 +200,7 @@ def main():
     df = load_data()
     if df.empty:
         return
+    STARTUP.mark('data')
 
     # Sélecteurs
     min_date = df.index.min().date()
@@ -193,6 +220,12 @@ def main():
         value=500, 
         step=50
     )
+    
+    continuous = st.sidebar.checkbox(
+        "Simulation continue",
+        value=True,
+        help="L'état de charge est reporté d'un jour à l'autre au lieu de repartir de 50 % à minuit"
+    )
 
     # Filtrage et Calculs
     day_df = df[df.index.date == selected_date].copy()
@@ -201,7 +234,12 @@ def main():
         st.warning("Pas de données pour cette date.")
         return
         
-    final_df = process_energy_flow(day_df, battery_cap)
+    initial_soc = 0.5
+    if continuous:
+        checkpoints = load_soc_checkpoints(df)
+        if selected_date in checkpoints:
+            initial_soc = checkpoints.initial_soc(battery_cap, selected_date)
+    final_df = process_energy_flow(day_df, battery_cap, initial_soc)
     
     # KPI Totaux
     total_prod = final_df['production'].sum() / 4 # approx si données 15min
@@ -239,4 +277,5 @@ def main():
         st.plotly_chart(create_chart(final_df, 'battery_soc', "État de Charge Batterie (%)", THEME['purple'], y_axis_title="%"), use_container_width=True)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    STARTUP.finish("streamlit_gemini")
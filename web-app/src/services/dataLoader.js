@@ -56,3 +56,141 @@ async function loadJSON(path) {
   
   return response.json()
 }
+
+// ========================================
+// Fragments statiques (data-fetcher/export_static.py)
+// ========================================
+
+const shardCache = new Map()
+
+/**
+ * Charge le manifeste des fragments et les métadonnées.
+ * @returns {Promise<Object|null>} - { manifest, metadata }, ou null si aucun export n'est publié.
+ */
+export async function loadShardedData() {
+  const response = await fetch('/data/manifest.json')
+  if (!response.ok) return null
+  // Sans export, le serveur de dev (Vite) renvoie index.html avec un statut 200
+  const contentType = response.headers.get('content-type') || ''
+  if (!contentType.includes('json')) return null
+
+  const [manifest, metadata] = await Promise.all([
+    response.json(),
+    loadJSON('/data/metadata.json')
+  ])
+  return { manifest, metadata }
+}
+
+/**
+ * Charge le fragment d'une journée (mis en cache).
+ * @param {string} date - Date 'AAAA-MM-JJ'.
+ * @returns {Promise<Object>} - { production, consumption } au format des lignes CSV,
+ *   et battery (séries précalculées, voir decodeBatteryShard) ou null.
+ */
+export function loadDayShard(date) {
+  return loadShard(`/data/days/${date}.json.gz`)
+}
+
+/**
+ * Charge le fragment d'un mois (mis en cache).
+ * @param {string} month - Mois 'AAAA-MM'.
+ * @returns {Promise<Object>} - { production, consumption } au format des lignes CSV.
+ */
+export function loadMonthShard(month) {
+  return loadShard(`/data/months/${month}.json.gz`)
+}
+
+function loadShard(path) {
+  if (!shardCache.has(path)) {
+    const promise = loadGzipJSON(path).then(shard => ({
+      ...shardToRows(shard),
+      battery: shard.battery ? decodeBatteryShard(shard.battery) : null
+    }))
+    promise.catch(() => shardCache.delete(path))
+    shardCache.set(path, promise)
+  }
+  return shardCache.get(path)
+}
+
+async function loadGzipJSON(path) {
+  const response = await fetch(path)
+
+  if (!response.ok) {
+    throw new Error(`Fichier non trouvé: ${path}`)
+  }
+
+  // Le serveur peut avoir déjà décompressé (Content-Encoding: gzip)
+  const bytes = new Uint8Array(await response.arrayBuffer())
+  if (bytes[0] !== 0x1f || bytes[1] !== 0x8b) {
+    return JSON.parse(new TextDecoder().decode(bytes))
+  }
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'))
+  return new Response(stream).json()
+}
+
+/**
+ * Convertit un fragment en lignes identiques à celles des CSV
+ * ({ timestamp: 'AAAA-MM-JJ HH:MM:SS', production_kw } / { timestamp, consumption_kw }).
+ */
+export function shardToRows(shard) {
+  // Calcul en UTC : pas de décalage lié au fuseau du navigateur
+  const origin = Date.parse(shard.start.replace(' ', 'T') + 'Z')
+  const production = []
+  const consumption = []
+
+  shard.offsets.forEach((offset, i) => {
+    const timestamp = new Date(origin + offset * 60000).toISOString().slice(0, 19).replace('T', ' ')
+    production.push({ timestamp, production_kw: shard.production[i] })
+    consumption.push({ timestamp, consumption_kw: shard.consumption[i] })
+  })
+
+  return { production, consumption }
+}
+
+/**
+ * Décode une série quantifiée (int16 petit-boutiste en base64, valeur = entier × scale).
+ * @param {Object} series - { scale, data }.
+ * @returns {Float64Array} - Valeurs décodées.
+ */
+export function dequantize(series) {
+  const binary = atob(series.data)
+  const view = new DataView(new ArrayBuffer(binary.length))
+  for (let i = 0; i < binary.length; i++) {
+    view.setUint8(i, binary.charCodeAt(i))
+  }
+
+  const values = new Float64Array(binary.length / 2)
+  for (let i = 0; i < values.length; i++) {
+    values[i] = view.getInt16(i * 2, true) * series.scale
+  }
+  return values
+}
+
+/**
+ * Décode les séries batterie précalculées d'un fragment journalier.
+ * @param {Object} battery - { capacities, battery_power, battery_soc, network_power }.
+ * @returns {Object} - { capacities, series(capacityKwh) } ; series renvoie
+ *   { batteryPower, batterySoc, network } pour une capacité de la grille, ou null.
+ */
+export function decodeBatteryShard(battery) {
+  const decoded = {
+    batteryPower: dequantize(battery.battery_power),
+    batterySoc: dequantize(battery.battery_soc),
+    network: dequantize(battery.network_power)
+  }
+  const steps = decoded.network.length / battery.capacities.length
+
+  return {
+    capacities: battery.capacities,
+    series(capacityKwh) {
+      const row = battery.capacities.indexOf(capacityKwh)
+      if (row < 0) return null
+      const slice = values => values.subarray(row * steps, (row + 1) * steps)
+      return {
+        batteryPower: slice(decoded.batteryPower),
+        batterySoc: slice(decoded.batterySoc),
+        network: slice(decoded.network)
+      }
+    }
+  }
+}
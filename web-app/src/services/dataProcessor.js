@@ -78,6 +78,39 @@ export function processDataForDate(productionData, consumptionData, dateString,
 }
 
 
+/**
+ * Builds chart-ready series from a day shard with Python-precomputed battery results
+ * (data-fetcher/export_static.py --battery): no simulation runs in the browser.
+ * @param {Object} day - Day shard from loadDayShard ({ production, consumption, battery }).
+ * @param {number} batteryCapacityKwh - Capacity, must belong to the precomputed grid.
+ * @returns {Object|null} - Same shape as processDataForDate, or null if the capacity is not precomputed.
+ */
+export function precomputedDataForDate(day, batteryCapacityKwh) {
+  const series = day.battery?.series(batteryCapacityKwh);
+  if (!series) return null;
+
+  const processed = {
+    production: [],
+    consumption: [],
+    network: [],
+    battery: [],
+    batterySoc: []
+  };
+
+  day.production.forEach((prodRow, i) => {
+    const timestamp = prodRow.timestamp;
+    const time = timestamp.split(' ')[1].substring(0, 5);
+    processed.production.push({ time, value: prodRow.production_kw, timestamp });
+    processed.consumption.push({ time, value: day.consumption[i].consumption_kw, timestamp });
+    processed.battery.push({ time, value: series.batteryPower[i], timestamp });
+    processed.batterySoc.push({ time, value: series.batterySoc[i], timestamp });
+    processed.network.push({ time, value: series.network[i], timestamp });
+  });
+
+  return processed;
+}
+
+
 /**
  * Calculates summary statistics for the day based on processed data.
  * @param {Array} production - Processed production series.